@@ -0,0 +1,90 @@
+"""Benchmark the embedded local vector store against Qdrant local mode.
+
+Both backends get the same random unit vectors spread over a number of entities
+(17 sections per entity, like a populated profile) and answer the same
+entity-filtered searches.
+
+Usage:
+    python -m benchmarks.local_vector_store --entities 1000 --queries 500
+"""
+import argparse
+import statistics
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.http import models as qdrant_models
+
+from src.utils.local_vector_store import LocalVectorStore
+from src.utils.qdrant_access import DefaultQdrantFilter, QdrantProvider
+
+SECTIONS_PER_ENTITY = 17
+COLLECTION = "benchmark"
+
+
+def make_points(entities: int, dim: int, seed: int) -> list[qdrant_models.PointStruct]:
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((entities * SECTIONS_PER_ENTITY, dim)).astype(np.float32)
+    return [
+        qdrant_models.PointStruct(
+            id=str(uuid.uuid4()),
+            vector=vector.tolist(),
+            payload={"entity_id": f"entity-{i // SECTIONS_PER_ENTITY}", "title": f"section-{i % SECTIONS_PER_ENTITY}"}
+        )
+        for i, vector in enumerate(vectors)
+    ]
+
+
+def time_searches(access, queries: np.ndarray, entities: int, limit: int) -> list[float]:
+    latencies = []
+    for i, query in enumerate(queries):
+        filters = DefaultQdrantFilter().add("entity_id", f"entity-{i % entities}")
+        start = time.perf_counter()
+        access.search(COLLECTION, query.tolist(), filters=filters, limit=limit)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def report(name: str, load_seconds: float, latencies: list[float]):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(
+        f"{name:>14}: load {load_seconds:6.2f}s  "
+        f"search p50 {statistics.median(latencies):6.3f}ms  p95 {p95:6.3f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entities", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--limit", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    points = make_points(args.entities, args.dim, args.seed)
+    queries = np.random.default_rng(args.seed + 1).standard_normal((args.queries, args.dim)).astype(np.float32)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = LocalVectorStore(Path(tmp) / "local")
+        start = time.perf_counter()
+        store.create_collection(COLLECTION, args.dim, recreate=True)
+        store.upsert(COLLECTION, points)
+        report("local store", time.perf_counter() - start, time_searches(store, queries, args.entities, args.limit))
+
+        provider = QdrantProvider(client=QdrantClient(path=str(Path(tmp) / "qdrant")))
+        start = time.perf_counter()
+        provider.client.create_collection(
+            COLLECTION,
+            vectors_config=qdrant_models.VectorParams(size=args.dim, distance=qdrant_models.Distance.COSINE)
+        )
+        provider.client.upsert(COLLECTION, points)
+        report("qdrant local", time.perf_counter() - start, time_searches(provider, queries, args.entities, args.limit))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Benchmark memory and recall of the collection storage options.
+
+Reports, for every storage variant, the estimated RAM needed for 10k entities
+(17 sections each) and recall@k against exact float32 search. Recall of the
+quantized variants is simulated in NumPy the way Qdrant scores them
+(int8 / 1-bit candidates, oversampled, rescored with the original vectors).
+With --qdrant-url the HNSW variants are also measured on a live server.
+
+Section vectors come from the configured collection (--config) or, without it,
+from random vectors.
+
+Usage:
+    python -m benchmarks.quantization --config config.json --k 3
+"""
+import argparse
+import uuid
+from pathlib import Path
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.http import models as qdrant_models
+
+from src.utils.configs import AppConfig
+from src.utils.embedding import reduce_dimensions
+from src.utils.qdrant_clients import qdrant_client
+
+SECTIONS_PER_ENTITY = 17
+ENTITIES = 10_000
+HNSW_M = 16
+
+
+def load_section_vectors(config_path: Path, limit: int) -> np.ndarray:
+    config = AppConfig.from_json(config_path)
+    client = qdrant_client(config.qdrant)
+    vectors, offset = [], None
+    while len(vectors) < limit:
+        points, offset = client.scroll(
+            config.qdrant.collection.name, limit=256, offset=offset, with_vectors=True, with_payload=False
+        )
+        vectors.extend(point.vector for point in points)
+        if offset is None:
+            break
+    return np.asarray(vectors[:limit], dtype=np.float32)
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    return np.argsort(-scores, axis=1, kind="stable")[:, :k]
+
+
+def recall(found: np.ndarray, truth: np.ndarray) -> float:
+    return float(np.mean([len(set(f) & set(t)) / len(t) for f, t in zip(found, truth)]))
+
+
+def rescored(candidate_scores: np.ndarray, exact_scores: np.ndarray, k: int, oversampling: float) -> np.ndarray:
+    candidates = top_k(candidate_scores, max(k, int(k * oversampling)))
+    rescored_scores = np.take_along_axis(exact_scores, candidates, axis=1)
+    return np.take_along_axis(candidates, top_k(rescored_scores, k), axis=1)
+
+
+def scalar_scores(vectors: np.ndarray, queries: np.ndarray) -> np.ndarray:
+    low, high = np.quantile(vectors, [0.005, 0.995])
+    scale = (high - low) / 255
+    quantized = np.clip(np.round((vectors - low) / scale), 0, 255).astype(np.float32)
+    return queries @ quantized.T
+
+
+def binary_scores(vectors: np.ndarray, queries: np.ndarray) -> np.ndarray:
+    return np.sign(queries) @ np.sign(vectors).T
+
+
+def memory_bytes(dim: int, quantization: str, on_disk: bool) -> float:
+    points = ENTITIES * SECTIONS_PER_ENTITY
+    original = 0 if on_disk else points * dim * 4
+    quantized = {"none": 0, "scalar": points * dim, "binary": points * dim / 8}[quantization]
+    graph = points * HNSW_M * 2 * 4
+    return original + quantized + graph
+
+
+def live_hnsw_recall(url: str, vectors: np.ndarray, queries: np.ndarray, k: int):
+    client = QdrantClient(url=url)
+    for m, ef in [(16, 64), (16, 128), (32, 128), (32, 256)]:
+        name = f"bench_{uuid.uuid4().hex[:8]}"
+        client.create_collection(
+            name,
+            vectors_config=qdrant_models.VectorParams(size=vectors.shape[1], distance=qdrant_models.Distance.COSINE),
+            hnsw_config=qdrant_models.HnswConfigDiff(m=m, ef_construct=ef, full_scan_threshold=10)
+        )
+        try:
+            client.upload_collection(name, vectors=vectors, ids=list(range(len(vectors))), wait=True)
+            found, truth = [], []
+            for query in queries:
+                approx = client.query_points(name, query=query.tolist(), limit=k,
+                                             search_params=qdrant_models.SearchParams(hnsw_ef=ef)).points
+                exact = client.query_points(name, query=query.tolist(), limit=k,
+                                            search_params=qdrant_models.SearchParams(exact=True)).points
+                found.append([p.id for p in approx])
+                truth.append([p.id for p in exact])
+            print(f"  hnsw m={m:<3} ef={ef:<4} recall@{k} {recall(np.array(found), np.array(truth)):.3f}")
+        finally:
+            client.delete_collection(name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--config", type=Path, help="AppConfig JSON to read section vectors from")
+    parser.add_argument("--points", type=int, default=20_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=384, help="Dimension of random vectors")
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--oversampling", type=float, default=2.0)
+    parser.add_argument("--qdrant-url", help="Also measure HNSW recall on this server")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    if args.config:
+        data = load_section_vectors(args.config, args.points + args.queries)
+    else:
+        print("No --config given, using random vectors")
+        data = rng.standard_normal((args.points + args.queries, args.dim)).astype(np.float32)
+    data = normalize(data)
+    vectors, queries = data[:-args.queries], data[-args.queries:]
+    dim = vectors.shape[1]
+
+    exact_scores = queries @ vectors.T
+    truth = top_k(exact_scores, args.k)
+
+    print(f"{len(vectors)} vectors of {dim} dims, {len(queries)} queries, recall@{args.k}")
+    print(f"{'variant':<34}{'RAM / 10k entities':>20}{'recall':>10}")
+    variants = [
+        ("float32 in RAM", dim, "none", False, truth),
+        ("float32 on disk", dim, "none", True, truth),
+        ("scalar int8 + rescore", dim, "scalar", True,
+         rescored(scalar_scores(vectors, queries), exact_scores, args.k, args.oversampling)),
+        ("binary + rescore", dim, "binary", True,
+         rescored(binary_scores(vectors, queries), exact_scores, args.k, args.oversampling)),
+    ]
+    for reduced in (dim // 2, dim // 4):
+        reduce = lambda matrix: np.stack([reduce_dimensions(row, reduced) for row in matrix])
+        reduced_scores = reduce(queries) @ reduce(vectors).T
+        variants.append((f"first {reduced} dims, float32", reduced, "none", False, top_k(reduced_scores, args.k)))
+
+    for name, variant_dim, quantization, on_disk, found in variants:
+        megabytes = memory_bytes(variant_dim, quantization, on_disk) / 2**20
+        print(f"{name:<34}{megabytes:>17.1f} MB{recall(found, truth):>10.3f}")
+
+    if args.qdrant_url:
+        live_hnsw_recall(args.qdrant_url, vectors, queries, args.k)
+
+
+if __name__ == "__main__":
+    main()
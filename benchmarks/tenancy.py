@@ -0,0 +1,103 @@
+"""Benchmark per-entity search latency of the tenancy layouts as entities grow.
+
+For every entity count and layout a fresh collection is created with
+CollectionSchema, filled with random section vectors (17 per entity), indexed,
+and searched with entity-scoped queries through QdrantProvider. Needs a running
+Qdrant server: HNSW, tenant indexes and shard keys are not available in local mode.
+
+Usage:
+    python -m benchmarks.tenancy --qdrant-url http://localhost:6333 --entities 100 1000 10000
+"""
+import argparse
+import statistics
+import time
+import uuid
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.http import models as qdrant_models
+
+from src.utils.configs import EmbeddingConfig, QdrantCollectionConfig, QdrantConfig
+from src.utils.qdrant_access import DefaultQdrantFilter, QdrantProvider
+from src.utils.qdrant_schema import CollectionSchema
+
+SECTIONS_PER_ENTITY = 17
+LAYOUTS = {
+    "payload": dict(tenancy="payload"),
+    "tenant_index": dict(tenancy="tenant_index"),
+    "shard_key/16": dict(tenancy="shard_key", shard_key_buckets=16),
+}
+
+
+def wait_for_indexing(client: QdrantClient, collection: str, timeout: float = 600):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if client.get_collection(collection).status == qdrant_models.CollectionStatus.GREEN:
+            return
+        time.sleep(0.5)
+    raise TimeoutError(f"Collection {collection} was not indexed in {timeout}s")
+
+
+def fill(client: QdrantClient, schema: CollectionSchema, collection: str, entities: int, dim: int, rng):
+    for entity in range(entities):
+        entity_id = f"entity-{entity}"
+        schema.prepare_entity(client, collection, entity_id)
+        vectors = rng.standard_normal((SECTIONS_PER_ENTITY, dim)).astype(np.float32)
+        client.upsert(
+            collection,
+            points=[
+                qdrant_models.PointStruct(id=str(uuid.uuid4()), vector=vector.tolist(), payload={"entity_id": entity_id})
+                for vector in vectors
+            ],
+            shard_key_selector=schema.shard_key(entity_id),
+            wait=False
+        )
+    wait_for_indexing(client, collection)
+
+
+def measure(provider: QdrantProvider, collection: str, entities: int, queries: int, dim: int, rng) -> list[float]:
+    latencies = []
+    for _ in range(queries):
+        entity_id = f"entity-{rng.integers(entities)}"
+        start = time.perf_counter()
+        provider.search(
+            collection,
+            rng.standard_normal(dim).tolist(),
+            filters=DefaultQdrantFilter().add("entity_id", entity_id),
+            limit=3,
+            tenant_id=entity_id
+        )
+        latencies.append((time.perf_counter() - start) * 1000)
+    return sorted(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--qdrant-url", required=True)
+    parser.add_argument("--entities", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--layouts", nargs="+", choices=list(LAYOUTS), default=list(LAYOUTS))
+    args = parser.parse_args()
+
+    embedding = EmbeddingConfig()
+    rng = np.random.default_rng(0)
+    print(f"{'layout':<14}{'entities':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for entities in args.entities:
+        for layout in args.layouts:
+            collection = f"bench_tenancy_{uuid.uuid4().hex[:8]}"
+            collection_config = QdrantCollectionConfig(name=collection, **LAYOUTS[layout])
+            config = QdrantConfig(url=args.qdrant_url, collection=collection_config)
+            provider = QdrantProvider(config)
+            schema = CollectionSchema(collection_config, embedding)
+            schema.create(provider.client, collection)
+            try:
+                fill(provider.client, schema, collection, entities, embedding.vector_size, rng)
+                latencies = measure(provider, collection, entities, args.queries, embedding.vector_size, rng)
+                p95 = latencies[int(len(latencies) * 0.95) - 1]
+                print(f"{layout:<14}{entities:>10}{statistics.median(latencies):>10.2f}{p95:>10.2f}")
+            finally:
+                provider.client.delete_collection(collection)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Benchmark search latency of the REST and gRPC transports.
+
+A collection is filled with random profiles (17 sections per entity, dense and
+sparse vectors), then the same entity-scoped queries the profile provider sends
+are run through QdrantProvider over each transport: dense only and hybrid
+(dense + sparse fused by RRF), returning payloads and vectors. The first
+queries of each transport warm up the connection and are not counted. Needs a
+running Qdrant server with both the REST and gRPC ports open.
+
+Usage:
+    python -m benchmarks.transport --qdrant-url http://localhost:6333 --entities 1000 --queries 500
+"""
+import argparse
+import statistics
+import time
+import uuid
+
+import numpy as np
+from qdrant_client.http import models as qdrant_models
+
+from src.utils.configs import EmbeddingConfig, QdrantCollectionConfig, QdrantConfig
+from src.utils.qdrant_access import DefaultQdrantFilter, QdrantProvider
+from src.utils.qdrant_clients import qdrant_client
+from src.utils.qdrant_schema import SPARSE_VECTOR_NAME, CollectionSchema
+
+SECTIONS_PER_ENTITY = 17
+SPARSE_TERMS = 60
+VOCABULARY = 30_000
+WARMUP_QUERIES = 20
+
+
+def sparse_vector(rng, terms: int) -> qdrant_models.SparseVector:
+    indices = rng.choice(VOCABULARY, size=terms, replace=False)
+    return qdrant_models.SparseVector(indices=indices.tolist(), values=rng.random(terms).tolist())
+
+
+def fill(provider: QdrantProvider, collection: str, entities: int, dim: int, rng):
+    for entity in range(entities):
+        entity_id = f"entity-{entity}"
+        vectors = rng.standard_normal((SECTIONS_PER_ENTITY, dim)).astype(np.float32)
+        provider.client.upsert(
+            collection,
+            points=[
+                qdrant_models.PointStruct(
+                    id=str(uuid.uuid4()),
+                    vector={"": vector.tolist(), SPARSE_VECTOR_NAME: sparse_vector(rng, SPARSE_TERMS)},
+                    # Sections carry a few KB of generated text, as the enhanced profiles do
+                    payload={"entity_id": entity_id, "title": f"Section {index}", "summary": "x" * 2000}
+                )
+                for index, vector in enumerate(vectors)
+            ],
+            wait=False
+        )
+    provider.client.count(collection, exact=True)
+
+
+def measure(
+    provider: QdrantProvider,
+    collection: str,
+    entities: int,
+    queries: int,
+    dim: int,
+    hybrid: bool,
+    rng
+) -> list[float]:
+    latencies = []
+    for query in range(WARMUP_QUERIES + queries):
+        entity_id = f"entity-{rng.integers(entities)}"
+        start = time.perf_counter()
+        provider.search(
+            collection,
+            rng.standard_normal(dim).tolist(),
+            filters=DefaultQdrantFilter().add("entity_id", entity_id),
+            limit=3,
+            sparse_vector=sparse_vector(rng, 8) if hybrid else None
+        )
+        if query >= WARMUP_QUERIES:
+            latencies.append((time.perf_counter() - start) * 1000)
+    return sorted(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--qdrant-url", required=True)
+    parser.add_argument("--entities", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    embedding = EmbeddingConfig()
+    rng = np.random.default_rng(0)
+    collection = f"bench_transport_{uuid.uuid4().hex[:8]}"
+    collection_config = QdrantCollectionConfig(name=collection)
+    transports = {
+        "rest": QdrantConfig(url=args.qdrant_url, prefer_grpc=False, collection=collection_config),
+        "grpc": QdrantConfig(url=args.qdrant_url, prefer_grpc=True, collection=collection_config),
+    }
+    providers = {name: QdrantProvider(config) for name, config in transports.items()}
+
+    client = qdrant_client(transports["grpc"])
+    CollectionSchema(collection_config, embedding).create(client, collection)
+    try:
+        fill(providers["grpc"], collection, args.entities, embedding.vector_size, rng)
+        print(f"{'transport':<10}{'query':<8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for hybrid in (False, True):
+            for name, provider in providers.items():
+                latencies = measure(
+                    provider, collection, args.entities, args.queries, embedding.vector_size, hybrid, rng
+                )
+                p95 = latencies[int(len(latencies) * 0.95) - 1]
+                p99 = latencies[int(len(latencies) * 0.99) - 1]
+                query = "hybrid" if hybrid else "dense"
+                print(f"{name:<10}{query:<8}{statistics.median(latencies):>10.2f}{p95:>10.2f}{p99:>10.2f}")
+    finally:
+        client.delete_collection(collection)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,12 @@
 import argparse
+import sys
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from src.ingestion import ingest
-from src.grant_answering import process_grant
-from src.utils.configs import AppConfig
+from src.utils.model_cache import configure_model_cache, read_model_cache_settings
+
+if TYPE_CHECKING:
+    from src.utils.configs import AppConfig
 
 def parse_args() -> argparse.Namespace:
     """Parse command line arguments"""
@@ -32,8 +35,9 @@ def parse_args() -> argparse.Namespace:
         help="Ingest innovator data"
     )
     ingest_parser.add_argument(
-        "entity_id",
-        help="ID of the entity to ingest"
+        "entity_ids",
+        nargs="+",
+        help="IDs of the entities to ingest, several are populated with batched bulk uploads"
     )
     ingest_parser.add_argument(
         "--form-id",
@@ -52,11 +56,129 @@ def parse_args() -> argparse.Namespace:
         "entity_id",
         help="ID of the entity to generate answers for"
     )
+    answer_parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip questions already answered in a previous run"
+    )
+    
+    # Reanswer command
+    reanswer_parser = subparsers.add_parser(
+        "reanswer",
+        help="Regenerate grant answers affected by profile changes"
+    )
+    reanswer_parser.add_argument(
+        "entity_id",
+        help="ID of the entity to regenerate answers for"
+    )
+    
+    # Serve command
+    serve_parser = subparsers.add_parser(
+        "serve",
+        help="Run the HTTP service with warm models"
+    )
+    serve_parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="Host to bind (default: 127.0.0.1)"
+    )
+    serve_parser.add_argument(
+        "--port",
+        default=8080,
+        type=int,
+        help="Port to bind (default: 8080)"
+    )
+    
+    # Enqueue command
+    enqueue_parser = subparsers.add_parser(
+        "enqueue",
+        help="Queue ingestion or answering jobs for workers"
+    )
+    enqueue_parser.add_argument(
+        "kind",
+        choices=["ingest", "answer"],
+        help="Kind of job to queue"
+    )
+    enqueue_parser.add_argument(
+        "entity_ids",
+        nargs="+",
+        help="IDs of the entities to queue jobs for"
+    )
+    enqueue_parser.add_argument(
+        "--priority",
+        default=0,
+        type=int,
+        help="Higher priority jobs are claimed first (default: 0)"
+    )
+    enqueue_parser.add_argument(
+        "--form-id",
+        default="innovator_introduction",
+        type=str,
+        choices=["innovator_introduction"],
+        help="Form ID to collect for ingest jobs (default: innovator_introduction)"
+    )
+    enqueue_parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip questions already answered for answer jobs"
+    )
+    
+    # Worker command
+    worker_parser = subparsers.add_parser(
+        "worker",
+        help="Run worker processes consuming queued jobs"
+    )
+    worker_parser.add_argument(
+        "kind",
+        choices=["ingest", "answer"],
+        help="Kind of job to consume"
+    )
+    worker_parser.add_argument(
+        "--processes",
+        default=1,
+        type=int,
+        help="Number of worker processes (default: 1)"
+    )
+    
+    # Warmup command
+    warmup_parser = subparsers.add_parser(
+        "warmup",
+        help="Prefetch every model into the model cache"
+    )
+    warmup_parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="Only check the cache against its checksum manifest"
+    )
+    warmup_parser.add_argument(
+        "--skip-inference",
+        action="store_true",
+        help="Do not run a tiny inference with each model"
+    )
+    
+    # Reindex command
+    reindex_parser = subparsers.add_parser(
+        "reindex",
+        help="Re-embed stored sections into a new collection and switch the alias to it"
+    )
+    reindex_parser.add_argument(
+        "--batch-size",
+        default=256,
+        type=int,
+        help="Sections embedded and written per request (default: 256)"
+    )
+    reindex_parser.add_argument(
+        "--drop-old",
+        action="store_true",
+        help="Delete the previous collection instead of keeping it for rollback"
+    )
     
     return parser.parse_args()
 
-def load_config(args: argparse.Namespace) -> AppConfig:
+def load_config(args: argparse.Namespace) -> 'AppConfig':
     """Load configuration from specified source"""
+    from src.utils.configs import AppConfig
+    
     if args.config:
         return AppConfig.from_json(args.config)
     return AppConfig.from_env()
@@ -64,19 +186,76 @@ def load_config(args: argparse.Namespace) -> AppConfig:
 def main():
     """Main entry point"""
     args = parse_args()
+    # Model libraries read the cache location and offline mode when imported,
+    # and loading the configuration already imports them through qdrant_client
+    cache_dir, offline = read_model_cache_settings(args.config)
+    configure_model_cache(cache_dir, offline=offline and args.command != "warmup")
     config = load_config(args)
     
-    if args.command == "ingest":
-        ingest(
+    if args.command == "warmup":
+        from src.warmup import warmup
+        ok = warmup(
             config=config,
-            entity_id=args.entity_id,
-            form_id=args.form_id
+            verify_only=args.verify,
+            inference=not args.skip_inference
         )
+        sys.exit(0 if ok else 1)
+    
+    from src.ingestion import ingest, ingest_many
+    from src.grant_answering import process_grant, reanswer_grant
+    from src.service import serve
+    from src.jobs import create_job_queue, run_workers
+    from src.reindex import reindex
+    
+    if args.command == "ingest":
+        if len(args.entity_ids) == 1:
+            ingest(
+                config=config,
+                entity_id=args.entity_ids[0],
+                form_id=args.form_id
+            )
+        else:
+            ingest_many(
+                config=config,
+                entity_ids=args.entity_ids,
+                form_id=args.form_id
+            )
     elif args.command == "answer":
         process_grant(
             config=config,
             entity_id=args.entity_id,
+            resume=args.resume
+        )
+    elif args.command == "reanswer":
+        reanswer_grant(
+            config=config,
+            entity_id=args.entity_id,
+        )
+    elif args.command == "serve":
+        serve(
+            config=config,
+            host=args.host,
+            port=args.port
+        )
+    elif args.command == "enqueue":
+        queue = create_job_queue(config.queue)
+        payload = {"form_id": args.form_id} if args.kind == "ingest" else {"resume": args.resume}
+        for entity_id in args.entity_ids:
+            job_id = queue.enqueue(args.kind, entity_id, payload, priority=args.priority)
+            print(f"{entity_id}: {job_id}")
+    elif args.command == "worker":
+        run_workers(
+            config=config,
+            kind=args.kind,
+            processes=args.processes
+        )
+    elif args.command == "reindex":
+        ok = reindex(
+            config=config,
+            batch_size=args.batch_size,
+            drop_old=args.drop_old
         )
+        sys.exit(0 if ok else 1)
 
 if __name__ == "__main__":
     main()
@@ -6,12 +6,14 @@ from src.grant_answering.container import Container as GrantAnsweringContainer
 def process_grant(
     config: AppConfig,
     entity_id: str,
+    resume: bool = False,
 ) -> GrantResponse:
     """Convenience function for processing a grant application
     
     Args:
         config: Application configuration
         entity_id: ID of the entity to answer about
+        resume: Skip questions already answered in a previous run
         grant: Grant application to process
     Returns:
         Generated responses to grant questions
@@ -19,8 +21,28 @@ def process_grant(
     container = GrantAnsweringContainer(config)
     pipeline = container.create_grant_answering()
     return pipeline.process_grant_application(
+        entity_id,
+        config.grant_value,
+        resume=resume
+    )
+
+def reanswer_grant(
+    config: AppConfig,
+    entity_id: str,
+) -> GrantResponse:
+    """Convenience function for regenerating answers after a profile change
+    
+    Args:
+        config: Application configuration
+        entity_id: ID of the entity to answer about
+    Returns:
+        Responses to grant questions, regenerated only where the profile changed
+    """
+    container = GrantAnsweringContainer(config)
+    pipeline = container.create_grant_answering()
+    return pipeline.reanswer_grant_application(
         entity_id,
         config.grant_value
     )
 
-__all__ = ["process_grant", "GrantAnswering", "GrantAnsweringContainer"]
+__all__ = ["process_grant", "reanswer_grant", "GrantAnswering", "GrantAnsweringContainer"]
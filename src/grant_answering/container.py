@@ -1,12 +1,17 @@
 from dataclasses import dataclass
 from typing import Optional
 
-from grant_answering.prompts import PromptBuilder
+from src.grant_answering.prompts import PromptBuilder
 from src.utils.configs import AppConfig
 from src.utils.llm_client import LLMClient
-from src.utils.qdrant_access import QdrantAccess, QdrantFilter
+from src.utils.model_registry import ModelRegistry
+from src.utils.concurrency import create_concurrency_limiter
+from src.utils.qdrant_access import QdrantAccess, QdrantFilter, DefaultQdrantFilter, create_qdrant_access
+from src.utils.section_text_store import SectionTextStoreProtocol, create_section_text_store
 from src.grant_answering.innovator_profile_provider import InnovatorProfileProvider
 from src.grant_answering.grant_answering import GrantAnswering
+from src.grant_answering.journal import AnswerJournal, AnswerJournalProtocol
+from src.grant_answering.structured_answers import StructuredAnswerer
 
 @dataclass
 class Container:
@@ -17,18 +22,30 @@ class Container:
     qdrant_filter: Optional[QdrantFilter] = None
     prompt_builder: Optional[PromptBuilder] = None
     profile_provider: Optional[InnovatorProfileProvider] = None
+    journal: Optional[AnswerJournalProtocol] = None
+    model_registry: Optional[ModelRegistry] = None
+    text_store: Optional[SectionTextStoreProtocol] = None
+    structured_answerer: Optional[StructuredAnswerer] = None
     
     def __post_init__(self):
+        # Initialize model registry if not provided
+        if not self.model_registry:
+            self.model_registry = ModelRegistry(self.config.models)
+            
         # Initialize LLM client if not provided
         if not self.llm_client:
-            self.llm_client = LLMClient(**self.config.llm.model_dump(exclude={"collection"}))
+            self.llm_client = LLMClient.from_config(
+                self.config.llm,
+                limiter=create_concurrency_limiter(self.config.queue)
+            )
             
         # Initialize Qdrant access if not provided
         if not self.qdrant_access:
-            self.qdrant_access = QdrantAccess(
-                qdrant_config=self.config.qdrant,
-                embedding_config=self.config.embedding
-            )
+            self.qdrant_access = create_qdrant_access(self.config.qdrant)
+            
+        # Initialize section text store if not provided
+        if not self.text_store:
+            self.text_store = create_section_text_store(self.config.section_text)
             
         # Initialize profile provider if not provided
         if not self.profile_provider:
@@ -36,18 +53,33 @@ class Container:
                 collection_name=self.config.qdrant.collection.name,
                 llm_client=self.llm_client,
                 qdrant=self.qdrant_access,
-                filter_builder=QdrantFilter(),
-                search_config=self.config.search
+                filter_builder=self.qdrant_filter or DefaultQdrantFilter(),
+                search_config=self.config.search,
+                model_registry=self.model_registry,
+                text_store=self.text_store,
+                # Queries must use the sparse vocabulary the sections were written with
+                sparse_model_name=self.config.embedding.sparse_model_name
             )
             
         # Initialize prompt builder if not provided
         if not self.prompt_builder:
             self.prompt_builder = PromptBuilder()
             
+        # Initialize structured answerer if not provided and enabled
+        if not self.structured_answerer and self.config.search.structured_answers:
+            self.structured_answerer = StructuredAnswerer(self.config.search.structured_min_overlap)
+            
+        # Initialize answer journal if not provided
+        if not self.journal:
+            self.journal = AnswerJournal(self.config.journal.directory)
+            
     def create_grant_answering(self) -> GrantAnswering:
         return GrantAnswering(
             llm_client=self.llm_client,
             prompt_builder=self.prompt_builder,
-            profile_provider=self.profile_provider
+            profile_provider=self.profile_provider,
+            max_context_tokens=self.config.search.max_context_tokens,
+            journal=self.journal,
+            structured_answerer=self.structured_answerer
         )
         
\ No newline at end of file
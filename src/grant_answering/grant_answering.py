@@ -5,11 +5,15 @@ from src.utils.models import (
     GrantQuestion, 
     GrantAnswer, 
     GrantResponse, 
-    GrantInformation
+    GrantInformation,
+    ProfileSection,
+    SearchResult
 )
 from src.utils.llm_client import LLMClient
 from src.grant_answering.prompts import PromptBuilder
 from src.grant_answering.innovator_profile_provider import InnovatorProfileProvider
+from src.grant_answering.journal import AnswerJournalProtocol, AnswerRecord, grant_hash, profile_hash
+from src.grant_answering.structured_answers import STRUCTURED_TYPES, StructuredAnswerer
 
 class GrantAnswering:
     """
@@ -34,7 +38,10 @@ class GrantAnswering:
         self, 
         llm_client: LLMClient,
         prompt_builder: PromptBuilder,
-        profile_provider: InnovatorProfileProvider
+        profile_provider: InnovatorProfileProvider,
+        max_context_tokens: Optional[int] = None,
+        journal: Optional[AnswerJournalProtocol] = None,
+        structured_answerer: Optional[StructuredAnswerer] = None
     ):
         """
         Initialize workflow with LLM client and profile provider
@@ -42,10 +49,16 @@ class GrantAnswering:
         Args:
             llm_client: Configured LLM client for generating responses
             profile_provider: Provider for innovator profile information
+            max_context_tokens: Token budget for the innovator profile context
+            journal: Journal that persists each answer as soon as it completes
+            structured_answerer: Answers structured questions from form fields, None to always use the LLM
         """
         self._prompt_builder = prompt_builder
         self._llm_client = llm_client
         self._profile_provider = profile_provider
+        self._max_context_tokens = max_context_tokens
+        self._journal = journal
+        self._structured_answerer = structured_answerer
     
     def _get_relevant_fields(
         self, 
@@ -58,14 +71,14 @@ class GrantAnswering:
             question
         )
         
-        try:
-            # Get LLM response
-            relevance_response = self._llm_client.complete(relevance_prompt)
-            
+        def parse(response: str) -> Dict[str, str]:
             # Extract JSON from response
-            json_str = relevance_response.split("```json")[1].split("```")[0]
-            relevant_fields = json.loads(json_str)["relevant_fields"]
-            return relevant_fields
+            json_str = response.split("```json")[1].split("```")[0]
+            return json.loads(json_str)["relevant_fields"]
+        
+        try:
+            # Get LLM response, escalated to the larger model when it cannot be parsed
+            return self._llm_client.complete_parsed(relevance_prompt, parse, call_site="relevance")
             
         except (IndexError, json.JSONDecodeError, KeyError) as e:
             print(f"Error parsing relevance response for question {question.identifier}: {e}")
@@ -76,31 +89,26 @@ class GrantAnswering:
 
     def _generate_answer(
         self, 
-        entity_id: str,
         grant_information: GrantInformation, 
         question: GrantQuestion, 
-        relevant_fields: Dict[str, str]
+        relevant_fields: Dict[str, str],
+        innovator_profile: SearchResult
     ) -> Optional[str]:
         """Generate answer for the question using LLM."""
-        if question.type in self.EXTERNAL_SOURCE_TYPES:
-            return None
-        
-        # Get innovator profile information
-        innovator_profile = self._profile_provider.get_relevant_context(entity_id, question)
         answer_prompt = self._prompt_builder.build_answer_prompt(
             grant_information,
             question,
             relevant_fields,
-            innovator_profile.to_string()
+            innovator_profile.to_string(max_tokens=self._max_context_tokens)
         )
         
+        def parse(response: str) -> str:
+            # Extract markdown content
+            return response.split("```markdown")[1].split("```")[0].strip()
+        
         try:
             # Get LLM response
-            answer_response = self._llm_client.complete(answer_prompt)
-            
-            # Extract markdown content
-            markdown_answer = answer_response.split("```markdown")[1].split("```")[0].strip()
-            return markdown_answer
+            return self._llm_client.complete_parsed(answer_prompt, parse, call_site="answer")
             
         except IndexError:
             print(f"Error extracting markdown from answer response for question {question.identifier}")
@@ -109,44 +117,134 @@ class GrantAnswering:
             print(f"Unexpected error generating answer: {e}")
             return None
 
-    def process_grant_application(
+    def _answer_question(
         self,
         entity_id: str,
-        grant: Grant
-    ) -> GrantResponse:
-        """
-        Process all questions in the grant application.
+        grant_information: GrantInformation,
+        question: GrantQuestion,
+        current_profile_hash: Optional[str],
+        basic_info: Optional[ProfileSection] = None
+    ) -> AnswerRecord:
+        """Answer a single question and record what the answer was generated from."""
+        record = AnswerRecord(
+            identifier=question.identifier,
+            category=question.category,
+            title=question.title,
+            answer=None,
+            prompt_version=self._prompt_builder.version,
+            profile_hash=current_profile_hash
+        )
+        if question.type in self.EXTERNAL_SOURCE_TYPES:
+            return record
         
-        Args:
-            grant: The grant application containing information and questions
-            
-        Returns:
-            GrantResponse containing answers to all questions
-        """
+        # Answer structured questions from the form fields when they hold the value
+        if self._structured_answerer and question.type in STRUCTURED_TYPES:
+            try:
+                fields = json.loads(basic_info.summary) if basic_info else None
+            except json.JSONDecodeError:
+                fields = None
+            record.answer = self._structured_answerer.answer(question, fields)
+            if record.answer is not None:
+                record.section_hashes = {basic_info.title: basic_info.content_hash()}
+                return record
+        
+        # Get relevant fields for the question
+        relevant_fields = self._get_relevant_fields(grant_information, question)
+        
+        # Get innovator profile information
+        innovator_profile = self._profile_provider.get_relevant_context(entity_id, question)
+        record.section_hashes = {
+            section.title: section.content_hash() for section in innovator_profile.sections
+        }
+        
+        # Generate answer
+        record.answer = self._generate_answer(
+            grant_information,
+            question,
+            relevant_fields,
+            innovator_profile
+        )
+        return record
+
+    def _is_stale(
+        self,
+        record: AnswerRecord,
+        question: GrantQuestion,
+        section_hashes: Dict[str, str],
+        current_profile_hash: Optional[str]
+    ) -> bool:
+        """Check whether a recorded answer must be regenerated for the current profile."""
+        if question.type in self.EXTERNAL_SOURCE_TYPES:
+            return False
+        if record.answer is None or record.prompt_version != self._prompt_builder.version:
+            return True
+        # Nothing was retrieved last time, any profile change may provide context now
+        if not record.section_hashes:
+            return record.profile_hash != current_profile_hash
+        return any(
+            section_hashes.get(title) != content_hash
+            for title, content_hash in record.section_hashes.items()
+        )
+
+    def _get_profile_hashes(self, entity_id: str) -> tuple[Dict[str, str], Optional[str]]:
+        """Get the current section hashes and the overall profile hash."""
+        try:
+            section_hashes = self._profile_provider.get_section_hashes(entity_id)
+            return section_hashes, profile_hash(section_hashes)
+        except Exception as e:
+            print(f"Error getting profile section hashes for entity {entity_id}: {e}")
+            return {}, None
+
+    def _get_basic_info(self, entity_id: str) -> Optional[ProfileSection]:
+        """Get the section holding the entity's form fields."""
+        try:
+            return self._profile_provider.get_basic_info_section(entity_id)
+        except Exception as e:
+            print(f"Error getting basic info for entity {entity_id}: {e}")
+            return None
+
+    def _answer_questions(
+        self,
+        entity_id: str,
+        grant: Grant,
+        completed: Dict[str, AnswerRecord],
+        current_profile_hash: Optional[str]
+    ) -> GrantResponse:
+        """Answer every question of the grant that is not already completed."""
         answers = []
+        self._llm_client.reset_usage()
+        self._profile_provider.router.reset_stats()
+        if self._structured_answerer:
+            self._structured_answerer.reset_stats()
+        
+        run_key = grant_hash(grant)
+        
+        # Fetched once per run, only when a structured question is left to answer
+        basic_info = None
+        if self._structured_answerer and any(
+            question.type in STRUCTURED_TYPES and question.identifier not in completed
+            for question in grant.questions
+        ):
+            basic_info = self._get_basic_info(entity_id)
         
         for question in grant.questions:
+            if question.identifier in completed:
+                answers.append(completed[question.identifier].to_answer())
+                continue
+            
             try:
-                # Get relevant fields for the question
-                relevant_fields = self._get_relevant_fields(grant.information, question)
-                
-                # Generate answer
-                answer_text = self._generate_answer(
+                record = self._answer_question(
                     entity_id,
                     grant.information,
                     question,
-                    relevant_fields
-                )
-                
-                # Create GrantAnswer object
-                answer = GrantAnswer(
-                    identifier=question.identifier,
-                    category=question.category,
-                    title=question.title,
-                    answer=answer_text
+                    current_profile_hash,
+                    basic_info
                 )
+                answers.append(record.to_answer())
                 
-                answers.append(answer)
+                # Persist right away, failed generations are retried on resume
+                if self._journal and (record.answer is not None or question.type in self.EXTERNAL_SOURCE_TYPES):
+                    self._journal.append(entity_id, run_key, record)
                 
             except Exception as e:
                 print(f"Error processing question {question.identifier}: {e}")
@@ -159,4 +257,68 @@ class GrantAnswering:
                 )
                 answers.append(answer)
         
+        print(f"LLM usage for entity {entity_id}: {self._llm_client.usage.to_string()}")
+        print(f"Section routing for entity {entity_id}: {self._profile_provider.router.stats.to_string()}")
+        if self._structured_answerer:
+            print(f"Structured questions for entity {entity_id}: {self._structured_answerer.stats.to_string()}")
         return GrantResponse(answers=answers)
+
+    def process_grant_application(
+        self,
+        entity_id: str,
+        grant: Grant,
+        resume: bool = False
+    ) -> GrantResponse:
+        """
+        Process all questions in the grant application.
+        
+        Args:
+            entity_id: ID of the entity to answer about
+            grant: The grant application containing information and questions
+            resume: Skip questions already recorded in the journal
+            
+        Returns:
+            GrantResponse containing answers to all questions
+        """
+        completed = {}
+        if resume and self._journal:
+            completed = self._journal.load(entity_id, grant_hash(grant))
+            print(f"Resuming with {len(completed)} answers from the journal")
+        
+        _, current_profile_hash = self._get_profile_hashes(entity_id)
+        return self._answer_questions(entity_id, grant, completed, current_profile_hash)
+
+    def reanswer_grant_application(
+        self,
+        entity_id: str,
+        grant: Grant
+    ) -> GrantResponse:
+        """
+        Regenerate only the answers whose profile context or prompts changed.
+        
+        Recorded answers are kept when every profile section they were generated
+        from still has the same content hash and the prompt version is unchanged.
+        
+        Args:
+            entity_id: ID of the entity to answer about
+            grant: The grant application containing information and questions
+            
+        Returns:
+            GrantResponse containing answers to all questions
+        """
+        if not self._journal:
+            raise ValueError("Re-answering requires an answer journal")
+        
+        records = self._journal.load(entity_id, grant_hash(grant))
+        section_hashes, current_profile_hash = self._get_profile_hashes(entity_id)
+        
+        questions = {question.identifier: question for question in grant.questions}
+        unchanged = {
+            identifier: record
+            for identifier, record in records.items()
+            if identifier in questions
+            and not self._is_stale(record, questions[identifier], section_hashes, current_profile_hash)
+        }
+        print(f"Re-answering {len(questions) - len(unchanged)} of {len(questions)} questions")
+        
+        return self._answer_questions(entity_id, grant, unchanged, current_profile_hash)
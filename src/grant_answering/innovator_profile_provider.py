@@ -1,12 +1,16 @@
-from typing import get_args
-from fastembed import TextEmbedding
+from typing import Optional, get_args
+from qdrant_client.http.models import SparseVector
 from src.utils.models import (
     GrantQuestion, SectionTitle, ProfileSection,
     SearchResult, QdrantPoint
 )
 from src.utils.configs import SearchConfig
+from src.utils.embedding import Embedder, SparseEmbedder
+from src.utils.model_registry import ModelRegistry
 from src.utils.llm_client import LLMClient
-from src.utils.qdrant_access import QdrantAccess, QdrantFilter
+from src.utils.qdrant_access import QdrantAccess, QdrantFilter, DefaultQdrantFilter
+from src.utils.section_text_store import SectionTextStoreProtocol, hydrate
+from src.grant_answering.section_router import SectionRouter
 
 class InnovatorProfileProvider:
     """Provides relevant innovator profile information for answering grant questions"""
@@ -18,13 +22,27 @@ class InnovatorProfileProvider:
         qdrant: QdrantAccess,
         filter_builder: QdrantFilter,
         search_config: SearchConfig,
+        model_registry: Optional[ModelRegistry] = None,
+        router: Optional[SectionRouter] = None,
+        text_store: Optional[SectionTextStoreProtocol] = None,
+        sparse_model_name: Optional[str] = None,
     ):
         self.collection_name = collection_name
         self.search_config = search_config
         self.qdrant = qdrant
         self.filter_builder = filter_builder
         self.llm_client = llm_client
-        self.embedder = TextEmbedding(self.search_config.embedding_config.model_name)
+        self.model_registry = model_registry
+        self.embedder = Embedder(self.search_config.embedding_config, model_registry)
+        # Sparse model the sections were written with, None for dense search only
+        self.sparse_model_name = sparse_model_name
+        # Created on the first search of a collection with sparse vectors, so other backends never load it
+        self.sparse_embedder: Optional[SparseEmbedder] = None
+        self.router = router or SectionRouter(
+            min_score=search_config.routing_min_score,
+            relative_cutoff=search_config.routing_relative_cutoff
+        )
+        self.text_store = text_store
 
     def _point_to_section(self, point: QdrantPoint) -> ProfileSection:
         """Convert QdrantPoint to ProfileSection"""
@@ -38,12 +56,31 @@ class InnovatorProfileProvider:
             score=point.score
         )
 
-    def _get_relevant_sections_llm(
-        self,
-        entity_id: str,
-        question: GrantQuestion
-    ) -> list[ProfileSection]:
-        """Get relevant sections using LLM prompting"""
+    def _to_sections(self, points: list[QdrantPoint]) -> list[ProfileSection]:
+        """Convert points to sections, reading the text of slim payloads from the text store"""
+        payloads = hydrate(self.text_store, [point.payload for point in points])
+        sections = []
+        for point, payload in zip(points, payloads):
+            if "summary" not in payload:
+                print(f"Text of section {payload['title']} of {payload['entity_id']} is missing from the text store")
+                continue
+            sections.append(self._point_to_section(point.model_copy(update={"payload": payload})))
+        return sections
+
+    def _query_sparse_vector(self, text: str) -> Optional[SparseVector]:
+        """Sparse vector of a query, None when the collection has no sparse vectors to fuse it with"""
+        if not self.sparse_model_name or not self.qdrant.has_sparse_vectors(self.collection_name):
+            return None
+        if self.sparse_embedder is None:
+            self.sparse_embedder = SparseEmbedder(self.sparse_model_name, self.model_registry)
+        return self.sparse_embedder.query_embed(text)
+
+    def _entity_filter(self, entity_id: str) -> DefaultQdrantFilter:
+        """A fresh filter on the entity, with the conditions of the filter builder"""
+        return DefaultQdrantFilter().combine(self.filter_builder).add("entity_id", entity_id)
+
+    def _select_sections_llm(self, question: GrantQuestion) -> list[SectionTitle]:
+        """Select relevant section titles using LLM prompting"""
         # Build prompt for LLM
         prompt = f"""
         You are an expert grant writing consultant with extensive experience in matching grant questions with relevant supporting information. Your task is to analyze a grant question and identify the most relevant sections that would provide comprehensive supporting evidence.
@@ -59,7 +96,7 @@ class InnovatorProfileProvider:
         Content Guidelines: {question.answer_content_instructions}
 
         Available Profile Sections:
-        {[title.value for title in get_args(SectionTitle)]}
+        {", ".join(get_args(SectionTitle))}
 
         TASK:
         1. Analyze the grant question requirements and content guidelines
@@ -74,32 +111,49 @@ class InnovatorProfileProvider:
         - Format example: "The Problem, The Solution, Market Analysis"
         """
 
-        response = self.llm_client.complete(prompt)
-        suggested_titles = [title.strip() for title in response.split(',')]
-        valid_titles = [title for title in suggested_titles 
-                       if title in get_args(SectionTitle)]
+        def parse(response: str) -> list[SectionTitle]:
+            suggested_titles = [title.strip().strip('"') for title in response.split(',')]
+            titles = [title for title in suggested_titles 
+                      if title in get_args(SectionTitle)]
+            if not titles:
+                raise ValueError("no known section title")
+            return titles
 
-        # Fetch sections data for the valid titles
-        filters = (
-            self.filter_builder
-                .add("entity_id", entity_id)
-                .add_any("section_title", valid_titles)
-        )
-        
+        try:
+            return self.llm_client.complete_parsed(prompt, parse, call_site="section_selection")
+        except ValueError:
+            return []
+
+    def _get_relevant_points_routed(
+        self,
+        entity_id: str,
+        question: GrantQuestion
+    ) -> list[QdrantPoint]:
+        """Get the sections selected by the lexical router, asking the LLM when it is not confident"""
+        if self.search_config.section_routing == "llm":
+            titles = self._select_sections_llm(question)
+        else:
+            route = self.router.route(question, self.search_config.max_sections)
+            titles = route.sections if route.confident else self._select_sections_llm(question)
+        titles = titles[:self.search_config.max_sections]
+        if not titles:
+            return []
+
+        # Fetch sections data for the selected titles
         points = self.qdrant.filter(
             collection=self.collection_name,
-            filters=filters,
-            limit=self.search_config.max_sections
+            filters=self._entity_filter(entity_id).add_any("title", titles),
+            limit=len(titles),
+            tenant_id=entity_id
         )
-        
-        return [self._point_to_section(point) for point in points]
+        return sorted(points, key=lambda point: titles.index(point.payload["title"]))
 
-    def _get_relevant_sections_embedding(
+    def _get_relevant_points_embedding(
         self,
         entity_id: str,
         question: GrantQuestion
-    ) -> list[ProfileSection]:
-        """Get relevant sections using embedding-based similarity search"""
+    ) -> list[QdrantPoint]:
+        """Get relevant sections using dense, or hybrid dense and sparse, similarity search"""
         search_text = f"""
         Category: {question.category}
         Title: {question.title}
@@ -109,30 +163,61 @@ class InnovatorProfileProvider:
         """
         
         query_vector = next(self.embedder.embed([search_text])).tolist()
+        sparse_vector = self._query_sparse_vector(search_text)
         
-        filters = self.qdrant.create_filter().add("entity_id", entity_id)
         points = self.qdrant.search(
             collection=self.collection_name,
             query_vector=query_vector,
-            filters=filters,
+            filters=self._entity_filter(entity_id),
             limit=self.search_config.max_sections,
-            score_threshold=self.search_config.min_relevance_score
+            score_threshold=self.search_config.min_relevance_score,
+            tenant_id=entity_id,
+            sparse_vector=sparse_vector
         )
         
-        return [self._point_to_section(point) for point in points]
+        return points
+
+    def get_section_hashes(self, entity_id: str) -> dict[str, str]:
+        """Get the content hash of every stored profile section, keyed by title"""
+        points = self.qdrant.filter(
+            collection=self.collection_name,
+            filters=self._entity_filter(entity_id),
+            limit=len(get_args(SectionTitle)),
+            tenant_id=entity_id
+        )
+        # Slim payloads carry the hash, older ones are hashed from their text
+        hashes = {point.payload["title"]: point.payload["content_hash"] for point in points if "content_hash" in point.payload}
+        unhashed = [point for point in points if "content_hash" not in point.payload]
+        hashes.update({section.title: section.content_hash() for section in self._to_sections(unhashed)})
+        return hashes
+
+    def get_basic_info_section(self, entity_id: str) -> Optional[ProfileSection]:
+        """Get the section holding the entity's form fields, None when it was not ingested"""
+        points = self.qdrant.filter(
+            collection=self.collection_name,
+            filters=self._entity_filter(entity_id).add("title", "Others"),
+            limit=1,
+            tenant_id=entity_id
+        )
+        sections = self._to_sections(points)
+        return sections[0] if sections else None
 
     def get_relevant_context(
         self,
         entity_id: str,
         question: GrantQuestion,
     ) -> SearchResult:
-        """Get relevant context using hybrid search"""
-        # Get relevant sections using both approaches
-        llm_sections = self._get_relevant_sections_llm(entity_id, question)
-        embedding_sections = self._get_relevant_sections_embedding(entity_id, question)
+        """Get relevant context using hybrid search
         
-        # Combine results, removing duplicates based on content
-        return SearchResult(
-            sections=list(set(embedding_sections) & set(llm_sections))
-
-        )
+        Sections selected by both the router and the embedding search come first,
+        then the other routed sections, then the other embedding matches. The
+        section text is only read for the selected sections.
+        """
+        routed_points = self._get_relevant_points_routed(entity_id, question)
+        embedding_points = self._get_relevant_points_embedding(entity_id, question)
+        
+        embedding_titles = {point.payload["title"] for point in embedding_points}
+        agreed = [point for point in routed_points if point.payload["title"] in embedding_titles]
+        points = {point.payload["title"]: point for point in agreed + routed_points + embedding_points}
+        selected = list(points.values())[:self.search_config.max_sections]
+        return SearchResult(sections=self._to_sections(selected))
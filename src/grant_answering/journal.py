@@ -0,0 +1,85 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Optional, Protocol
+
+from pydantic import Field
+
+from src.utils.models import Grant, GrantAnswer
+
+
+def grant_hash(grant: Grant) -> str:
+    """Stable hash of a grant's information and questions"""
+    return hashlib.sha256(grant.model_dump_json().encode()).hexdigest()[:16]
+
+
+def profile_hash(section_hashes: dict[str, str]) -> str:
+    """Hash of a whole profile given its section hashes"""
+    content = json.dumps(section_hashes, sort_keys=True)
+    return hashlib.sha256(content.encode()).hexdigest()[:16]
+
+
+class AnswerRecord(GrantAnswer):
+    """A grant answer together with what it was generated from"""
+    prompt_version: Optional[str] = Field(default=None, description="Version of the prompts used to generate the answer")
+    section_hashes: dict[str, str] = Field(default_factory=dict, description="Content hash of each profile section used, by title")
+    profile_hash: Optional[str] = Field(default=None, description="Hash of the whole profile at generation time")
+
+    def to_answer(self) -> GrantAnswer:
+        return GrantAnswer(**self.model_dump(include=set(GrantAnswer.model_fields)))
+
+
+class AnswerJournalProtocol(Protocol):
+    """Protocol for persisting grant answers as they complete"""
+    def load(self, entity_id: str, grant_hash: str) -> dict[str, AnswerRecord]:
+        """Load the answers already recorded, keyed by question identifier"""
+        ...
+
+    def append(self, entity_id: str, grant_hash: str, answer: AnswerRecord) -> None:
+        """Record a completed answer"""
+        ...
+
+
+class AnswerJournal(AnswerJournalProtocol):
+    """Append-only JSON lines journal of grant answers
+
+    Each (entity, grant) pair gets its own file. Records are flushed and synced as
+    soon as they are written, so a run that dies midway keeps every answer it
+    already paid for. When a question appears more than once the latest record wins.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+
+    def _path(self, entity_id: str, grant_hash: str) -> Path:
+        return self.directory / entity_id / f"{grant_hash}.jsonl"
+
+    def load(self, entity_id: str, grant_hash: str) -> dict[str, AnswerRecord]:
+        path = self._path(entity_id, grant_hash)
+        if not path.exists():
+            return {}
+
+        answers = {}
+        with open(path) as f:
+            for line in f:
+                try:
+                    answer = AnswerRecord.model_validate_json(line)
+                except ValueError:
+                    # A run killed mid-write leaves a partial last line
+                    continue
+                answers[answer.identifier] = answer
+        return answers
+
+    def append(self, entity_id: str, grant_hash: str, answer: AnswerRecord) -> None:
+        path = self._path(entity_id, grant_hash)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a+b") as f:
+            # Terminate a partial line left by an interrupted write
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+            f.write((json.dumps(answer.model_dump()) + "\n").encode())
+            f.flush()
+            os.fsync(f.fileno())
@@ -0,0 +1,146 @@
+import math
+import re
+from collections import Counter, defaultdict
+from typing import get_args
+
+from pydantic import BaseModel
+
+from src.utils.models import GrantQuestion, SectionTitle
+from src.utils.taxonomy import taxonomy, section_info, category_sections
+
+_STOPWORDS = frozenset("""
+    a an and any are as at be been by can describe detail detailed details do does for from has have how if in
+    including into is it its itself more not of on or other per please provide relevant should specify such
+    than that the their them there these this those to up was were what when where whether which who will with
+    use using within would you your information
+""".split())
+
+# Weight of each source of section terms, as repeated term frequency
+_TITLE_WEIGHT = 3
+_TAXONOMY_WEIGHT = 2
+_DESCRIPTION_WEIGHT = 1
+
+
+def _stem(word: str) -> str:
+    """Crude suffix stripping, only needs to map a word and its variants to the same term"""
+    for suffix, replacement in (("ies", "y"), ("ing", ""), ("ed", ""), ("es", ""), ("s", "")):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)] + replacement
+    return word
+
+
+def tokenize(text: str) -> list[str]:
+    """Stemmed words of a text without stopwords, followed by their bigrams"""
+    words = [_stem(word) for word in re.findall(r"[a-z0-9]+", text.lower()) if word not in _STOPWORDS]
+    return words + [f"{a}_{b}" for a, b in zip(words, words[1:])]
+
+
+class SectionRoute(BaseModel):
+    """Sections selected for a question and whether the lexical scores are trusted"""
+    sections: list[SectionTitle]
+    top_score: float
+    confident: bool
+
+
+class RoutingStats(BaseModel):
+    """Counts of questions routed lexically and of LLM fallbacks"""
+    routed: int = 0
+    fallbacks: int = 0
+
+    @property
+    def fallback_rate(self) -> float:
+        return self.fallbacks / self.routed if self.routed else 0.0
+
+    def to_string(self) -> str:
+        return f"{self.routed} questions, {self.fallbacks} LLM fallbacks ({self.fallback_rate:.1%})"
+
+
+class SectionRouter:
+    """BM25 index of profile sections over their titles, descriptions and taxonomy terms
+
+    The index is built once from `section_info` and the taxonomy categories mapped
+    to each section, so routing a question is a dictionary lookup per term instead
+    of an LLM call. Routes whose best score is below min_score are not confident
+    and should fall back to the LLM.
+    """
+
+    def __init__(
+        self,
+        min_score: float = 4.0,
+        relative_cutoff: float = 0.5,
+        k1: float = 1.2,
+        b: float = 0.75
+    ):
+        """
+        Args:
+            min_score: Best section score below which a route is not confident
+            relative_cutoff: Sections scoring below this fraction of the best one are dropped
+            k1: BM25 term frequency saturation
+            b: BM25 length normalization
+        """
+        self.min_score = min_score
+        self.relative_cutoff = relative_cutoff
+        # Sections without a description, such as "Others", are never routed to
+        self.titles: list[SectionTitle] = [title for title in get_args(SectionTitle) if title in section_info]
+        self.stats = RoutingStats()
+        self._weights = self._build_index(k1, b)
+
+    def _section_terms(self, title: SectionTitle) -> Counter:
+        terms = Counter()
+        for _ in range(_TITLE_WEIGHT):
+            terms.update(tokenize(title))
+        for category, titles in category_sections.items():
+            if title in titles:
+                for _ in range(_TAXONOMY_WEIGHT):
+                    terms.update(term for keyword in taxonomy[category] for term in tokenize(keyword))
+        for _ in range(_DESCRIPTION_WEIGHT):
+            terms.update(tokenize(section_info[title]))
+        return terms
+
+    def _build_index(self, k1: float, b: float) -> dict[str, list[tuple[int, float]]]:
+        """Precompute the BM25 weight of every term in every section"""
+        documents = [self._section_terms(title) for title in self.titles]
+        average_length = sum(sum(document.values()) for document in documents) / len(documents)
+        frequencies = Counter(term for document in documents for term in document)
+
+        weights: dict[str, list[tuple[int, float]]] = defaultdict(list)
+        for index, document in enumerate(documents):
+            norm = k1 * (1 - b + b * sum(document.values()) / average_length)
+            for term, count in document.items():
+                idf = math.log(1 + (len(documents) - frequencies[term] + 0.5) / (frequencies[term] + 0.5))
+                weights[term].append((index, idf * count * (k1 + 1) / (count + norm)))
+        return dict(weights)
+
+    def score(self, text: str) -> dict[SectionTitle, float]:
+        """BM25 score of every section matching the text"""
+        scores: dict[int, float] = defaultdict(float)
+        for term in set(tokenize(text)):
+            for index, weight in self._weights.get(term, ()):
+                scores[index] += weight
+        return {self.titles[index]: score for index, score in scores.items()}
+
+    def route(self, question: GrantQuestion, max_sections: int) -> SectionRoute:
+        """Select the sections best matching a question, most relevant first"""
+        text = " ".join([
+            question.category,
+            question.title,
+            question.question,
+            question.answer_content_instructions
+        ])
+        ranked = sorted(self.score(text).items(), key=lambda item: item[1], reverse=True)
+        top_score = ranked[0][1] if ranked else 0.0
+        sections = [
+            title for title, score in ranked[:max_sections]
+            if score >= top_score * self.relative_cutoff
+        ]
+
+        route = SectionRoute(sections=sections, top_score=top_score, confident=top_score >= self.min_score)
+        self.stats.routed += 1
+        if not route.confident:
+            self.stats.fallbacks += 1
+        return route
+
+    def reset_stats(self) -> RoutingStats:
+        """Reset the routing counts and return the previous value"""
+        stats, self.stats = self.stats, RoutingStats()
+        return stats
@@ -0,0 +1,197 @@
+import re
+from datetime import datetime
+from typing import Any, Optional
+
+from pydantic import BaseModel
+
+from src.grant_answering.section_router import tokenize
+from src.utils.models import GrantQuestion
+
+# Question types answered from the entity's form fields when a matching value exists
+STRUCTURED_TYPES = frozenset({"number", "date", "boolean", "table"})
+
+_CURRENCY = r"(?:[$€£₪]|usd|eur|ils|nis)"
+# A whole value that is a number, with an optional currency, magnitude and unit word
+_NUMBER = re.compile(
+    rf"{_CURRENCY}?\s*(-?\d[\d,]*(?:\.\d+)?)\s*(k|m|thousand|million)?\s*(?:%|{_CURRENCY}|[a-z]+)?"
+)
+_MULTIPLIERS = {"k": 1_000, "thousand": 1_000, "m": 1_000_000, "million": 1_000_000}
+# Formats of dates given as text, with the ISO format keeping their precision
+_DATE_FORMATS = (
+    ("%d/%m/%Y", "%Y-%m-%d"), ("%d.%m.%Y", "%Y-%m-%d"), ("%d-%m-%Y", "%Y-%m-%d"),
+    ("%Y-%m", "%Y-%m"), ("%m/%Y", "%Y-%m"), ("%B %Y", "%Y-%m"), ("%b %Y", "%Y-%m"), ("%Y", "%Y"),
+)
+# Words shared by most fields and questions, matching on them alone says nothing about the value
+_GENERIC_WORDS = frozenset("""
+    company name number organization entity applicant project total many amount value count date did
+""".split())
+_BOOLEANS = {
+    "yes": True, "true": True, "y": True, "כן": True,
+    "no": False, "false": False, "n": False, "לא": False,
+}
+
+
+def _words(text: str) -> set[str]:
+    """Stemmed content words of a text or a field key, camelCase and snake_case split"""
+    text = re.sub(r"([a-z])([A-Z])", r"\1 \2", text).replace("_", " ")
+    return {term for term in tokenize(text) if "_" not in term and term not in _GENERIC_WORDS}
+
+
+def flatten(data: Any, path: tuple[str, ...] = ()) -> dict[tuple[str, ...], Any]:
+    """Leaf values of nested form data keyed by their key path, lists of records are kept whole"""
+    if isinstance(data, dict):
+        fields = {}
+        for key, value in data.items():
+            fields.update(flatten(value, path + (str(key),)))
+        return fields
+    return {path: data} if path else {}
+
+
+def parse_number(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not isinstance(value, str):
+        return None
+    match = _NUMBER.fullmatch(value.strip().lower())
+    if not match:
+        return None
+    number = float(match.group(1).replace(",", ""))
+    return number * _MULTIPLIERS.get(match.group(2), 1)
+
+
+def parse_date(value: Any) -> Optional[str]:
+    """ISO form of a date, at the precision it was given in: year, month or day"""
+    if not isinstance(value, str):
+        return None
+    text = value.strip()
+    try:
+        return datetime.fromisoformat(text).date().isoformat()
+    except ValueError:
+        pass
+    for date_format, iso_format in _DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format).strftime(iso_format)
+        except ValueError:
+            continue
+    return None
+
+
+def parse_boolean(value: Any) -> Optional[bool]:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        return _BOOLEANS.get(value.strip().lower())
+    return None
+
+
+def render_table(value: Any) -> Optional[str]:
+    """Markdown table of a list of records, None for anything else"""
+    if not isinstance(value, list) or not value or not all(isinstance(row, dict) for row in value):
+        return None
+    columns = list(dict.fromkeys(key for row in value for key in row))
+    lines = [
+        "| " + " | ".join(columns) + " |",
+        "| " + " | ".join("---" for _ in columns) + " |",
+    ]
+    lines.extend(
+        "| " + " | ".join(str(row.get(column, "")).replace("|", "\\|").replace("\n", " ") for column in columns) + " |"
+        for row in value
+    )
+    return "\n".join(lines)
+
+
+def format_value(question_type: str, value: Any) -> Optional[str]:
+    """Answer text of a field value for a question type, None when the value is not of that type"""
+    if question_type == "number":
+        number = parse_number(value)
+        if number is None:
+            return None
+        # Values entered as text keep their units and currency
+        return value.strip() if isinstance(value, str) else f"{number:,.{0 if number.is_integer() else 2}f}"
+    if question_type == "date":
+        return parse_date(value)
+    if question_type == "boolean":
+        parsed = parse_boolean(value)
+        return None if parsed is None else ("Yes" if parsed else "No")
+    if question_type == "table":
+        return render_table(value)
+    return None
+
+
+class StructuredAnswerStats(BaseModel):
+    """Counts of structured questions answered from form fields and of LLM fallbacks"""
+    answered: int = 0
+    fallbacks: int = 0
+
+    def to_string(self) -> str:
+        return f"{self.answered} answered from form fields, {self.fallbacks} LLM fallbacks"
+
+
+class StructuredAnswerer:
+    """Answers number, date, boolean and table questions from the entity's form fields
+
+    A field is a candidate when its value parses as the question type. Generic
+    words such as company or name are ignored on both sides. Candidates are
+    considered when their key holds every word of the question title (its text
+    for titles without content words), so a key naming only part of what is
+    asked never answers it. They are scored by the fraction of the words of
+    their key found in the question. The best candidate answers the question if
+    that fraction is at least min_overlap and no other candidate with a different
+    value scores as well. Otherwise the question goes to the LLM.
+    """
+
+    def __init__(self, min_overlap: float = 0.5):
+        """
+        Args:
+            min_overlap: Fraction of the field key words that must appear in the question
+        """
+        self.min_overlap = min_overlap
+        self.stats = StructuredAnswerStats()
+
+    def _match(self, question: GrantQuestion, basic_info: dict) -> Optional[str]:
+        question_words = _words(f"{question.title} {question.question}")
+        title_words = _words(question.title) or _words(question.question)
+        if not title_words:
+            return None
+        candidates = []
+        for path, value in flatten(basic_info).items():
+            answer = format_value(question.type, value)
+            if answer is None:
+                continue
+            key_words = _words(path[-1])
+            if not key_words:
+                continue
+            if not title_words <= key_words:
+                continue
+            key_overlap = len(key_words & question_words) / len(key_words)
+            if key_overlap < self.min_overlap:
+                continue
+            # Words of the parent keys only break ties
+            context = len(set().union(*map(_words, path[:-1])) & question_words) if len(path) > 1 else 0
+            candidates.append((key_overlap, context, answer))
+
+        candidates.sort(key=lambda candidate: candidate[:2], reverse=True)
+        if not candidates:
+            return None
+        best = candidates[0]
+        if any(other[:2] == best[:2] and other[2] != best[2] for other in candidates[1:]):
+            return None
+        return best[2]
+
+    def answer(self, question: GrantQuestion, basic_info: Optional[dict]) -> Optional[str]:
+        """Answer a structured question from form fields, None when the LLM must answer it"""
+        if question.type not in STRUCTURED_TYPES:
+            return None
+        answer = self._match(question, basic_info) if basic_info else None
+        if answer is None:
+            self.stats.fallbacks += 1
+        else:
+            self.stats.answered += 1
+        return answer
+
+    def reset_stats(self) -> StructuredAnswerStats:
+        """Reset the answer counts and return the previous value"""
+        stats, self.stats = self.stats, StructuredAnswerStats()
+        return stats
@@ -12,4 +12,14 @@ def ingest(
     pipeline = container.create_pipeline(form_id)
     pipeline.process_entity(entity_id)
 
-__all__ = ["ingest", "IngestionPipeline", "IngestionContainer"]
+def ingest_many(
+    config: AppConfig,
+    entity_ids: list[str],
+    form_id: str = "innovator_introduction"
+):
+    """Convenience function for running the full pipeline over many entities with bulk uploads"""
+    container = IngestionContainer(config)
+    pipeline = container.create_pipeline(form_id)
+    return pipeline.process_entities(entity_ids)
+
+__all__ = ["ingest", "ingest_many", "IngestionPipeline", "IngestionContainer"]
@@ -3,10 +3,14 @@ from typing import Optional
 
 from src.utils.configs import AppConfig
 from src.utils.llm_client import LLMClient
+from src.utils.concurrency import create_concurrency_limiter
+from src.utils.model_registry import ModelRegistry
 from src.ingestion.extract import ContentExtractor, AudioExtractor, DocumentExtractor
 from src.ingestion.enhancement import ContentEnhancer
-from src.ingestion.population import DatabasePopulator
+from src.ingestion.file_manifest import FileManifestStore, FileManifestStoreProtocol
+from src.ingestion.population import DatabasePopulator, create_database_populator
 from src.utils.form_access import FirebaseFormProvider
+from src.utils.section_text_store import SectionTextStoreProtocol, create_section_text_store
 from src.ingestion.pipeline import IngestionPipeline
 
 @dataclass
@@ -18,11 +22,21 @@ class Container:
     content_extractor: Optional[ContentExtractor] = None
     content_enhancer: Optional[ContentEnhancer] = None
     db_populator: Optional[DatabasePopulator] = None
+    model_registry: Optional[ModelRegistry] = None
+    file_manifests: Optional[FileManifestStoreProtocol] = None
+    text_store: Optional[SectionTextStoreProtocol] = None
 
     def __post_init__(self):
+        # Initialize model registry
+        if not self.model_registry:
+            self.model_registry = ModelRegistry(self.config.models)
+
         # Initialize LLM client
         if not self.llm_client:
-            self.llm_client = LLMClient(**self.config.llm.model_dump())
+            self.llm_client = LLMClient.from_config(
+                self.config.llm,
+                limiter=create_concurrency_limiter(self.config.queue)
+            )
 
         # Initialize form provider
         if not self.form_provider:
@@ -30,19 +44,36 @@ class Container:
 
         # Initialize content extractor
         if not self.content_extractor:
-            self.content_extractor = ContentExtractor()
-            self.content_extractor.register_extractor("audio", AudioExtractor())
-            self.content_extractor.register_extractor("document", DocumentExtractor())
+            self.content_extractor = ContentExtractor(self.config.extraction)
+            self.content_extractor.register_extractor("audio", AudioExtractor(
+                self.model_registry,
+                config=self.config.audio
+            ))
+            self.content_extractor.register_extractor("document", DocumentExtractor(
+                self.model_registry,
+                artifacts_path=self.config.models.docling_artifacts_path
+            ))
+
+        # Initialize file manifest store
+        if not self.file_manifests and self.config.file_cache.enabled:
+            self.file_manifests = FileManifestStore(self.config.file_cache.directory)
 
         # Initialize content enhancer
         if not self.content_enhancer:
             self.content_enhancer = ContentEnhancer(self.llm_client)
 
+        # Initialize section text store
+        if not self.text_store:
+            self.text_store = create_section_text_store(self.config.section_text)
+
         # Initialize database populator
         if not self.db_populator:
-            self.db_populator = DatabasePopulator(
+            self.db_populator = create_database_populator(
                 qdrant_config=self.config.qdrant,
-                embedding_config=self.config.embedding
+                embedding_config=self.config.embedding,
+                model_registry=self.model_registry,
+                include_taxonomy_terms=self.config.search.include_taxonomy_terms,
+                text_store=self.text_store
             )
 
     def create_pipeline(self, form_id: str = "innovator_introduction") -> IngestionPipeline:
@@ -53,5 +84,6 @@ class Container:
             content_extractor=self.content_extractor,
             content_enhancer=self.content_enhancer,
             db_populator=self.db_populator,
-            form_id=form_id
+            form_id=form_id,
+            file_manifests=self.file_manifests
         ) 
\ No newline at end of file
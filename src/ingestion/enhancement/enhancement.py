@@ -27,5 +27,5 @@ class ContentEnhancer(ContentEnhancerProtocol):
         basic_info = self._get_basic_info(content)
 
         prompt = get_prompt(content['file_contents'])
-        sections = extract_sections(self._llm_client.complete(prompt))
+        sections = self._llm_client.complete_parsed(prompt, extract_sections, call_site="enhancement")
         return EnhancedContent(basic_info=basic_info, sections=sections)
@@ -1,4 +1,5 @@
 from .base import ContentExtractorProtocol, BaseExtractor, ContentExtractor
+from .limits import ExtractionOutcome
 from .document import DocumentExtractor
 from .audio import AudioExtractor
 
@@ -6,6 +7,7 @@ __all__ = [
     'ContentExtractorProtocol',
     'BaseExtractor',
     'ContentExtractor',
+    'ExtractionOutcome',
     'DocumentExtractor',
     'AudioExtractor'
 ] 
\ No newline at end of file
@@ -1,68 +1,227 @@
-from typing import Optional
+from typing import Callable, Optional
 import logging
+import multiprocessing
 import tempfile
 import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+import numpy as np
 import torch
+from pydantic import BaseModel
 from transformers import (
     AutoModelForSpeechSeq2Seq, 
     AutoProcessor, 
     pipeline
 )
 
-from .base import BaseExtractor
+from src.utils.configs import AudioConfig, ExtractionLimits
+from src.utils.model_registry import ModelRegistry
+from .base import BaseExtractor, ExtractionOutcome, ProgressCallback
+from .vad import SAMPLE_RATE, SpeechSegment, VoiceActivityDetector, create_vad, decode_audio
+from .chunking import build_chunks, join_transcripts
+from .limits import can_fork
 
 logger = logging.getLogger(__name__)
 
+WHISPER_MODEL = "openai/whisper-large-v3"
+
+# Pipeline inherited by the forked transcription workers
+_pool_pipe = None
+
+
+def load_whisper_pipeline():
+    """Load the Whisper model with optimal configuration for accuracy"""
+    device = "cuda:0" if torch.cuda.is_available() else "cpu"
+    torch_dtype = torch.float16 if torch.cuda.is_available() else torch.float32
+    
+    # Initialize model with Flash Attention 2
+    model = AutoModelForSpeechSeq2Seq.from_pretrained(
+        WHISPER_MODEL,
+        torch_dtype=torch_dtype,
+        low_cpu_mem_usage=True,
+        use_safetensors=True,
+        # attn_implementation="flash_attention_2"
+    )
+    model.to(device)
+    
+    # Load processor
+    processor = AutoProcessor.from_pretrained(WHISPER_MODEL)
+    
+    # Create pipeline with optimal settings for accuracy
+    return pipeline(
+        "automatic-speech-recognition",
+        model=model,
+        tokenizer=processor.tokenizer,
+        feature_extractor=processor.feature_extractor,
+        torch_dtype=torch_dtype,
+        device=device,
+    )
+
+class Transcription(BaseModel):
+    """Transcribed text with the share of the audio that went through Whisper"""
+    text: str
+    audio_seconds: float
+    speech_seconds: float
+    chunks: int
+
+    @property
+    def skipped_ratio(self) -> float:
+        """Fraction of the audio skipped as non-speech"""
+        return 1 - self.speech_seconds / self.audio_seconds if self.audio_seconds else 0.0
+
+def _init_pool_worker(threads: int):
+    torch.set_num_threads(threads)
+
+def _transcribe_in_pool(audio: np.ndarray, generate_kwargs: dict) -> str:
+    return _run_whisper(_pool_pipe, audio, generate_kwargs)
+
+def _run_whisper(pipe, audio: np.ndarray, generate_kwargs: dict) -> str:
+    result = pipe(
+        {"raw": audio, "sampling_rate": SAMPLE_RATE},
+        batch_size=1,
+        return_timestamps=True,  # Get word-level timestamps
+        generate_kwargs=generate_kwargs
+    )
+    return result["text"].strip() if isinstance(result, dict) and "text" in result else ""
+
 class AudioExtractor(BaseExtractor):
     """Handles audio formats using Whisper large-v3"""
     
     supported_formats = {'.mp3', '.wav', '.m4a', '.ogg', '.flac'}
+    model_name = "whisper"
+    
+    # Configure generation parameters for maximum accuracy
+    generate_kwargs = {
+        "task": "transcribe",  # Transcription task
+        "language": "english",  # Auto-detect language
+        "condition_on_prev_tokens": True,  # Use previous tokens for context
+        "compression_ratio_threshold": 1.35,  # Threshold for repetition detection
+        "no_speech_threshold": 0.6,  # Threshold for silence detection
+        "logprob_threshold": -1.0,  # Log probability threshold
+        "temperature": (0.0, 0.2, 0.4, 0.6, 0.8, 1.0),  # Temperature fallback
+        "num_beams": 5,  # Beam search for better accuracy
+    }
+    
+    def __init__(
+        self,
+        model_registry: Optional[ModelRegistry] = None,
+        config: Optional[AudioConfig] = None,
+        vad: Optional[VoiceActivityDetector] = None
+    ):
+        """Register the Whisper pipeline, loaded on first use by the model registry
+        
+        Args:
+            model_registry: Registry loading the Whisper pipeline
+            config: Audio configuration, defaults to AudioConfig()
+            vad: Voice activity detector, created from the configuration when not given
+        """
+        self.models = model_registry or ModelRegistry()
+        self.models.register(self.model_name, load_whisper_pipeline)
+        self.config = config or AudioConfig()
+        self.vad = vad or create_vad(self.config)
     
-    def __init__(self):
-        """Initialize Whisper model with optimal configuration for accuracy"""
-        self.device = "cuda:0" if torch.cuda.is_available() else "cpu"
-        self.torch_dtype = torch.float16 if torch.cuda.is_available() else torch.float32
+    def _transcribe_chunks(
+        self,
+        pipe,
+        chunks: list[np.ndarray],
+        progress: Optional[Callable[[list[str]], None]] = None
+    ) -> list[str]:
+        """Transcribe chunks in order with the configured transcription mode
         
-        # Initialize model with Flash Attention 2
-        self.model = AutoModelForSpeechSeq2Seq.from_pretrained(
-            "openai/whisper-large-v3",
-            torch_dtype=self.torch_dtype,
-            low_cpu_mem_usage=True,
-            use_safetensors=True,
-            # attn_implementation="flash_attention_2"
+        In sequential mode progress receives the transcripts done so far after each chunk.
+        """
+        mode = self.config.transcription_mode
+        # A GPU is shared by batching, not by processes, and forking is unsafe off the main thread
+        if mode == "process_pool" and not can_fork():
+            mode = "batched"
+        
+        if mode == "batched" and len(chunks) > 1:
+            results = pipe(
+                [{"raw": chunk, "sampling_rate": SAMPLE_RATE} for chunk in chunks],
+                batch_size=self.config.batch_size,
+                return_timestamps=True,
+                generate_kwargs=self.generate_kwargs
+            )
+            return [result["text"].strip() for result in results]
+        
+        if mode == "process_pool" and len(chunks) > 1:
+            global _pool_pipe
+            cores = os.cpu_count() or 1
+            workers = min(self.config.transcription_workers or max(1, cores // 4), len(chunks))
+            # Forked workers share the loaded weights copy-on-write
+            _pool_pipe = pipe
+            try:
+                with ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context("fork"),
+                    initializer=_init_pool_worker,
+                    initargs=(max(1, cores // workers),)
+                ) as pool:
+                    return list(pool.map(_transcribe_in_pool, chunks, [self.generate_kwargs] * len(chunks)))
+            finally:
+                _pool_pipe = None
+        
+        # Process sequentially for accuracy
+        texts = []
+        for chunk in chunks:
+            texts.append(_run_whisper(pipe, chunk, self.generate_kwargs))
+            if progress:
+                progress(texts)
+        return texts
+    
+    def transcribe(self, audio: np.ndarray, progress: Optional[ProgressCallback] = None) -> Transcription:
+        """Transcribe mono 16 kHz audio, skipping what the VAD marks as non-speech
+        
+        Speech is grouped into chunks of at most max_span_seconds (see build_chunks),
+        the chunks are transcribed according to transcription_mode and their texts
+        are joined in order, merging the overlaps of split segments.
+        """
+        segments = (
+            self.vad.detect(audio) if self.vad
+            else [SpeechSegment(start=0, end=len(audio))] if len(audio) else []
         )
-        self.model.to(self.device)
+        chunks = build_chunks(audio, segments, self.config)
         
-        # Load processor
-        self.processor = AutoProcessor.from_pretrained("openai/whisper-large-v3")
+        texts = []
+        if chunks:
+            with self.models.use(self.model_name) as pipe:
+                texts = self._transcribe_chunks(
+                    pipe,
+                    [chunk.samples(audio) for chunk in chunks],
+                    progress=(lambda done: progress(join_transcripts(chunks, done))) if progress else None
+                )
         
-        # Create pipeline with optimal settings for accuracy
-        self.pipe = pipeline(
-            "automatic-speech-recognition",
-            model=self.model,
-            tokenizer=self.processor.tokenizer,
-            feature_extractor=self.processor.feature_extractor,
-            torch_dtype=self.torch_dtype,
-            device=self.device,
+        return Transcription(
+            text=join_transcripts(chunks, texts),
+            audio_seconds=len(audio) / SAMPLE_RATE,
+            speech_seconds=sum(segment.length for segment in segments) / SAMPLE_RATE,
+            chunks=len(chunks)
         )
     
-    def extract_text(self, file_data: bytes, filename: str) -> Optional[str]:
-        """Extract text from audio files using Whisper
+    def extract(
+        self,
+        file_data: bytes,
+        filename: str,
+        limits: Optional[ExtractionLimits] = None,
+        progress: Optional[ProgressCallback] = None
+    ) -> ExtractionOutcome:
+        """Transcribe an audio file within the duration limit
         
         Args:
             file_data: Raw bytes of the audio file
             filename: Name of the file including extension
+            limits: Only the first max_audio_seconds of longer recordings are transcribed
+            progress: Receives the text transcribed so far after each chunk
             
         Returns:
-            Transcribed text if successful, None otherwise
+            Transcribed text, with the reason when the recording was truncated
             
         Note:
             Uses Whisper large-v3 with:
-            - Flash Attention 2 for faster processing
+            - Voice activity detection, only speech is transcribed
             - Temperature fallback for better accuracy
-            - Sequential processing for long audio
+            - Chunks transcribed sequentially, batched or in a process pool
             - Advanced decoding parameters
         """
         try:
@@ -70,39 +229,49 @@ class AudioExtractor(BaseExtractor):
             extension = filename.lower().split('.')[-1]
             if f'.{extension}' not in self.supported_formats:
                 logger.error(f"Unsupported audio format: {extension}")
-                return None
+                return ExtractionOutcome()
             
-            # Create temporary file
+            # Create temporary file, ffmpeg needs seekable input for some containers
             with tempfile.NamedTemporaryFile(suffix=f".{extension}") as temp_file:
                 # Write bytes to temporary file
                 temp_file.write(file_data)
                 temp_file.flush()
-                
-                # Configure generation parameters for maximum accuracy
-                generate_kwargs = {
-                    "task": "transcribe",  # Transcription task
-                    "language": "english",  # Auto-detect language
-                    "condition_on_prev_tokens": True,  # Use previous tokens for context
-                    "compression_ratio_threshold": 1.35,  # Threshold for repetition detection
-                    "no_speech_threshold": 0.6,  # Threshold for silence detection
-                    "logprob_threshold": -1.0,  # Log probability threshold
-                    "temperature": (0.0, 0.2, 0.4, 0.6, 0.8, 1.0),  # Temperature fallback
-                    "num_beams": 5,  # Beam search for better accuracy
-                }
-                
-                # Process audio file
-                result = self.pipe(
-                    temp_file.name,
-                    batch_size=1,  # Process sequentially for accuracy
-                    return_timestamps=True,  # Get word-level timestamps
-                    generate_kwargs=generate_kwargs
+                audio = decode_audio(temp_file.name)
+            
+            reason = None
+            if limits and limits.max_audio_seconds and len(audio) > limits.max_audio_seconds * SAMPLE_RATE:
+                reason = (
+                    f"Transcribed the first {limits.max_audio_seconds:.0f}s "
+                    f"of {len(audio) / SAMPLE_RATE:.0f}s of audio"
                 )
-                
-                # Extract and clean text
-                if isinstance(result, dict) and "text" in result:
-                    return self._clean_text(result["text"])
-                return None
+                audio = audio[:int(limits.max_audio_seconds * SAMPLE_RATE)]
+            
+            transcription = self.transcribe(audio, progress)
+            logger.info(
+                f"Transcribed {filename}: {transcription.speech_seconds:.0f}s of speech in "
+                f"{transcription.audio_seconds:.0f}s of audio ({transcription.skipped_ratio:.0%} skipped), "
+                f"{transcription.chunks} chunks ({self.config.transcription_mode})"
+            )
+            
+            # Clean text
+            text = self._clean_text(transcription.text) if transcription.text else None
+            return ExtractionOutcome(text=text, reason=reason)
             
         except Exception as e:
             logger.exception(f"Error extracting text from {filename}")
-            raise ValueError(f"Failed to extract content from {filename}: {e}")
\ No newline at end of file
+            raise ValueError(f"Failed to extract content from {filename}: {e}")
+    
+    def extract_text(self, file_data: bytes, filename: str) -> Optional[str]:
+        """Extract text from audio files using Whisper
+        
+        Args:
+            file_data: Raw bytes of the audio file
+            filename: Name of the file including extension
+            
+        Returns:
+            Transcribed text if successful, None otherwise
+        """
+        return self.extract(file_data, filename).text
+    
+    def prepare(self) -> None:
+        self.models.get(self.model_name)
\ No newline at end of file
@@ -2,6 +2,9 @@ from typing import Optional, Protocol, Dict
 from pathlib import Path
 import re
 
+from src.utils.configs import ExtractionConfig, ExtractionLimits
+from src.ingestion.extract.limits import ExtractionOutcome, ProgressCallback, run_isolated
+
 class ContentExtractorProtocol(Protocol):
     """Protocol for content extractors"""
     def extract_text(self, file_data: bytes, filename: str) -> Optional[str]:
@@ -15,6 +18,26 @@ class ContentExtractorProtocol(Protocol):
             Extracted text if successful, None otherwise
         """
         ...
+    
+    def extract(
+        self,
+        file_data: bytes,
+        filename: str,
+        limits: Optional[ExtractionLimits] = None,
+        progress: Optional[ProgressCallback] = None
+    ) -> ExtractionOutcome:
+        """Extract text content, reporting why it is incomplete if it is
+        
+        Args:
+            file_data: Raw bytes of the file
+            filename: Name of the file including extension
+            limits: Page and duration limits, None for no limits
+            progress: Receives the text extracted so far, where the extractor can report it
+            
+        Returns:
+            Extracted text and the reason it was truncated, if it was
+        """
+        ...
 
 class BaseExtractor(ContentExtractorProtocol):
     """Base class for all extractors"""
@@ -25,6 +48,19 @@ class BaseExtractor(ContentExtractorProtocol):
         """Default implementation that should be overridden"""
         raise NotImplementedError()
     
+    def extract(
+        self,
+        file_data: bytes,
+        filename: str,
+        limits: Optional[ExtractionLimits] = None,
+        progress: Optional[ProgressCallback] = None
+    ) -> ExtractionOutcome:
+        """Extract within the page and duration limits, extractors supporting them override this"""
+        return ExtractionOutcome(text=self.extract_text(file_data, filename))
+    
+    def prepare(self) -> None:
+        """Load models ahead of extraction, so isolated extractions inherit them instead of loading them"""
+    
     def _clean_text(self, text: str) -> str:
         """Clean extracted text by removing extra whitespace and normalizing line endings"""
         text = re.sub(r'\n\s*\n', '\n\n', text)
@@ -39,9 +75,14 @@ class BaseExtractor(ContentExtractorProtocol):
 class ContentExtractor:
     """Main coordinator for content extraction"""
     
-    def __init__(self):
-        """Initialize with default extractors"""
+    def __init__(self, config: Optional[ExtractionConfig] = None):
+        """Initialize with default extractors
+        
+        Args:
+            config: Extraction limits per extractor name and isolation setting
+        """
         self._extractors: Dict[str, BaseExtractor] = {}
+        self.config = config or ExtractionConfig()
         
     def register_extractor(self, name: str, extractor: BaseExtractor) -> None:
         """Register a new extractor
@@ -52,25 +93,51 @@ class ContentExtractor:
         """
         self._extractors[name] = extractor
     
-    def extract_text(self, file_data: bytes, filename: str) -> Optional[str]:
-        """Extract text using the appropriate extractor
+    def extract(
+        self,
+        file_data: bytes,
+        filename: str,
+        limits: Optional[ExtractionLimits] = None,
+        progress: Optional[ProgressCallback] = None
+    ) -> ExtractionOutcome:
+        """Extract text using the appropriate extractor within its limits
         
         Args:
             file_data: Raw bytes of the file
             filename: Name of the file including extension
+            limits: Limits replacing the configured ones of the extractor
+            progress: Receives the text extracted so far, where the extractor can report it
             
         Returns:
-            Extracted text if successful, None otherwise
+            Extracted text, possibly truncated or partial with the reason recorded
             
         Raises:
             ValueError: If no suitable extractor is found
         """
-        for extractor in self._extractors.values():
+        for name, extractor in self._extractors.items():
             if extractor.supports_format(filename):
+                extractor_limits = limits or self.config.limits.get(name, ExtractionLimits())
                 try:
-                    return extractor.extract_text(file_data, filename)
+                    if self.config.isolate:
+                        return run_isolated(extractor, file_data, filename, extractor_limits, progress)
+                    return extractor.extract(file_data, filename, extractor_limits, progress)
                 except Exception as e:
                     print(f"Error extracting text with {type(extractor).__name__}: {e}")
                     continue
         
-        raise ValueError(f"No suitable extractor found for {filename}") 
\ No newline at end of file
+        raise ValueError(f"No suitable extractor found for {filename}")
+    
+    def extract_text(self, file_data: bytes, filename: str) -> Optional[str]:
+        """Extract text using the appropriate extractor
+        
+        Args:
+            file_data: Raw bytes of the file
+            filename: Name of the file including extension
+            
+        Returns:
+            Extracted text if successful, None otherwise
+            
+        Raises:
+            ValueError: If no suitable extractor is found
+        """
+        return self.extract(file_data, filename).text
@@ -0,0 +1,129 @@
+import re
+
+import numpy as np
+from pydantic import BaseModel
+
+from src.utils.configs import AudioConfig
+from .vad import SAMPLE_RATE, SpeechSegment
+
+# Frame length used to look for the quietest point around a cut
+_CUT_FRAME = int(0.03 * SAMPLE_RATE)
+# Silence inserted between the speech segments of a chunk
+_GAP_SECONDS = 0.3
+# Shortest common word run accepted as the overlap between two chunks
+_MIN_OVERLAP_WORDS = 2
+
+
+class AudioChunk(BaseModel):
+    """Speech segments transcribed together in one Whisper call"""
+    segments: list[SpeechSegment]
+    overlaps_previous: bool = False
+
+    def samples(self, audio: np.ndarray) -> np.ndarray:
+        """Audio of the chunk, its segments joined by short silences"""
+        gap = np.zeros(int(_GAP_SECONDS * SAMPLE_RATE), dtype=np.float32)
+        parts = [audio[segment.start:segment.end] for segment in self.segments]
+        return np.concatenate([x for part in parts for x in (part, gap)][:-1])
+
+
+def _quietest_point(audio: np.ndarray, start: int, end: int) -> int:
+    """Start of the lowest energy frame between start and end"""
+    frames = (end - start) // _CUT_FRAME
+    if frames <= 1:
+        return end
+    energy = np.square(audio[start:start + frames * _CUT_FRAME].reshape(frames, _CUT_FRAME)).mean(axis=1)
+    return start + int(np.argmin(energy)) * _CUT_FRAME
+
+
+def split_segment(audio: np.ndarray, segment: SpeechSegment, config: AudioConfig) -> list[SpeechSegment]:
+    """Split a long segment into overlapping pieces of at most max_span_seconds
+
+    Each cut is moved to the quietest frame within cut_search_seconds before the
+    nominal boundary, so that words are rarely cut, and the next piece starts
+    chunk_overlap_seconds before the cut.
+    """
+    length = int(config.max_span_seconds * SAMPLE_RATE)
+    overlap = int(config.chunk_overlap_seconds * SAMPLE_RATE)
+    search = int(config.cut_search_seconds * SAMPLE_RATE)
+    pieces = []
+    start = segment.start
+    while segment.end - start > length:
+        boundary = start + length
+        cut = _quietest_point(audio, max(boundary - search, start + overlap + _CUT_FRAME), boundary)
+        pieces.append(SpeechSegment(start=start, end=cut))
+        start = cut - overlap
+    pieces.append(SpeechSegment(start=start, end=segment.end))
+    return pieces
+
+
+def build_chunks(audio: np.ndarray, segments: list[SpeechSegment], config: AudioConfig) -> list[AudioChunk]:
+    """Group speech segments into chunks of at most max_span_seconds of speech
+
+    Consecutive segments are packed together, they are already separated by
+    silence. Segments longer than a chunk are split into overlapping chunks whose
+    transcripts are merged with merge_overlap.
+    """
+    max_samples = int(config.max_span_seconds * SAMPLE_RATE)
+    chunks: list[AudioChunk] = []
+    length = 0
+    for segment in segments:
+        if segment.length > max_samples:
+            pieces = split_segment(audio, segment, config)
+            chunks.extend(
+                AudioChunk(segments=[piece], overlaps_previous=index > 0)
+                for index, piece in enumerate(pieces)
+            )
+            length = max_samples
+        elif chunks and length + segment.length <= max_samples:
+            chunks[-1].segments.append(segment)
+            length += segment.length
+        else:
+            chunks.append(AudioChunk(segments=[segment]))
+            length = segment.length
+    return chunks
+
+
+def _normalize(word: str) -> str:
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+def merge_overlap(previous: str, following: str, window: int = 40) -> str:
+    """Join the transcripts of two overlapping chunks without repeating the overlap
+
+    Finds the longest common run of words between the end of previous and the
+    start of following (ignoring case and punctuation) and joins the texts at
+    that run. Without a run of at least _MIN_OVERLAP_WORDS the texts are simply
+    concatenated.
+    """
+    a, b = previous.split(), following.split()
+    tail, head = a[-window:], b[:window]
+    tail_norm, head_norm = [_normalize(w) for w in tail], [_normalize(w) for w in head]
+
+    # Longest common substring over words, earliest match in following wins ties
+    best, best_i, best_j = 0, 0, 0
+    lengths = [[0] * (len(head) + 1) for _ in range(len(tail) + 1)]
+    for i in range(1, len(tail) + 1):
+        for j in range(1, len(head) + 1):
+            if tail_norm[i - 1] and tail_norm[i - 1] == head_norm[j - 1]:
+                lengths[i][j] = lengths[i - 1][j - 1] + 1
+                if lengths[i][j] > best or (lengths[i][j] == best and j < best_j):
+                    best, best_i, best_j = lengths[i][j], i, j
+
+    if best < _MIN_OVERLAP_WORDS:
+        return " ".join(a + b)
+    # Keep previous up to the end of the run and following after it
+    cut = len(a) - len(tail) + best_i
+    return " ".join(a[:cut] + b[best_j:])
+
+
+def join_transcripts(chunks: list[AudioChunk], texts: list[str]) -> str:
+    """Join chunk transcripts in order, merging the overlapping ones"""
+    result = ""
+    for chunk, text in zip(chunks, texts):
+        if not text:
+            continue
+        if chunk.overlaps_previous and result:
+            result = merge_overlap(result, text)
+        else:
+            result = f"{result} {text}" if result else text
+    return result
@@ -21,10 +21,76 @@ from docling.datamodel.pipeline_options import (
 from docling.pipeline.simple_pipeline import SimplePipeline
 from docling.pipeline.standard_pdf_pipeline import StandardPdfPipeline
 
-from src.ingestion.extract.base import BaseExtractor
+from src.utils.configs import ExtractionLimits
+from src.utils.model_registry import ModelRegistry
+from src.ingestion.extract.base import BaseExtractor, ExtractionOutcome, ProgressCallback
 
 logger = logging.getLogger(__name__)
 
+def load_document_converter(artifacts_path: Optional[Path] = None) -> DocumentConverter:
+    """Create the Docling converter with appropriate options
+    
+    Args:
+        artifacts_path: Directory of prefetched Docling models, None to download them on demand
+    """
+    # Configure PDF pipeline options
+    pipeline_options = PdfPipelineOptions()
+    if artifacts_path is not None:
+        pipeline_options.artifacts_path = artifacts_path
+    pipeline_options.do_ocr = True
+    pipeline_options.do_table_structure = True
+    pipeline_options.table_structure_options.do_cell_matching = True
+    pipeline_options.table_structure_options.mode = TableFormerMode.ACCURATE
+    
+    # Configure format-specific options
+    format_options = {
+        # PDF with advanced processing
+        InputFormat.PDF: PdfFormatOption(
+            pipeline_options=pipeline_options,
+            pipeline_cls=StandardPdfPipeline
+        ),
+        # Microsoft Word documents
+        InputFormat.DOCX: WordFormatOption(
+            pipeline_cls=SimplePipeline,
+            pipeline_options=PipelineOptions(
+                keep_images=True,
+                do_table_structure=True
+            )
+        ),
+        # PowerPoint presentations
+        InputFormat.PPTX: PowerpointFormatOption(
+            pipeline_cls=SimplePipeline,
+            pipeline_options=PipelineOptions(
+                keep_images=True
+            )
+        ),
+        # Excel spreadsheets
+        InputFormat.XLSX: ExcelFormatOption(
+            pipeline_cls=SimplePipeline,
+            pipeline_options=PipelineOptions(
+                do_table_structure=True,
+                extract_formulas=True
+            )
+        )
+    }
+    
+    # Initialize document converter with all supported formats
+    converter = DocumentConverter(
+        allowed_formats=[
+            InputFormat.PDF,
+            InputFormat.DOCX,
+            InputFormat.PPTX,
+            InputFormat.XLSX,
+            InputFormat.HTML,
+            InputFormat.MD,
+            InputFormat.ASCIIDOC
+        ],
+        format_options=format_options
+    )
+    # Load the layout, OCR and table models now rather than on the first PDF
+    converter.initialize_pipeline(InputFormat.PDF)
+    return converter
+
 class DocumentExtractor(BaseExtractor):
     """Handles document formats using Docling's advanced document understanding"""
     
@@ -51,70 +117,34 @@ class DocumentExtractor(BaseExtractor):
         '.asciidoc'
     }
     
-    def __init__(self):
-        """Initialize Docling converter with appropriate options"""
-        # Configure PDF pipeline options
-        pipeline_options = PdfPipelineOptions()
-        pipeline_options.do_ocr = True
-        pipeline_options.do_table_structure = True
-        pipeline_options.table_structure_options.do_cell_matching = True
-        pipeline_options.table_structure_options.mode = TableFormerMode.ACCURATE
-        
-        # Configure format-specific options
-        format_options = {
-            # PDF with advanced processing
-            InputFormat.PDF: PdfFormatOption(
-                pipeline_options=pipeline_options,
-                pipeline_cls=StandardPdfPipeline
-            ),
-            # Microsoft Word documents
-            InputFormat.DOCX: WordFormatOption(
-                pipeline_cls=SimplePipeline,
-                pipeline_options=PipelineOptions(
-                    keep_images=True,
-                    do_table_structure=True
-                )
-            ),
-            # PowerPoint presentations
-            InputFormat.PPTX: PowerpointFormatOption(
-                pipeline_cls=SimplePipeline,
-                pipeline_options=PipelineOptions(
-                    keep_images=True
-                )
-            ),
-            # Excel spreadsheets
-            InputFormat.XLSX: ExcelFormatOption(
-                pipeline_cls=SimplePipeline,
-                pipeline_options=PipelineOptions(
-                    do_table_structure=True,
-                    extract_formulas=True
-                )
-            )
-        }
-        
-        # Initialize document converter with all supported formats
-        self.converter = DocumentConverter(
-            allowed_formats=[
-                InputFormat.PDF,
-                InputFormat.DOCX,
-                InputFormat.PPTX,
-                InputFormat.XLSX,
-                InputFormat.HTML,
-                InputFormat.MD,
-                InputFormat.ASCIIDOC
-            ],
-            format_options=format_options
-        )
+    model_name = "docling"
     
-    def extract_text(self, file_data: bytes, filename: str) -> Optional[str]:
-        """Extract text from document files using Docling
+    def __init__(
+        self,
+        model_registry: Optional[ModelRegistry] = None,
+        artifacts_path: Optional[Path] = None
+    ):
+        """Register the Docling converter, loaded on first use by the model registry"""
+        self.models = model_registry or ModelRegistry()
+        self.models.register(self.model_name, lambda: load_document_converter(artifacts_path))
+    
+    def extract(
+        self,
+        file_data: bytes,
+        filename: str,
+        limits: Optional[ExtractionLimits] = None,
+        progress: Optional[ProgressCallback] = None
+    ) -> ExtractionOutcome:
+        """Extract text from document files using Docling within the page limit
         
         Args:
             file_data: Raw bytes of the document
             filename: Name of the file including extension
+            limits: Only the first max_pages pages of longer documents are converted
+            progress: Unused, Docling converts a document in a single call
             
         Returns:
-            Extracted text if successful, None otherwise
+            Extracted text, with the reason when the document was truncated
             
         Note:
             Uses Docling's advanced document understanding capabilities:
@@ -128,7 +158,9 @@ class DocumentExtractor(BaseExtractor):
             extension = filename.lower().split('.')[-1]
             if f'.{extension}' not in self.supported_formats:
                 logger.error(f"Unsupported file format: {extension}")
-                return None
+                return ExtractionOutcome()
+            
+            max_pages = limits.max_pages if limits else None
             
             # Create temporary file
             with tempfile.NamedTemporaryFile(suffix=f".{extension}") as temp_file:
@@ -137,24 +169,49 @@ class DocumentExtractor(BaseExtractor):
                 temp_file.flush()
                 
                 # Convert document using Docling with file path
-                result = self.converter.convert(Path(temp_file.name))
+                with self.models.use(self.model_name) as converter:
+                    if max_pages:
+                        result = converter.convert(Path(temp_file.name), page_range=(1, max_pages))
+                    else:
+                        result = converter.convert(Path(temp_file.name))
                 
                 # Handle conversion failure
                 if not result.document or result.status == ConversionStatus.FAILURE:
                     logger.error(f"Failed to extract content from {filename}")
                     if result.errors:
                         logger.error(f"Conversion errors: {result.errors}")
-                    return None
+                    return ExtractionOutcome()
                 
                 # Log partial success
+                reason = None
                 if result.status == ConversionStatus.PARTIAL_SUCCESS:
                     logger.warning(f"Partial success extracting from {filename}")
                     if result.errors:
                         logger.warning(f"Conversion warnings: {result.errors}")
+                    reason = "Some pages failed to convert"
+                
+                page_count = getattr(result.input, "page_count", 0)
+                if max_pages and page_count > max_pages:
+                    reason = f"Extracted the first {max_pages} of {page_count} pages"
                 
                 # Export to markdown to preserve structure
                 text = result.document.export_to_markdown()
-                return self._clean_text(text)
+                return ExtractionOutcome(text=self._clean_text(text), reason=reason)
             
         except Exception as e:
             raise ValueError(f"Failed to extract content from {filename}: {e}")
+    
+    def extract_text(self, file_data: bytes, filename: str) -> Optional[str]:
+        """Extract text from document files using Docling
+        
+        Args:
+            file_data: Raw bytes of the document
+            filename: Name of the file including extension
+            
+        Returns:
+            Extracted text if successful, None otherwise
+        """
+        return self.extract(file_data, filename).text
+    
+    def prepare(self) -> None:
+        self.models.get(self.model_name)
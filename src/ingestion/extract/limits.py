@@ -0,0 +1,176 @@
+from typing import TYPE_CHECKING, Callable, Optional
+import logging
+import multiprocessing
+import os
+import resource
+import signal
+import sys
+import threading
+import time
+
+from pydantic import BaseModel
+
+from src.utils.configs import ExtractionLimits
+
+if TYPE_CHECKING:
+    from src.ingestion.extract.base import BaseExtractor
+
+logger = logging.getLogger(__name__)
+
+# Receives the text extracted so far, used to salvage partial text when an extraction is killed
+ProgressCallback = Callable[[str], None]
+
+_MEMORY_ERROR = "memory"
+
+
+class ExtractionOutcome(BaseModel):
+    """Text extracted from a file and, when incomplete, the reason why"""
+    text: Optional[str] = None
+    reason: Optional[str] = None
+
+
+def cuda_available() -> bool:
+    """Whether torch is loaded with a usable GPU, which a forked child cannot use
+
+    CUDA cannot be re-initialized in a forked process once the parent has used
+    it, and its address space reservations defeat an RLIMIT_AS budget.
+    """
+    torch = sys.modules.get("torch")
+    return torch is not None and torch.cuda.is_available()
+
+
+def can_fork() -> bool:
+    """Whether this thread may safely fork a child sharing the loaded models
+
+    Forking from a threaded service or worker thread may copy locks held by
+    other threads, leaving the child deadlocked on them.
+    """
+    return not cuda_available() and threading.current_thread() is threading.main_thread()
+
+
+def _virtual_memory_bytes() -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def _limit_memory(max_memory_mb: int):
+    """Cap the address space at what the process already maps plus the budget
+
+    The forked extraction inherits the mappings of the worker (models, libraries),
+    so only growth beyond them counts against the budget.
+    """
+    try:
+        limit = _virtual_memory_bytes() + max_memory_mb * 1024 * 1024
+    except OSError:
+        return
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _run_child(connection, extractor: "BaseExtractor", file_data: bytes, filename: str, limits: ExtractionLimits):
+    # Own process group, so that pools started by the extractor are killed with it
+    os.setpgid(0, 0)
+    if limits.max_memory_mb:
+        _limit_memory(limits.max_memory_mb)
+    try:
+        outcome = extractor.extract(
+            file_data,
+            filename,
+            limits,
+            progress=lambda text: connection.send(("partial", text))
+        )
+        connection.send(("done", outcome.model_dump()))
+    except MemoryError:
+        connection.send(("error", _MEMORY_ERROR))
+    except BaseException as e:
+        connection.send(("error", str(e)))
+    finally:
+        connection.close()
+
+
+def _kill(process: multiprocessing.Process):
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    process.join()
+
+
+def run_isolated(
+    extractor: "BaseExtractor",
+    file_data: bytes,
+    filename: str,
+    limits: ExtractionLimits,
+    progress: Optional[ProgressCallback] = None
+) -> ExtractionOutcome:
+    """Run an extraction in a forked subprocess enforcing its wall time and memory limits
+
+    The extractor loads its models first, so the child shares them instead of
+    loading its own copy. When a limit is hit the child is killed and the partial
+    text it reported, if any, is returned with the reason. progress receives
+    that text as the child reports it.
+
+    On CUDA hosts, or off the main thread, the extraction runs in this process
+    instead, as a forked child could not use the GPU or could inherit locks held
+    by other threads. Only the page and duration limits apply then.
+
+    Raises:
+        ValueError: If the extraction itself fails
+    """
+    extractor.prepare()
+    if not can_fork():
+        logger.warning(f"Cannot fork here, extracting {filename} without time and memory limits")
+        return extractor.extract(file_data, filename, limits, progress)
+    context = multiprocessing.get_context("fork")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(
+        target=_run_child,
+        args=(sender, extractor, file_data, filename, limits),
+        name=f"extract-{filename}"
+    )
+    process.start()
+    sender.close()
+
+    deadline = time.monotonic() + limits.timeout_seconds if limits.timeout_seconds else None
+    partial: Optional[str] = None
+    try:
+        while True:
+            remaining = max(deadline - time.monotonic(), 0) if deadline else None
+            if not receiver.poll(remaining):
+                _kill(process)
+                logger.warning(f"Extraction of {filename} timed out after {limits.timeout_seconds:g}s")
+                return ExtractionOutcome(
+                    text=partial,
+                    reason=f"Extraction stopped after the {limits.timeout_seconds:g}s time limit"
+                )
+            try:
+                kind, value = receiver.recv()
+            except EOFError:
+                # The child died without reporting, typically killed by the OOM killer
+                process.join()
+                logger.warning(f"Extraction of {filename} died with exit code {process.exitcode}")
+                return ExtractionOutcome(
+                    text=partial,
+                    reason=f"Extraction process died with exit code {process.exitcode}"
+                )
+
+            if kind == "partial":
+                partial = value
+                if progress:
+                    progress(value)
+            elif kind == "done":
+                process.join()
+                return ExtractionOutcome(**value)
+            elif value == _MEMORY_ERROR:
+                process.join()
+                logger.warning(f"Extraction of {filename} exceeded {limits.max_memory_mb} MB")
+                return ExtractionOutcome(
+                    text=partial,
+                    reason=f"Extraction stopped at the {limits.max_memory_mb} MB memory limit"
+                )
+            else:
+                process.join()
+                raise ValueError(value)
+    finally:
+        receiver.close()
+        if process.is_alive():
+            _kill(process)
@@ -0,0 +1,126 @@
+from typing import Optional, Protocol
+import logging
+
+import ffmpeg
+import numpy as np
+from pydantic import BaseModel
+
+from src.utils.configs import AudioConfig
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+
+
+def decode_audio(path: str, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Decode an audio file to mono float32 samples at the given rate using ffmpeg"""
+    out, _ = (
+        ffmpeg.input(path)
+        .output("pipe:", format="f32le", acodec="pcm_f32le", ac=1, ar=sample_rate)
+        .run(capture_stdout=True, capture_stderr=True)
+    )
+    return np.frombuffer(out, dtype=np.float32)
+
+
+class SpeechSegment(BaseModel):
+    """A span of speech, in samples"""
+    start: int
+    end: int
+
+    @property
+    def length(self) -> int:
+        return self.end - self.start
+
+
+class VoiceActivityDetector(Protocol):
+    """Finds the spans of speech in mono 16 kHz audio"""
+    def detect(self, audio: np.ndarray) -> list[SpeechSegment]:
+        ...
+
+
+def merge_segments(
+    segments: list[SpeechSegment],
+    total: int,
+    padding: int,
+    min_gap: int,
+    min_length: int
+) -> list[SpeechSegment]:
+    """Pad segments, merge those separated by less than min_gap and drop the too short ones"""
+    merged: list[SpeechSegment] = []
+    for segment in sorted(segments, key=lambda s: s.start):
+        start, end = max(segment.start - padding, 0), min(segment.end + padding, total)
+        if merged and start - merged[-1].end < min_gap:
+            merged[-1].end = max(merged[-1].end, end)
+        else:
+            merged.append(SpeechSegment(start=start, end=end))
+    return [segment for segment in merged if segment.length >= min_length]
+
+
+class EnergyVAD(VoiceActivityDetector):
+    """Frame energy detector with a threshold adapted to the noise floor of the recording
+
+    Cheap and dependency free, it removes silence and low level background noise
+    but, unlike SileroVAD, keeps loud non-speech such as hold music.
+    """
+
+    def __init__(self, config: AudioConfig, frame_seconds: float = 0.03):
+        self.config = config
+        self.frame = int(frame_seconds * SAMPLE_RATE)
+
+    def detect(self, audio: np.ndarray) -> list[SpeechSegment]:
+        frames = len(audio) // self.frame
+        if frames == 0:
+            return []
+        energy = np.square(audio[:frames * self.frame].reshape(frames, self.frame)).mean(axis=1)
+        db = 10 * np.log10(energy + 1e-10)
+        # Speech sits well above the quietest tenth of the recording
+        threshold = max(np.percentile(db, 10) + self.config.vad_energy_margin_db, self.config.vad_min_energy_db)
+        voiced = db > threshold
+
+        segments = []
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], voiced.astype(np.int8), [0]))))
+        for start, end in zip(edges[::2], edges[1::2]):
+            segments.append(SpeechSegment(start=int(start) * self.frame, end=int(end) * self.frame))
+        return merge_segments(
+            segments,
+            total=len(audio),
+            padding=int(self.config.vad_padding_seconds * SAMPLE_RATE),
+            min_gap=int(self.config.vad_min_silence_seconds * SAMPLE_RATE),
+            min_length=int(self.config.vad_min_speech_seconds * SAMPLE_RATE)
+        )
+
+
+class SileroVAD(VoiceActivityDetector):
+    """Silero neural detector, small enough to run on CPU and robust to music and noise"""
+
+    def __init__(self, config: AudioConfig):
+        from silero_vad import load_silero_vad
+        self.config = config
+        self.model = load_silero_vad(onnx=True)
+
+    def detect(self, audio: np.ndarray) -> list[SpeechSegment]:
+        import torch
+        from silero_vad import get_speech_timestamps
+        timestamps = get_speech_timestamps(
+            torch.from_numpy(audio),
+            self.model,
+            sampling_rate=SAMPLE_RATE,
+            min_silence_duration_ms=int(self.config.vad_min_silence_seconds * 1000),
+            min_speech_duration_ms=int(self.config.vad_min_speech_seconds * 1000),
+            speech_pad_ms=int(self.config.vad_padding_seconds * 1000)
+        )
+        return [SpeechSegment(start=t["start"], end=t["end"]) for t in timestamps]
+
+
+def create_vad(config: AudioConfig) -> Optional[VoiceActivityDetector]:
+    """Create the configured detector, auto prefers Silero and falls back to energy"""
+    if config.vad == "none":
+        return None
+    if config.vad in ("silero", "auto"):
+        try:
+            return SileroVAD(config)
+        except ImportError:
+            if config.vad == "silero":
+                raise
+            logger.info("silero-vad is not installed, using the energy detector")
+    return EnergyVAD(config)
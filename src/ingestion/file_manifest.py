@@ -0,0 +1,73 @@
+import hashlib
+import os
+from pathlib import Path
+from typing import Optional, Protocol
+
+from pydantic import BaseModel, Field
+
+from src.ingestion.extract import ExtractionOutcome
+from src.utils.form_access import FileVersion
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class FileRecord(BaseModel):
+    """A file referenced by an entity's submissions and the text extracted from it"""
+    source: str = Field(description="Storage path or URL of the file")
+    filename: str
+    version: Optional[FileVersion] = Field(default=None, description="Storage version the text was extracted from")
+    size: int
+    sha256: str
+    outcome: ExtractionOutcome
+
+
+class EntityFileManifest(BaseModel):
+    """Files of one entity, keyed by storage path or URL"""
+    files: dict[str, FileRecord] = Field(default_factory=dict)
+
+    def find_content(self, sha256: str) -> Optional[FileRecord]:
+        """A record of a file with the given content, possibly under another path"""
+        return next((record for record in self.files.values() if record.sha256 == sha256), None)
+
+
+class FileManifestStoreProtocol(Protocol):
+    """Protocol for persisting the file manifest of each entity"""
+    def load(self, entity_id: str) -> EntityFileManifest:
+        """Load the manifest of an entity, empty if there is none"""
+        ...
+
+    def save(self, entity_id: str, manifest: EntityFileManifest) -> None:
+        """Replace the manifest of an entity"""
+        ...
+
+
+class FileManifestStore(FileManifestStoreProtocol):
+    """JSON file per entity, replaced atomically so an interrupted ingest keeps the previous manifest"""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+
+    def _path(self, entity_id: str) -> Path:
+        return self.directory / f"{entity_id}.json"
+
+    def load(self, entity_id: str) -> EntityFileManifest:
+        path = self._path(entity_id)
+        if not path.exists():
+            return EntityFileManifest()
+        try:
+            return EntityFileManifest.model_validate_json(path.read_text())
+        except ValueError:
+            # Stale format or corrupted file, everything is downloaded again
+            return EntityFileManifest()
+
+    def save(self, entity_id: str, manifest: EntityFileManifest) -> None:
+        path = self._path(entity_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_suffix(".tmp")
+        with open(temporary, "w") as f:
+            f.write(manifest.model_dump_json())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, path)
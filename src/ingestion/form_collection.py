@@ -1,7 +1,8 @@
 from typing import Any, Optional
 from pathlib import Path
 
-from src.ingestion.extract import ContentExtractorProtocol
+from src.ingestion.extract import ContentExtractorProtocol, ExtractionOutcome
+from src.ingestion.file_manifest import EntityFileManifest, FileManifestStoreProtocol, FileRecord, content_hash
 from src.utils.data_structure_utils import find_file_data
 from src.utils.form_access import FormStorageProvider, FormDatabaseProvider
 
@@ -13,7 +14,8 @@ class FormCollector:
         storage_provider: FormStorageProvider,
         database_provider: FormDatabaseProvider,
         content_extractor: ContentExtractorProtocol,
-        form_id: str = 'innovator_introduction'
+        form_id: str = 'innovator_introduction',
+        file_manifests: Optional[FileManifestStoreProtocol] = None
     ):
         """Initialize form collector with providers
         
@@ -22,11 +24,13 @@ class FormCollector:
             database_provider: Provider for database access
             content_extractor: Configured ContentExtractor instance
             config: Firebase configuration
+            file_manifests: Store of the files seen by previous ingests, None to always download
         """
         self.storage = storage_provider
         self.database = database_provider
         self.content_extractor = content_extractor
         self.form_id = form_id
+        self.file_manifests = file_manifests
 
     def _get_entity_info(self, entity_id: str) -> dict[str, Any]:
         """Get entity information including member details"""
@@ -41,49 +45,119 @@ class FormCollector:
         entity_data['members'] = members_data
         return entity_data
 
-    def _download_and_process_file(self, file_data: dict[str, Any]) -> Optional[str]:
-        """Download and extract text from a file
+    def _file_source(self, file_data: dict[str, Any]) -> Optional[str]:
+        """Storage path or URL identifying a file"""
+        return file_data.get('url') or file_data.get('path') or file_data.get('relativePath')
+
+    def _download_and_process_file(
+        self,
+        file_data: dict[str, Any],
+        previous: EntityFileManifest,
+        current: EntityFileManifest
+    ) -> Optional[ExtractionOutcome]:
+        """Download and extract text from a file, unless it is unchanged since the last ingest
+        
+        Incomplete extractions are never reused: they depend on the limits and
+        audio settings of the run that made them, which may have changed since.
         
         Args:
             file_data: Dictionary containing file information
+            previous: File manifest recorded by the last ingest of the entity
+            current: File manifest of this ingest, the file is recorded in it
             
         Returns:
-            Extracted text content from the file, or None if processing fails
+            Extracted text content from the file with the reason it is incomplete
+            if it is, or None if processing fails
         """
         try:
             filename = file_data.get('filename', '')
+            source = self._file_source(file_data)
+            record = previous.files.get(source)
+            if record and record.outcome.reason:
+                record = None
             
             if url := file_data.get('url'):
-                file_contents = self.storage.get_file_from_url(url)
+                file_contents, version = self.storage.get_file_from_url_if_changed(
+                    url,
+                    record.version if record else None
+                )
             elif storage_path := (file_data.get('path') or file_data.get('relativePath')):
-                file_contents = self.storage.download_file(storage_path)
                 filename = filename or Path(storage_path).name
+                version = self.storage.get_file_version(storage_path)
+                file_contents = None
+                if not (record and record.version and record.version.matches(version)):
+                    file_contents = self.storage.download_file(storage_path)
             else:
                 return None
-                
-            return self.content_extractor.extract_text(file_contents, filename)
+            
+            if file_contents is None:
+                # Unchanged since the last ingest
+                current.files[source] = record.model_copy(update={'version': version or record.version})
+                return record.outcome
+            
+            digest = content_hash(file_contents)
+            # Same content as another file of this run, or as before, e.g. re-uploaded under a new path
+            known = current.find_content(digest)
+            if known is None and (earlier := previous.find_content(digest)) and not earlier.outcome.reason:
+                known = earlier
+            outcome = known.outcome if known else self.content_extractor.extract(file_contents, filename)
+            current.files[source] = FileRecord(
+                source=source,
+                filename=filename,
+                version=version,
+                size=len(file_contents),
+                sha256=digest,
+                outcome=outcome
+            )
+            return outcome
             
         except Exception as e:
             print(f"Error processing file {file_data.get('filename')}: {e}")
             return None
 
     def collect_form_data(self, entity_id: str) -> dict[str, Any]:
-        """Collect form data, entity information, and file contents for an entity"""
+        """Collect form data, entity information, and file contents for an entity
+        
+        Each distinct file is fetched once per run. With a file manifest store, files
+        whose storage version is unchanged since the last ingest are not downloaded
+        again and their recorded text is reused.
+        """
         # Get entity information
         entity_info = self._get_entity_info(entity_id)
         
         # Get form submissions
         form_data = self.database.get_form_submissions(entity_id, self.form_id)
         file_contents = {}
+        extraction_notes = {}
+        previous = self.file_manifests.load(entity_id) if self.file_manifests else EntityFileManifest()
+        current = EntityFileManifest()
+        outcomes: dict[str, Optional[ExtractionOutcome]] = {}
         
         # Process files in submissions
         for submission in form_data:
             for file_data in find_file_data(submission):
-                if content := self._download_and_process_file(file_data):
-                    file_contents[file_data['filename']] = content
+                source = self._file_source(file_data)
+                if source not in outcomes:
+                    outcomes[source] = self._download_and_process_file(file_data, previous, current)
+                outcome = outcomes[source]
+                if outcome is None:
+                    continue
+                filename = file_data['filename']
+                if outcome.reason:
+                    print(f"Incomplete extraction of {filename}: {outcome.reason}")
+                    extraction_notes[filename] = outcome.reason
+                if outcome.text:
+                    # Let the enhancement know the text does not cover the whole file
+                    note = f"\n\n[Incomplete extraction: {outcome.reason}]" if outcome.reason else ""
+                    file_contents[filename] = outcome.text + note
+        
+        # Files no longer referenced are dropped from the manifest
+        if self.file_manifests:
+            self.file_manifests.save(entity_id, current)
         
         return {
             'entity': entity_info,
             'form_data': form_data,
-            'file_contents': file_contents
+            'file_contents': file_contents,
+            'extraction_notes': extraction_notes
         }
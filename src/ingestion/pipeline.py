@@ -1,8 +1,12 @@
+from typing import Iterable, Iterator, Optional
+
 from src.ingestion.enhancement import ContentEnhancerProtocol
 from src.ingestion.extract.base import ContentExtractorProtocol
+from src.ingestion.file_manifest import FileManifestStoreProtocol
 from src.ingestion.form_collection import FormCollector
-from src.ingestion.population import DatabasePopulatorProtocol
+from src.ingestion.population import DatabasePopulatorProtocol, PopulationStats
 from src.utils.form_access import FormStorageProvider, FormDatabaseProvider
+from src.utils.models import EnhancedContent
 
 
 class IngestionPipeline:
@@ -15,7 +19,8 @@ class IngestionPipeline:
         content_extractor: ContentExtractorProtocol,
         content_enhancer: ContentEnhancerProtocol,
         db_populator: DatabasePopulatorProtocol,
-        form_id: str = "innovator_introduction"
+        form_id: str = "innovator_introduction",
+        file_manifests: Optional[FileManifestStoreProtocol] = None
     ):
         """Initialize pipeline with all required providers
         
@@ -26,6 +31,7 @@ class IngestionPipeline:
             content_enhancer: Content enhancement service
             db_populator: Database population service
             form_id: Form identifier to collect
+            file_manifests: Store of the files seen by previous ingests, None to always download
         """
         self.content_enhancer = content_enhancer
         self.db_populator = db_populator
@@ -33,7 +39,8 @@ class IngestionPipeline:
             storage_provider,
             database_provider,
             content_extractor,
-            form_id
+            form_id,
+            file_manifests
         )
         
     def process_entity(self, entity_id: str):
@@ -43,4 +50,21 @@ class IngestionPipeline:
         # 2. Enhance content
         enhanced_data = self.content_enhancer.process_content(raw_data)
         # 3. Populate database
-        self.db_populator.populate(entity_id, enhanced_data)
\ No newline at end of file
+        self.db_populator.populate(entity_id, enhanced_data)
+
+    def _enhanced_contents(self, entity_ids: Iterable[str]) -> Iterator[tuple[str, EnhancedContent]]:
+        """Collect and enhance entities one at a time, skipping those that fail"""
+        for entity_id in entity_ids:
+            try:
+                raw_data = self.form_collector.collect_form_data(entity_id)
+                yield entity_id, self.content_enhancer.process_content(raw_data)
+            except Exception as e:
+                print(f"Error processing entity {entity_id}: {e}")
+
+    def process_entities(self, entity_ids: Iterable[str]) -> PopulationStats:
+        """Process many entities, populating the database with batched bulk uploads
+        
+        Entities are collected and enhanced lazily, while the sections of the
+        previous ones are embedded and uploaded.
+        """
+        return self.db_populator.populate_many(self._enhanced_contents(entity_ids))
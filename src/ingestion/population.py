@@ -1,85 +1,156 @@
-import json, uuid
-from typing import Protocol
-from qdrant_client import QdrantClient
+import json, time, uuid
+from itertools import islice
+from typing import Iterable, Iterator, Optional, Protocol
+from pydantic import BaseModel
 from qdrant_client.http import models as qdrant_models
-from fastembed import TextEmbedding
 from src.utils.configs import QdrantConfig, EmbeddingConfig
+from src.utils.embedding import Embedder, SparseEmbedder
+from src.utils.model_registry import ModelRegistry
+from src.utils.qdrant_clients import qdrant_client
 from src.utils.models import EnhancedContent, EnhancedContentSection
+from src.utils.local_vector_store import LocalVectorStore
+from src.utils.section_text_store import SectionTextStoreProtocol, TEXT_FIELDS
+from src.utils.qdrant_schema import CollectionSchema, SPARSE_VECTOR_NAME, has_sparse_vectors, resolve_alias
+from src.utils.taxonomy import taxonomy, category_sections
+
+
+class PopulationStats(BaseModel):
+    """Entities and points written by a bulk population and its throughput"""
+    entities: int = 0
+    points: int = 0
+    seconds: float = 0.0
+
+    @property
+    def points_per_second(self) -> float:
+        return self.points / self.seconds if self.seconds else 0.0
+
+    def to_string(self) -> str:
+        return (
+            f"{self.points} points from {self.entities} entities in {self.seconds:.1f}s "
+            f"({self.points_per_second:.0f} points/s)"
+        )
 
 
 class DatabasePopulatorProtocol(Protocol):
     def populate(self, entity_id: str, content: EnhancedContent):
         ...
 
+    def populate_many(self, contents: Iterable[tuple[str, EnhancedContent]]) -> PopulationStats:
+        ...
+
 class DatabasePopulator(DatabasePopulatorProtocol):
     """Populates vector database with enhanced content"""
     
     def __init__(
         self,
         qdrant_config: QdrantConfig,
-        embedding_config: EmbeddingConfig
+        embedding_config: EmbeddingConfig,
+        model_registry: Optional[ModelRegistry] = None,
+        include_taxonomy_terms: bool = False,
+        text_store: Optional[SectionTextStoreProtocol] = None
     ):
         """Initialize database populator with configurations
         
         Args:
             qdrant_config: Configuration for Qdrant connection and collection
             embedding_config: Configuration for embedding model
+            model_registry: Registry loading the embedding model, shared with other components
+            include_taxonomy_terms: Add the taxonomy terms of each section to its sparse vector
+            text_store: Store of the section text, None to keep the text in the payloads
         """
-        self.client = QdrantClient(**qdrant_config.model_dump(exclude={'collection'}))
+        self.client = qdrant_client(qdrant_config)
         self.collection_name = qdrant_config.collection.name
+        self.collection_config = qdrant_config.collection
+        self.upload_batch_size = qdrant_config.upload_batch_size
+        self.upload_parallel = qdrant_config.upload_parallel
         self.embedding_config = embedding_config
-        self.embedder = TextEmbedding(self.embedding_config.model_name)
+        self.embedder = Embedder(self.embedding_config, model_registry)
+        self.sparse_embedder = (
+            SparseEmbedder(self.embedding_config.sparse_model_name, model_registry)
+            if self.embedding_config.sparse_model_name else None
+        )
+        self.include_taxonomy_terms = include_taxonomy_terms
+        self.text_store = text_store
+        self.schema = CollectionSchema(self.collection_config, self.embedding_config)
         
         self._init_collection()
 
     def _init_collection(self):
-        """Initialize the Qdrant collection with proper schema"""
-        # Use config for vector size and distance metric
-        self.client.recreate_collection(
-            collection_name=self.collection_name,
-            vectors_config=qdrant_models.VectorParams(
-                size=self.embedding_config.vector_size,
-                distance=self.embedding_config.distance_metric
-            )
-        )
+        """Initialize the Qdrant collection with proper schema
         
-        # Create payload index for title field
-        self.client.create_payload_index(
-            collection_name=self.collection_name,
-            field_name="title",
-            field_schema=qdrant_models.PayloadSchemaType.KEYWORD
-        )
-        # Create payload index for entity_id field to allow filtering by entity_id
-        self.client.create_payload_index(
-            collection_name=self.collection_name,
-            field_name="entity_id",
-            field_schema=qdrant_models.PayloadSchemaType.KEYWORD
-        )
+        The collection name may be an alias switched by the reindex command, in
+        which case the collection it points to is used.
+        """
+        physical_name = resolve_alias(self.client, self.collection_name) or self.collection_name
+        exists = self.client.collection_exists(physical_name)
+        if exists and not self.collection_config.recreate_collection:
+            if self.sparse_embedder and not has_sparse_vectors(self.client, physical_name):
+                print(f"Collection {self.collection_name} has no sparse vector, recreate it to enable hybrid search")
+                self.sparse_embedder = None
+            return
+        if exists:
+            # Deleting the collection also drops its aliases
+            self.client.delete_collection(physical_name)
+        
+        self.schema.create(self.client, self.collection_name)
 
     def _create_points(
         self, 
-        entity_id: str, 
-        sections: list[EnhancedContentSection]
+        sections: list[tuple[str, EnhancedContentSection]]
     ) -> list[qdrant_models.PointStruct]:
-        """Create points for Qdrant from enhanced content sections"""
-        embeddings = self.embedder.embed([section.summary for section in sections])
+        """Create points for Qdrant from enhanced content sections, given with their entity"""
+        vectors = self.create_vectors([section for _, section in sections])
+        indexed_at = time.time()
         
         return [
             qdrant_models.PointStruct(
-                id=str(uuid.uuid4()),
-                vector=embedding.tolist(),
+                # Deterministic ids so that re-ingesting an entity replaces its sections
+                id=str(uuid.uuid5(uuid.NAMESPACE_URL, f"{entity_id}/{section.title}")),
+                vector=vector,
                 payload={
                     "entity_id": entity_id,
                     "title": section.title,
-                    "summary": section.summary,
-                    "notes": section.notes,
-                    "analysis": section.analysis,
-                    "actionable_gap_analysis": section.actionable_gap_analysis
+                    "content_hash": section.content_hash(),
+                    # Lets the reindex command find sections written while it runs
+                    "indexed_at": indexed_at,
+                    # With a text store, the text is only read for the sections selected into an answer
+                    **({} if self.text_store else section.model_dump(include=set(TEXT_FIELDS)))
                 }
             )
-            for section, embedding in zip(sections, embeddings)
+            for (entity_id, section), vector in zip(sections, vectors)
+        ]
+
+    def _store_text(self, sections: list[tuple[str, EnhancedContentSection]]):
+        """Write the section text before the points referring to it"""
+        if self.text_store:
+            self.text_store.put(sections)
+
+    def _remove_stale_text(self, entity_id: str, titles: list[str]):
+        if self.text_store:
+            self.text_store.remove_stale(entity_id, titles)
+
+    def create_vectors(self, sections: list[EnhancedContentSection]) -> list[list[float] | dict]:
+        """Dense vector of each section, with its sparse vector when hybrid search is enabled"""
+        embeddings = [embedding.tolist() for embedding in self.embedder.embed([section.summary for section in sections])]
+        if not self.sparse_embedder:
+            return embeddings
+        sparse_vectors = self.sparse_embedder.embed([self._sparse_text(section) for section in sections])
+        return [
+            {"": embedding, SPARSE_VECTOR_NAME: sparse}
+            for embedding, sparse in zip(embeddings, sparse_vectors)
         ]
 
+    def _sparse_text(self, section: EnhancedContentSection) -> str:
+        """Text of the sparse vector, the whole section rather than the summary alone"""
+        parts = [section.title, section.summary, section.notes]
+        if self.include_taxonomy_terms:
+            parts.extend(
+                term
+                for category, titles in category_sections.items() if section.title in titles
+                for term in taxonomy[category]
+            )
+        return "\n".join(parts)
+
     def _create_basic_info_section(self, basic_info: dict[str, str]) -> EnhancedContentSection:
         """Create a specialized section for basic info
         
@@ -97,19 +168,216 @@ class DatabasePopulator(DatabasePopulatorProtocol):
             actionable_gap_analysis="Review and verify basic information completeness"
         )
 
+    def _entity_sections(self, content: EnhancedContent) -> list[EnhancedContentSection]:
+        """Sections of an entity, preceded by its basic info section"""
+        return [self._create_basic_info_section(content.basic_info)] + content.sections
+
     def populate(self, entity_id: str, content: EnhancedContent):
         """Populate database with enhanced content"""
-        # Create basic info section
-        basic_info_section = self._create_basic_info_section(content.basic_info)
-        
-        # Combine with other sections
-        all_sections = [basic_info_section] + content.sections
+        sections = [(entity_id, section) for section in self._entity_sections(content)]
         
         # Create points from all sections
-        points = self._create_points(entity_id, all_sections)
+        points = self._create_points(sections)
         
         # Upsert points into collection
+        self._store_text(sections)
+        self._upsert(entity_id, points)
+        self._remove_stale(entity_id, [point.id for point in points])
+        self._remove_stale_text(entity_id, [section.title for _, section in sections])
+
+    def populate_many(
+        self,
+        contents: Iterable[tuple[str, EnhancedContent]],
+        batch_size: Optional[int] = None,
+        parallel: Optional[int] = None
+    ) -> PopulationStats:
+        """Populate database with the enhanced content of many entities
+        
+        Sections are accumulated across entities and embedded batch_size at a
+        time. The points are streamed to the bulk upload without waiting for
+        each write, and a final barrier waits until every write is applied.
+        The contents are consumed lazily, so they can be produced while
+        earlier batches upload.
+        
+        Args:
+            contents: Pairs of entity ID and enhanced content
+            batch_size: Sections per embedding batch and upload request, qdrant.upload_batch_size by default
+            parallel: Concurrent upload workers, qdrant.upload_parallel by default
+            
+        Returns:
+            Number of entities and points written and the throughput
+        """
+        batch_size = batch_size or self.upload_batch_size
+        started = time.monotonic()
+        stats = PopulationStats()
+        # Point id and title of every section written, by entity
+        written: dict[str, list[tuple[str, str]]] = {}
+        
+        def sections() -> Iterator[tuple[str, EnhancedContentSection]]:
+            for entity_id, content in contents:
+                stats.entities += 1
+                written[entity_id] = []
+                for section in self._entity_sections(content):
+                    yield entity_id, section
+        
+        def points() -> Iterator[qdrant_models.PointStruct]:
+            pending = sections()
+            while batch := list(islice(pending, batch_size)):
+                self._store_text(batch)
+                for (entity_id, section), point in zip(batch, self._create_points(batch)):
+                    written[entity_id].append((point.id, section.title))
+                    stats.points += 1
+                    yield point
+        
+        self._upload(points(), batch_size, parallel or self.upload_parallel)
+        for entity_id, sections_written in written.items():
+            self._remove_stale(entity_id, [point_id for point_id, _ in sections_written], wait=False)
+        self._wait_applied(list(written), stats.points)
+        for entity_id, sections_written in written.items():
+            self._remove_stale_text(entity_id, [title for _, title in sections_written])
+        
+        stats.seconds = time.monotonic() - started
+        print(f"Populated {stats.to_string()}")
+        return stats
+
+    def _upload(self, points: Iterator[qdrant_models.PointStruct], batch_size: int, parallel: int):
+        """Stream points into the collection without waiting for them to be applied"""
+        if self.collection_config.tenancy != "shard_key":
+            self.client.upload_points(
+                collection_name=self.collection_name,
+                points=points,
+                batch_size=batch_size,
+                parallel=parallel,
+                wait=False
+            )
+            return
+        # A bulk upload targets a single shard key, group each batch by shard instead
+        while batch := list(islice(points, batch_size)):
+            by_shard: dict[str, list[qdrant_models.PointStruct]] = {}
+            for point in batch:
+                entity_id = point.payload["entity_id"]
+                self.schema.prepare_entity(self.client, self.collection_name, entity_id)
+                by_shard.setdefault(self.schema.shard_key(entity_id), []).append(point)
+            for shard_key, shard_points in by_shard.items():
+                self.client.upsert(
+                    collection_name=self.collection_name,
+                    points=shard_points,
+                    shard_key_selector=shard_key,
+                    wait=False
+                )
+
+    def _wait_applied(self, entity_ids: list[str], expected_points: int):
+        """Wait until every write sent so far is applied and check the points are all there
+        
+        Each shard applies its updates in order, so one waited operation on every
+        shard returns once all the earlier ones are applied.
+        """
+        shard_keys = list({self.schema.shard_key(entity_id) for entity_id in entity_ids} - {None})
+        self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=qdrant_models.PointIdsList(points=[]),
+            shard_key_selector=shard_keys or None,
+            wait=True
+        )
+        if not entity_ids:
+            return
+        count = self.client.count(
+            collection_name=self.collection_name,
+            count_filter=qdrant_models.Filter(must=[
+                qdrant_models.FieldCondition(key="entity_id", match=qdrant_models.MatchAny(any=entity_ids))
+            ]),
+            exact=True
+        ).count
+        if count != expected_points:
+            print(f"Expected {expected_points} points for {len(entity_ids)} entities, found {count}")
+
+    def _upsert(self, entity_id: str, points: list[qdrant_models.PointStruct]):
+        """Write the points of an entity into the collection"""
+        self.schema.prepare_entity(self.client, self.collection_name, entity_id)
         self.client.upsert(
             collection_name=self.collection_name,
-            points=points
+            points=points,
+            shard_key_selector=self.schema.shard_key(entity_id)
+        )
+
+    def _remove_stale(self, entity_id: str, point_ids: list[str], wait: bool = True):
+        """Remove sections of the entity that were not written by the latest population"""
+        self.client.delete(
+            collection_name=self.collection_name,
+            shard_key_selector=self.schema.shard_key(entity_id),
+            wait=wait,
+            points_selector=qdrant_models.FilterSelector(
+                filter=qdrant_models.Filter(
+                    must=[qdrant_models.FieldCondition(key="entity_id", match=qdrant_models.MatchValue(value=entity_id))],
+                    must_not=[qdrant_models.HasIdCondition(has_id=point_ids)]
+                )
+            )
+        )
+
+
+class LocalDatabasePopulator(DatabasePopulator):
+    """Populates the embedded local vector store with enhanced content"""
+    
+    def __init__(
+        self,
+        qdrant_config: QdrantConfig,
+        embedding_config: EmbeddingConfig,
+        model_registry: Optional[ModelRegistry] = None,
+        text_store: Optional[SectionTextStoreProtocol] = None
+    ):
+        """Initialize database populator with configurations
+        
+        Args:
+            qdrant_config: Configuration holding the local store path and collection
+            embedding_config: Configuration for embedding model
+            model_registry: Registry loading the embedding model, shared with other components
+            text_store: Store of the section text, None to keep the text in the payloads
+        """
+        self.store = LocalVectorStore(qdrant_config.local_path)
+        self.collection_name = qdrant_config.collection.name
+        self.collection_config = qdrant_config.collection
+        self.upload_batch_size = qdrant_config.upload_batch_size
+        self.upload_parallel = qdrant_config.upload_parallel
+        self.embedding_config = embedding_config
+        self.embedder = Embedder(self.embedding_config, model_registry)
+        # The local store only does exact dense search
+        self.sparse_embedder = None
+        self.include_taxonomy_terms = False
+        self.text_store = text_store
+        
+        self._init_collection()
+
+    def _init_collection(self):
+        """Initialize the local collection, payload indexes are implicit"""
+        self.store.create_collection(
+            self.collection_name,
+            vector_size=self.embedding_config.stored_vector_size,
+            recreate=self.collection_config.recreate_collection
         )
+
+    def _upsert(self, entity_id: str, points: list[qdrant_models.PointStruct]):
+        self.store.upsert(self.collection_name, points)
+
+    def _remove_stale(self, entity_id: str, point_ids: list[str], wait: bool = True):
+        self.store.delete_entity_points(self.collection_name, entity_id, keep_ids=point_ids)
+
+    def _upload(self, points: Iterator[qdrant_models.PointStruct], batch_size: int, parallel: int):
+        while batch := list(islice(points, batch_size)):
+            self.store.upsert(self.collection_name, batch)
+
+    def _wait_applied(self, entity_ids: list[str], expected_points: int):
+        # Local writes are applied synchronously
+        pass
+
+
+def create_database_populator(
+    qdrant_config: QdrantConfig,
+    embedding_config: EmbeddingConfig,
+    model_registry: Optional[ModelRegistry] = None,
+    include_taxonomy_terms: bool = False,
+    text_store: Optional[SectionTextStoreProtocol] = None
+) -> DatabasePopulator:
+    """Create the populator matching the configured vector backend"""
+    if qdrant_config.backend == "local":
+        return LocalDatabasePopulator(qdrant_config, embedding_config, model_registry, text_store)
+    return DatabasePopulator(qdrant_config, embedding_config, model_registry, include_taxonomy_terms, text_store)
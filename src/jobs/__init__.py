@@ -0,0 +1,7 @@
+from src.jobs.job_queue import JobKind, JobQueue, JobStatus, JobStore, QueuedJob, create_job_queue
+from src.jobs.worker import Worker, create_runner, preload_models, run_workers
+
+__all__ = [
+    "JobKind", "JobQueue", "JobStatus", "JobStore", "QueuedJob", "create_job_queue",
+    "Worker", "create_runner", "preload_models", "run_workers"
+]
@@ -0,0 +1,257 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator, Literal, Optional, Protocol, Sequence
+
+from pydantic import BaseModel, Field
+
+from src.utils.configs import QueueConfig
+
+JobKind = Literal["ingest", "answer"]
+JobStatus = Literal["queued", "running", "succeeded", "failed"]
+
+
+class QueuedJob(BaseModel):
+    """A job claimed from the queue"""
+    id: str
+    kind: JobKind
+    entity_id: str
+    payload: dict[str, Any] = Field(default_factory=dict)
+    priority: int = 0
+    attempts: int = 0
+    max_attempts: int
+    status: JobStatus
+    lease_token: Optional[str] = Field(default=None, description="Token proving ownership of the current lease")
+    last_error: Optional[str] = None
+
+
+class JobStore(Protocol):
+    """Shared store through which workers coordinate with leases
+
+    Implementations must make claim, heartbeat, ack and fail atomic, recover jobs
+    whose lease expired (stolen-lease recovery) and reject acknowledgements that
+    carry a stale lease token.
+    """
+    config: QueueConfig
+
+    def enqueue(
+        self,
+        kind: JobKind,
+        entity_id: str,
+        payload: Optional[dict[str, Any]] = None,
+        priority: int = 0
+    ) -> str:
+        """Add a job, returning the id of the already pending job for the entity if any"""
+        ...
+
+    def claim(self, worker_id: str, kinds: Sequence[JobKind], lease_seconds: Optional[float] = None) -> Optional[QueuedJob]:
+        """Claim the highest priority available job of the given kinds"""
+        ...
+
+    def heartbeat(self, job: QueuedJob, lease_seconds: Optional[float] = None) -> bool:
+        """Extend the lease of a running job, False if the lease was lost"""
+        ...
+
+    def ack(self, job: QueuedJob, result: Optional[Any] = None) -> bool:
+        """Mark a job as done, False if the lease was lost in the meantime"""
+        ...
+
+    def fail(self, job: QueuedJob, error: str) -> bool:
+        """Record a failed attempt, rescheduling the job with backoff while attempts remain"""
+        ...
+
+    def get(self, job_id: str) -> Optional[QueuedJob]:
+        ...
+
+    def counts(self) -> dict[str, int]:
+        """Number of jobs per status"""
+        ...
+
+
+class JobQueue(JobStore):
+    """Durable SQLite-backed job queue, shared by the workers of a single node
+
+    Jobs are claimed under a lease that the worker must renew with heartbeats.
+    A job whose lease expires (the worker died or hung) becomes claimable again,
+    and acknowledgements carrying a stale lease token are rejected. Failed jobs
+    are retried with exponential backoff until max_attempts. At most one queued
+    or running job exists per (kind, entity_id), so enqueueing an entity that is
+    already pending returns the existing job instead of a duplicate.
+    """
+
+    def __init__(self, config: QueueConfig):
+        self.config = config
+        Path(config.path).parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                entity_id TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                priority INTEGER NOT NULL DEFAULT 0,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL,
+                available_at REAL NOT NULL,
+                lease_owner TEXT,
+                lease_token TEXT,
+                lease_expires_at REAL,
+                last_error TEXT,
+                result TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE UNIQUE INDEX IF NOT EXISTS jobs_active_entity
+                ON jobs (kind, entity_id) WHERE status IN ('queued', 'running');
+            CREATE INDEX IF NOT EXISTS jobs_claimable
+                ON jobs (status, kind, priority DESC, available_at);
+        """)
+
+    @property
+    def _db(self) -> sqlite3.Connection:
+        # One connection per thread, never reuse a connection inherited through fork
+        if getattr(self._local, "pid", None) != os.getpid():
+            db = sqlite3.connect(self.config.path, timeout=30, isolation_level=None)
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA journal_mode=WAL")
+            self._local.db = db
+            self._local.pid = os.getpid()
+        return self._local.db
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        db = self._db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _to_job(row: sqlite3.Row) -> QueuedJob:
+        return QueuedJob(**{**dict(row), "payload": json.loads(row["payload"])})
+
+    def enqueue(
+        self,
+        kind: JobKind,
+        entity_id: str,
+        payload: Optional[dict[str, Any]] = None,
+        priority: int = 0
+    ) -> str:
+        """Add a job, returning the id of the already pending job for the entity if any"""
+        now = time.time()
+        with self._transaction() as db:
+            existing = db.execute(
+                "SELECT id FROM jobs WHERE kind = ? AND entity_id = ? AND status IN ('queued', 'running')",
+                (kind, entity_id)
+            ).fetchone()
+            if existing:
+                # Keep the higher priority of the two requests
+                db.execute("UPDATE jobs SET priority = MAX(priority, ?) WHERE id = ?", (priority, existing["id"]))
+                return existing["id"]
+
+            job_id = uuid.uuid4().hex
+            db.execute(
+                "INSERT INTO jobs (id, kind, entity_id, payload, priority, status, max_attempts, available_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, 'queued', ?, ?, ?, ?)",
+                (job_id, kind, entity_id, json.dumps(payload or {}), priority, self.config.max_attempts, now, now, now)
+            )
+            return job_id
+
+    def _expire_leases(self, db: sqlite3.Connection, now: float):
+        """Return jobs with expired leases to the queue, or fail them when out of attempts"""
+        db.execute(
+            "UPDATE jobs SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'queued' END, "
+            "last_error = 'Lease expired', lease_owner = NULL, lease_token = NULL, lease_expires_at = NULL, "
+            "available_at = ?, updated_at = ? "
+            "WHERE status = 'running' AND lease_expires_at < ?",
+            (now, now, now)
+        )
+
+    def claim(self, worker_id: str, kinds: Sequence[JobKind], lease_seconds: Optional[float] = None) -> Optional[QueuedJob]:
+        """Claim the highest priority available job of the given kinds"""
+        now = time.time()
+        lease_seconds = lease_seconds or self.config.lease_seconds
+        with self._transaction() as db:
+            self._expire_leases(db, now)
+            row = db.execute(
+                f"SELECT id FROM jobs WHERE status = 'queued' AND available_at <= ? "
+                f"AND kind IN ({', '.join('?' * len(kinds))}) "
+                f"ORDER BY priority DESC, created_at LIMIT 1",
+                (now, *kinds)
+            ).fetchone()
+            if row is None:
+                return None
+
+            token = uuid.uuid4().hex
+            db.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, lease_owner = ?, lease_token = ?, "
+                "lease_expires_at = ?, updated_at = ? WHERE id = ?",
+                (worker_id, token, now + lease_seconds, now, row["id"])
+            )
+            return self._to_job(db.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone())
+
+    def heartbeat(self, job: QueuedJob, lease_seconds: Optional[float] = None) -> bool:
+        """Extend the lease of a running job, False if the lease was lost"""
+        now = time.time()
+        with self._transaction() as db:
+            cursor = db.execute(
+                "UPDATE jobs SET lease_expires_at = ?, updated_at = ? "
+                "WHERE id = ? AND lease_token = ? AND status = 'running'",
+                (now + (lease_seconds or self.config.lease_seconds), now, job.id, job.lease_token)
+            )
+            return cursor.rowcount == 1
+
+    def ack(self, job: QueuedJob, result: Optional[Any] = None) -> bool:
+        """Mark a job as done, False if the lease was lost in the meantime"""
+        now = time.time()
+        with self._transaction() as db:
+            cursor = db.execute(
+                "UPDATE jobs SET status = 'succeeded', result = ?, lease_owner = NULL, lease_token = NULL, "
+                "lease_expires_at = NULL, updated_at = ? WHERE id = ? AND lease_token = ? AND status = 'running'",
+                (json.dumps(result) if result is not None else None, now, job.id, job.lease_token)
+            )
+            return cursor.rowcount == 1
+
+    def fail(self, job: QueuedJob, error: str) -> bool:
+        """Record a failed attempt, rescheduling the job with backoff while attempts remain"""
+        now = time.time()
+        delay = retry_delay(self.config, job.attempts)
+        with self._transaction() as db:
+            cursor = db.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'queued' END, "
+                "last_error = ?, available_at = ?, lease_owner = NULL, lease_token = NULL, lease_expires_at = NULL, "
+                "updated_at = ? WHERE id = ? AND lease_token = ? AND status = 'running'",
+                (error, now + delay, now, job.id, job.lease_token)
+            )
+            return cursor.rowcount == 1
+
+    def get(self, job_id: str) -> Optional[QueuedJob]:
+        row = self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_job(row) if row else None
+
+    def counts(self) -> dict[str, int]:
+        """Number of jobs per status"""
+        rows = self._db.execute("SELECT status, COUNT(*) AS count FROM jobs GROUP BY status").fetchall()
+        return {row["status"]: row["count"] for row in rows}
+
+
+def retry_delay(config: QueueConfig, attempts: int) -> float:
+    """Backoff before the next attempt of a job that failed attempts times"""
+    return min(config.backoff_base_seconds * 2 ** max(attempts - 1, 0), config.backoff_max_seconds)
+
+
+def create_job_queue(config: QueueConfig) -> JobStore:
+    """Create the job store for the configured backend"""
+    if config.backend == "redis":
+        from src.jobs.redis_queue import RedisJobQueue
+        return RedisJobQueue(config)
+    return JobQueue(config)
@@ -0,0 +1,207 @@
+import json
+import uuid
+from typing import Any, Optional, Sequence
+
+from src.utils.configs import QueueConfig
+from src.utils.concurrency import redis_client
+from src.jobs.job_queue import JobKind, JobStore, QueuedJob, retry_delay
+
+# Shared by every script: the Redis clock is the single time source, so lease
+# expiry does not depend on the clocks of the worker nodes.
+_PRELUDE = """
+local p = ARGV[1]
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+
+local function job_key(id) return p .. ':job:' .. id end
+
+local function set_status(id, status)
+    local old = redis.call('HGET', job_key(id), 'status')
+    if old then redis.call('HINCRBY', p .. ':counts', old, -1) end
+    redis.call('HINCRBY', p .. ':counts', status, 1)
+    redis.call('HSET', job_key(id), 'status', status, 'updated_at', now)
+end
+
+local function release(id)
+    redis.call('ZREM', p .. ':leases', id)
+    redis.call('HSET', job_key(id), 'lease_owner', '', 'lease_token', '', 'lease_expires_at', '')
+end
+
+local function finish(id, status)
+    local job = job_key(id)
+    set_status(id, status)
+    release(id)
+    if status == 'failed' or status == 'succeeded' then
+        local kind, entity = unpack(redis.call('HMGET', job, 'kind', 'entity_id'))
+        redis.call('DEL', p .. ':active:' .. kind .. ':' .. entity)
+    end
+end
+
+local function retry(id, available_at, error)
+    local job = job_key(id)
+    local attempts, max_attempts = unpack(redis.call('HMGET', job, 'attempts', 'max_attempts'))
+    redis.call('HSET', job, 'last_error', error)
+    if tonumber(attempts) >= tonumber(max_attempts) then
+        finish(id, 'failed')
+    else
+        finish(id, 'queued')
+        redis.call('HSET', job, 'available_at', available_at)
+        redis.call('ZADD', p .. ':delayed:' .. redis.call('HGET', job, 'kind'), available_at, id)
+    end
+end
+
+local function owns(id, token)
+    local status, lease_token = unpack(redis.call('HMGET', job_key(id), 'status', 'lease_token'))
+    return status == 'running' and lease_token == token
+end
+"""
+
+_ENQUEUE = _PRELUDE + """
+local kind, entity, id, payload = ARGV[2], ARGV[3], ARGV[4], ARGV[5]
+local priority, max_attempts = tonumber(ARGV[6]), ARGV[7]
+local active = p .. ':active:' .. kind .. ':' .. entity
+local existing = redis.call('GET', active)
+if existing then
+    -- Keep the higher priority of the two requests
+    local current = tonumber(redis.call('HGET', job_key(existing), 'priority'))
+    if priority > current then
+        redis.call('HSET', job_key(existing), 'priority', priority)
+        if redis.call('ZSCORE', p .. ':ready:' .. kind, existing) then
+            local created_at = tonumber(redis.call('HGET', job_key(existing), 'created_at'))
+            redis.call('ZADD', p .. ':ready:' .. kind, -priority * 1e10 + created_at, existing)
+        end
+    end
+    return existing
+end
+redis.call('SET', active, id)
+redis.call('HSET', job_key(id),
+    'id', id, 'kind', kind, 'entity_id', entity, 'payload', payload, 'priority', priority,
+    'attempts', 0, 'max_attempts', max_attempts, 'available_at', now, 'created_at', now,
+    'lease_owner', '', 'lease_token', '', 'lease_expires_at', '', 'last_error', '', 'result', '')
+set_status(id, 'queued')
+redis.call('ZADD', p .. ':delayed:' .. kind, now, id)
+return id
+"""
+
+_CLAIM = _PRELUDE + """
+local worker, token, lease_seconds = ARGV[2], ARGV[3], tonumber(ARGV[4])
+
+-- Recover jobs whose worker stopped heartbeating
+for _, id in ipairs(redis.call('ZRANGEBYSCORE', p .. ':leases', '-inf', now)) do
+    retry(id, now, 'Lease expired')
+end
+
+local best, best_kind, best_score = nil, nil, nil
+for i = 5, #ARGV do
+    local kind = ARGV[i]
+    local ready = p .. ':ready:' .. kind
+    -- Promote jobs whose backoff elapsed, ordered by priority then age
+    for _, id in ipairs(redis.call('ZRANGEBYSCORE', p .. ':delayed:' .. kind, '-inf', now)) do
+        redis.call('ZREM', p .. ':delayed:' .. kind, id)
+        local priority, created_at = unpack(redis.call('HMGET', job_key(id), 'priority', 'created_at'))
+        redis.call('ZADD', ready, -tonumber(priority) * 1e10 + tonumber(created_at), id)
+    end
+    local head = redis.call('ZRANGE', ready, 0, 0, 'WITHSCORES')
+    if head[1] and (best_score == nil or tonumber(head[2]) < best_score) then
+        best, best_kind, best_score = head[1], kind, tonumber(head[2])
+    end
+end
+if not best then return nil end
+
+redis.call('ZREM', p .. ':ready:' .. best_kind, best)
+set_status(best, 'running')
+redis.call('HINCRBY', job_key(best), 'attempts', 1)
+redis.call('HSET', job_key(best), 'lease_owner', worker, 'lease_token', token, 'lease_expires_at', now + lease_seconds)
+redis.call('ZADD', p .. ':leases', now + lease_seconds, best)
+return best
+"""
+
+_HEARTBEAT = _PRELUDE + """
+local id, token, lease_seconds = ARGV[2], ARGV[3], tonumber(ARGV[4])
+if not owns(id, token) then return 0 end
+redis.call('HSET', job_key(id), 'lease_expires_at', now + lease_seconds, 'updated_at', now)
+redis.call('ZADD', p .. ':leases', now + lease_seconds, id)
+return 1
+"""
+
+_ACK = _PRELUDE + """
+local id, token, result = ARGV[2], ARGV[3], ARGV[4]
+if not owns(id, token) then return 0 end
+redis.call('HSET', job_key(id), 'result', result)
+finish(id, 'succeeded')
+return 1
+"""
+
+_FAIL = _PRELUDE + """
+local id, token, error, delay = ARGV[2], ARGV[3], ARGV[4], tonumber(ARGV[5])
+if not owns(id, token) then return 0 end
+retry(id, now + delay, error)
+return 1
+"""
+
+
+class RedisJobQueue(JobStore):
+    """Job queue shared by workers on several nodes through Redis
+
+    Same semantics as the SQLite JobQueue: leases renewed by heartbeats, expired
+    leases returned to the queue on the next claim, stale lease tokens rejected,
+    exponential backoff and one pending job per (kind, entity_id). Every transition
+    runs as a Lua script, so it is atomic on the server. Job keys are derived inside
+    the scripts, which requires a single Redis instance rather than a cluster.
+    """
+
+    def __init__(self, config: QueueConfig, client=None):
+        self.config = config
+        self.client = client or redis_client(config)
+        self._prefix = config.redis_prefix
+        self._enqueue = self.client.register_script(_ENQUEUE)
+        self._claim = self.client.register_script(_CLAIM)
+        self._heartbeat = self.client.register_script(_HEARTBEAT)
+        self._ack = self.client.register_script(_ACK)
+        self._fail = self.client.register_script(_FAIL)
+
+    def enqueue(
+        self,
+        kind: JobKind,
+        entity_id: str,
+        payload: Optional[dict[str, Any]] = None,
+        priority: int = 0
+    ) -> str:
+        return self._enqueue(args=[
+            self._prefix, kind, entity_id, uuid.uuid4().hex,
+            json.dumps(payload or {}), priority, self.config.max_attempts
+        ])
+
+    def claim(self, worker_id: str, kinds: Sequence[JobKind], lease_seconds: Optional[float] = None) -> Optional[QueuedJob]:
+        job_id = self._claim(args=[
+            self._prefix, worker_id, uuid.uuid4().hex,
+            lease_seconds or self.config.lease_seconds, *kinds
+        ])
+        return self.get(job_id) if job_id else None
+
+    def heartbeat(self, job: QueuedJob, lease_seconds: Optional[float] = None) -> bool:
+        return bool(self._heartbeat(args=[
+            self._prefix, job.id, job.lease_token, lease_seconds or self.config.lease_seconds
+        ]))
+
+    def ack(self, job: QueuedJob, result: Optional[Any] = None) -> bool:
+        return bool(self._ack(args=[
+            self._prefix, job.id, job.lease_token, json.dumps(result) if result is not None else ""
+        ]))
+
+    def fail(self, job: QueuedJob, error: str) -> bool:
+        return bool(self._fail(args=[
+            self._prefix, job.id, job.lease_token, error, retry_delay(self.config, job.attempts)
+        ]))
+
+    def get(self, job_id: str) -> Optional[QueuedJob]:
+        fields = self.client.hgetall(f"{self._prefix}:job:{job_id}")
+        if not fields:
+            return None
+        # Redis stores missing values as empty strings
+        fields = {key: value for key, value in fields.items() if value != ""}
+        return QueuedJob(**{**fields, "payload": json.loads(fields["payload"])})
+
+    def counts(self) -> dict[str, int]:
+        counts = self.client.hgetall(f"{self._prefix}:counts")
+        return {status: int(count) for status, count in counts.items() if int(count)}
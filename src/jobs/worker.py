@@ -0,0 +1,156 @@
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+from typing import Any, Callable, Optional
+
+from src.utils.configs import AppConfig
+from src.utils.model_registry import ModelRegistry
+from src.jobs.job_queue import JobKind, JobStore, QueuedJob, create_job_queue
+
+logger = logging.getLogger(__name__)
+
+JobRunner = Callable[[QueuedJob], Any]
+
+
+def create_runner(config: AppConfig, kind: JobKind, model_registry: Optional[ModelRegistry] = None) -> JobRunner:
+    """Build the container for a job kind once and return a function running one job"""
+    if kind == "ingest":
+        from src.ingestion.container import Container as IngestionContainer
+        container = IngestionContainer(config, model_registry=model_registry)
+
+        def run_ingest(job: QueuedJob) -> None:
+            form_id = job.payload.get("form_id", config.firebase.default_form_id)
+            container.create_pipeline(form_id).process_entity(job.entity_id)
+
+        return run_ingest
+
+    from src.grant_answering.container import Container as GrantAnsweringContainer
+    pipeline = GrantAnsweringContainer(config, model_registry=model_registry).create_grant_answering()
+    grant = config.grant_value
+
+    def run_answer(job: QueuedJob) -> dict[str, Any]:
+        # Retries pick up the answers journaled by the failed attempt
+        resume = job.payload.get("resume", False) or job.attempts > 1
+        return pipeline.process_grant_application(job.entity_id, grant, resume=resume).model_dump()
+
+    return run_answer
+
+
+class Worker:
+    """Claims jobs of one kind from the queue and runs them with a warm runner"""
+
+    def __init__(self, queue: JobStore, kind: JobKind, runner: JobRunner, worker_id: str):
+        self.queue = queue
+        self.kind = kind
+        self.runner = runner
+        self.worker_id = worker_id
+        self.stop_event = threading.Event()
+
+    def _heartbeat(self, job: QueuedJob, done: threading.Event):
+        while not done.wait(self.queue.config.heartbeat_seconds):
+            if not self.queue.heartbeat(job):
+                logger.warning(f"Lost the lease of job {job.id}, its result will be discarded")
+                return
+
+    def run_once(self) -> bool:
+        """Claim and run a single job, False when no job was available"""
+        job = self.queue.claim(self.worker_id, [self.kind])
+        if job is None:
+            return False
+
+        logger.info(f"{self.worker_id} running {job.kind} job {job.id} for {job.entity_id} (attempt {job.attempts})")
+        done = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job, done), daemon=True)
+        heartbeat.start()
+        try:
+            result = self.runner(job)
+        except Exception as e:
+            logger.exception(f"Job {job.id} failed")
+            self.queue.fail(job, str(e))
+        else:
+            if not self.queue.ack(job, result):
+                logger.warning(f"Job {job.id} finished after its lease was taken over")
+        finally:
+            done.set()
+            heartbeat.join()
+        return True
+
+    def run(self):
+        """Run jobs until stopped, finishing the current job first"""
+        while not self.stop_event.is_set():
+            if not self.run_once():
+                self.stop_event.wait(self.queue.config.poll_interval_seconds)
+
+
+def preload_models(config: AppConfig, kind: JobKind) -> ModelRegistry:
+    """Load the models a job kind needs and freeze the heap, ahead of forking workers"""
+    from src.utils.embedding import Embedder
+    registry = ModelRegistry(config.models)
+    if kind == "ingest":
+        from src.ingestion.extract import AudioExtractor, DocumentExtractor
+        # Constructing the components only registers their model loaders
+        AudioExtractor(registry, config=config.audio)
+        DocumentExtractor(registry, artifacts_path=config.models.docling_artifacts_path)
+        Embedder(config.embedding, registry)
+    else:
+        Embedder(config.search.embedding_config, registry)
+    registry.prepare_fork()
+    for stats in registry.stats():
+        logger.info(f"Preloaded {stats.name} ({stats.rss_mb or 0:.0f} MB)")
+    return registry
+
+
+def _worker_process(config: AppConfig, kind: JobKind, index: int, model_registry: Optional[ModelRegistry]):
+    logging.basicConfig(level=logging.INFO)
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{kind}-{index}"
+    runner = create_runner(config, kind, model_registry)
+    worker = Worker(create_job_queue(config.queue), kind, runner, worker_id)
+
+    def stop(signum, frame):
+        logger.info(f"{worker_id} stopping after the current job")
+        worker.stop_event.set()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    worker.run()
+
+
+def run_workers(config: AppConfig, kind: JobKind, processes: int = 1):
+    """Run worker processes for a job kind until interrupted
+
+    Each process builds its own container once and keeps it warm across jobs.
+    With models.preload_before_fork the models are loaded once in this process and
+    the workers are forked from it, sharing the weights copy-on-write instead of
+    each loading a private copy. SIGINT/SIGTERM let every worker finish its current
+    job before exiting.
+    """
+    logging.basicConfig(level=logging.INFO)
+    model_registry = None
+    context = multiprocessing.get_context()
+    if config.models.preload_before_fork and "fork" in multiprocessing.get_all_start_methods():
+        model_registry = preload_models(config, kind)
+        # The registry is inherited by the forked workers rather than pickled
+        context = multiprocessing.get_context("fork")
+    workers = [
+        context.Process(
+            target=_worker_process,
+            args=(config, kind, index, model_registry),
+            name=f"{kind}-worker-{index}"
+        )
+        for index in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+
+    def forward(signum, frame):
+        for worker in workers:
+            if worker.is_alive():
+                os.kill(worker.pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+    for worker in workers:
+        worker.join()
@@ -0,0 +1,3 @@
+from src.reindex.migration import reindex
+
+__all__ = ["reindex"]
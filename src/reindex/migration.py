@@ -0,0 +1,261 @@
+import logging
+import time
+from collections import defaultdict
+from typing import Iterator, Optional
+
+import grpc
+from qdrant_client import QdrantClient
+from qdrant_client.http import models as qdrant_models
+from qdrant_client.http.exceptions import UnexpectedResponse
+
+from src.ingestion.population import DatabasePopulator
+from src.utils.configs import AppConfig
+from src.utils.model_registry import ModelRegistry
+from src.utils.models import EnhancedContentSection
+from src.utils.qdrant_clients import qdrant_client
+from src.utils.qdrant_schema import resolve_alias
+from src.utils.section_text_store import create_section_text_store, hydrate
+
+logger = logging.getLogger(__name__)
+
+# Catch-up passes over sections written during the copy before giving up
+_MAX_CATCH_UP_PASSES = 5
+# Margin for clock differences between the reindexing host and the ingestion workers
+_CLOCK_SKEW_SECONDS = 60
+
+
+def _entity_condition(entity_id: str) -> qdrant_models.FieldCondition:
+    return qdrant_models.FieldCondition(key="entity_id", match=qdrant_models.MatchValue(value=entity_id))
+
+
+def _scroll(
+    client: QdrantClient,
+    collection: str,
+    scroll_filter: Optional[qdrant_models.Filter] = None,
+    batch_size: int = 256
+) -> Iterator[list[qdrant_models.Record]]:
+    """Payloads of every point matching the filter, in batches"""
+    offset = None
+    while True:
+        records, offset = client.scroll(
+            collection_name=collection,
+            scroll_filter=scroll_filter,
+            limit=batch_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=False
+        )
+        if records:
+            yield records
+        if offset is None:
+            return
+
+
+def _entity_records(client: QdrantClient, collection: str, entity_id: str) -> list[qdrant_models.Record]:
+    scroll_filter = qdrant_models.Filter(must=[_entity_condition(entity_id)])
+    return [record for batch in _scroll(client, collection, scroll_filter) for record in batch]
+
+
+def _latest_write(records: list[qdrant_models.Record]) -> float:
+    return max((record.payload.get("indexed_at", 0.0) for record in records), default=0.0)
+
+
+def _snapshot(records: list[qdrant_models.Record]) -> set[tuple[str, float]]:
+    return {(str(record.id), record.payload.get("indexed_at", 0.0)) for record in records}
+
+
+def _copy(populator: DatabasePopulator, target: str, records: list[qdrant_models.Record]):
+    """Re-embed stored sections and write them with their ids and payloads unchanged
+
+    The text of slim payloads is read from the section text store. Sections whose
+    text is missing cannot be re-embedded and are left out, which keeps the point
+    counts apart and the alias unswitched.
+    """
+    payloads = hydrate(populator.text_store, [record.payload for record in records])
+    copied = []
+    for record, payload in zip(records, payloads):
+        if "summary" in payload:
+            copied.append((record, payload))
+        else:
+            logger.error(f"Text of section {record.id} is missing from the text store, it is not copied")
+    if not copied:
+        return
+    sections = [
+        EnhancedContentSection(**{field: payload[field] for field in EnhancedContentSection.model_fields})
+        for _, payload in copied
+    ]
+    points_by_shard = defaultdict(list)
+    for (record, _), vector in zip(copied, populator.create_vectors(sections)):
+        entity_id = record.payload["entity_id"]
+        populator.schema.prepare_entity(populator.client, target, entity_id)
+        points_by_shard[populator.schema.shard_key(entity_id)].append(
+            qdrant_models.PointStruct(id=record.id, vector=vector, payload=record.payload)
+        )
+    for shard_key, points in points_by_shard.items():
+        populator.client.upsert(collection_name=target, points=points, shard_key_selector=shard_key)
+
+
+def _changed_entities(client: QdrantClient, collection: str, since: float) -> set[str]:
+    """Entities with sections written after a time"""
+    changed = qdrant_models.Filter(must=[
+        qdrant_models.FieldCondition(key="indexed_at", range=qdrant_models.Range(gte=since - _CLOCK_SKEW_SECONDS))
+    ])
+    return {record.payload["entity_id"] for batch in _scroll(client, collection, changed) for record in batch}
+
+
+def _sync_entities(populator: DatabasePopulator, source: str, target: str, entity_ids: set[str]):
+    """Copy entities whose sections differ from their copy, dropping sections removed since
+
+    An entity written to the target more recently, e.g. ingested after the alias
+    switch, is left untouched.
+    """
+    client = populator.client
+    for entity_id in entity_ids:
+        records = _entity_records(client, source, entity_id)
+        copied = _entity_records(client, target, entity_id)
+        if _snapshot(records) == _snapshot(copied) or _latest_write(copied) > _latest_write(records):
+            continue
+        _copy(populator, target, records)
+        client.delete(
+            collection_name=target,
+            shard_key_selector=populator.schema.shard_key(entity_id),
+            points_selector=qdrant_models.FilterSelector(
+                filter=qdrant_models.Filter(
+                    must=[_entity_condition(entity_id)],
+                    must_not=[qdrant_models.HasIdCondition(has_id=[record.id for record in records])]
+                )
+            )
+        )
+
+
+def _alias_operation(alias: str, target: str) -> qdrant_models.CreateAliasOperation:
+    return qdrant_models.CreateAliasOperation(
+        create_alias=qdrant_models.CreateAlias(collection_name=target, alias_name=alias)
+    )
+
+
+def _switch_alias(client: QdrantClient, alias: str, target: str):
+    # Both operations are applied together, searches never see a missing alias
+    client.update_collection_aliases(change_aliases_operations=[
+        qdrant_models.DeleteAliasOperation(delete_alias=qdrant_models.DeleteAlias(alias_name=alias)),
+        _alias_operation(alias, target)
+    ])
+
+
+def _replace_collection(populator: DatabasePopulator, name: str, target: str, since: float):
+    """Replace a collection created before aliases were used by an alias to the target
+
+    A collection cannot be replaced by an alias atomically, searches fail until
+    the alias exists. Sections written since the last catch-up pass are synced
+    right before the delete. A populator starting after the delete recreates a
+    collection under the name; its sections are moved to the target and it is
+    deleted again until the alias can be created.
+
+    Raises:
+        RuntimeError: If the name is still taken by a recreated collection
+    """
+    client = populator.client
+    _sync_entities(populator, name, target, _changed_entities(client, name, since=since))
+    client.delete_collection(name)
+    for _ in range(_MAX_CATCH_UP_PASSES):
+        if client.collection_exists(name):
+            entity_ids = {record.payload["entity_id"] for batch in _scroll(client, name) for record in batch}
+            logger.warning(f"{name} was recreated during the switch, moving its {len(entity_ids)} entities")
+            _sync_entities(populator, name, target, entity_ids)
+            client.delete_collection(name)
+        try:
+            client.update_collection_aliases(change_aliases_operations=[_alias_operation(name, target)])
+            return
+        except (UnexpectedResponse, grpc.RpcError) as e:
+            if "already exists" not in str(e):
+                raise
+    raise RuntimeError(f"{name} keeps being recreated, the alias to {target} could not be created")
+
+
+def reindex(config: AppConfig, batch_size: int = 256, drop_old: bool = False) -> bool:
+    """Re-embed every stored section into a new collection and switch the alias to it
+
+    Sections are read back from the collection behind qdrant.collection.name and
+    embedded with the current embedding config, without re-running extraction or
+    enhancement. Ingestion and searches keep using the old collection meanwhile;
+    sections written during the copy are caught up from their indexed_at time.
+    Once both collections hold the same number of points the alias is switched
+    in one operation. Query services must then be restarted with the new
+    embedding config.
+
+    A collection created before aliases were used is replaced by the alias,
+    which leaves a short window where searches fail and writes fail or recreate
+    the collection (see _replace_collection), and is always dropped.
+
+    Args:
+        config: Application configuration with the new embedding config
+        batch_size: Sections embedded and written per request
+        drop_old: Delete the previous collection instead of keeping it for rollback
+
+    Returns:
+        Whether the alias was switched to the new collection
+    """
+    logging.basicConfig(level=logging.INFO)
+    if config.qdrant.backend != "qdrant":
+        raise ValueError("Reindexing requires the qdrant backend")
+
+    alias = config.qdrant.collection.name
+    client = qdrant_client(config.qdrant)
+    source = resolve_alias(client, alias)
+    legacy = source is None
+    if legacy:
+        if not client.collection_exists(alias):
+            raise ValueError(f"Collection {alias} does not exist")
+        source = alias
+
+    target = f"{alias}_{time.strftime('%Y%m%d%H%M%S')}"
+    target_config = config.qdrant.model_copy(update={
+        "collection": config.qdrant.collection.model_copy(update={"name": target, "recreate_collection": False})
+    })
+    populator = DatabasePopulator(
+        target_config,
+        config.embedding,
+        ModelRegistry(config.models),
+        config.search.include_taxonomy_terms,
+        create_section_text_store(config.section_text)
+    )
+    logger.info(f"Reindexing {source} into {target}")
+
+    started = time.time()
+    copied = 0
+    for records in _scroll(client, source, batch_size=batch_size):
+        _copy(populator, target, records)
+        copied += len(records)
+        logger.info(f"Re-embedded {copied} sections")
+
+    for _ in range(_MAX_CATCH_UP_PASSES):
+        pass_started = time.time()
+        changed = _changed_entities(client, source, since=started)
+        _sync_entities(populator, source, target, changed)
+        logger.info(f"Synced {len(changed)} entities written during the copy")
+        started = pass_started
+
+        source_count = client.count(source, exact=True).count
+        target_count = client.count(target, exact=True).count
+        if source_count == target_count:
+            break
+        logger.info(f"{source} has {source_count} points and {target} {target_count}, catching up again")
+    else:
+        logger.error(f"Point counts of {source} and {target} still differ, the alias was not switched")
+        return False
+
+    if legacy:
+        _replace_collection(populator, alias, target, since=started)
+    else:
+        _switch_alias(client, alias, target)
+    logger.info(f"Switched {alias} to {target}")
+
+    if not legacy:
+        # Writes that reached the old collection just before the switch
+        _sync_entities(populator, source, target, _changed_entities(client, source, since=started))
+        if drop_old:
+            client.delete_collection(source)
+            logger.info(f"Deleted {source}")
+        else:
+            logger.info(f"Kept {source} for rollback")
+    return True
@@ -0,0 +1,3 @@
+from src.service.server import GrantService, serve
+
+__all__ = ["serve", "GrantService"]
@@ -0,0 +1,267 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Any, Callable, Literal, Optional
+
+from pydantic import BaseModel, Field, ValidationError
+
+from src.utils.configs import AppConfig
+from src.utils.model_registry import ModelRegistry
+from src.utils.qdrant_clients import close_qdrant_clients
+from src.ingestion.container import Container as IngestionContainer
+from src.grant_answering.container import Container as GrantAnsweringContainer
+
+logger = logging.getLogger(__name__)
+
+JobKind = Literal["ingest", "answer"]
+JobStatus = Literal["queued", "running", "succeeded", "failed"]
+
+_MAX_BODY_BYTES = 1 << 20
+# Finished jobs are kept for polling until they expire or the newest ones exceed the cap
+_FINISHED_JOB_TTL_SECONDS = 24 * 3600
+_MAX_FINISHED_JOBS = 1000
+
+
+class IngestRequest(BaseModel):
+    entity_id: str
+    form_id: str = "innovator_introduction"
+
+
+class AnswerRequest(BaseModel):
+    entity_id: str
+    resume: bool = False
+
+
+class Job(BaseModel):
+    """A unit of work submitted to the service"""
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex)
+    kind: JobKind
+    params: dict[str, Any]
+    status: JobStatus = "queued"
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    created_at: float = Field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+
+class GrantService:
+    """Long-lived service keeping the ingestion and answering containers warm
+
+    Containers (and with them Firebase, Qdrant and OpenAI clients, Whisper, Docling
+    and the embedders) are built once at startup. Models may later be unloaded when
+    idle or under memory pressure and are then reloaded on demand. Each job kind runs on its own
+    single-thread executor, so models are never used concurrently and a long
+    ingestion does not block answering.
+
+    Finished jobs can be polled for _FINISHED_JOB_TTL_SECONDS, and only the
+    _MAX_FINISHED_JOBS most recent ones are kept. Jobs are updated from the
+    executor threads and the event loop under a lock.
+    """
+
+    def __init__(self, config: AppConfig):
+        self.config = config
+        self.ready = False
+        self.startup_error: Optional[str] = None
+        self.jobs: dict[str, Job] = {}
+        self._jobs_lock = threading.Lock()
+        self._executors = {
+            "ingest": ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest"),
+            "answer": ThreadPoolExecutor(max_workers=1, thread_name_prefix="answer"),
+        }
+        self.models = ModelRegistry(config.models)
+        self._ingestion: Optional[IngestionContainer] = None
+        self._answering: Optional[GrantAnsweringContainer] = None
+        self._tasks: set[asyncio.Task] = set()
+
+    def _load(self):
+        """Build the containers, loading every model and client"""
+        started = time.monotonic()
+        # Both containers share one registry, so the embedding model is loaded once
+        self._ingestion = IngestionContainer(self.config, model_registry=self.models)
+        self._answering = GrantAnsweringContainer(self.config, model_registry=self.models)
+        self.models.preload()
+        # Parse the grant once instead of on every answer job
+        self.config.grant_value
+        logger.info(f"Service ready in {time.monotonic() - started:.1f}s")
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, self._load)
+            self.ready = True
+        except Exception as e:
+            logger.exception("Service startup failed")
+            self.startup_error = str(e)
+
+    def close(self):
+        """Cancel queued jobs, wait for the running ones and close the Qdrant clients"""
+        for executor in self._executors.values():
+            executor.shutdown(cancel_futures=True)
+        close_qdrant_clients()
+
+    def _run_ingest(self, request: IngestRequest) -> None:
+        pipeline = self._ingestion.create_pipeline(request.form_id)
+        pipeline.process_entity(request.entity_id)
+
+    def _run_answer(self, request: AnswerRequest) -> dict[str, Any]:
+        pipeline = self._answering.create_grant_answering()
+        response = pipeline.process_grant_application(
+            request.entity_id,
+            self.config.grant_value,
+            resume=request.resume
+        )
+        return response.model_dump()
+
+    async def _execute(self, job: Job, work: Callable[[], Any]):
+        loop = asyncio.get_running_loop()
+
+        def run():
+            with self._jobs_lock:
+                job.status = "running"
+                job.started_at = time.time()
+            return work()
+
+        try:
+            result = await loop.run_in_executor(self._executors[job.kind], run)
+            with self._jobs_lock:
+                job.result = result
+                job.status = "succeeded"
+                job.finished_at = time.time()
+        except Exception as e:
+            logger.exception(f"Job {job.id} failed")
+            with self._jobs_lock:
+                job.error = str(e)
+                job.status = "failed"
+                job.finished_at = time.time()
+
+    def _evict_finished_jobs(self):
+        """Drop expired finished jobs and the oldest ones beyond the cap, the caller holds the lock"""
+        expiry = time.time() - _FINISHED_JOB_TTL_SECONDS
+        finished = sorted(
+            (job for job in self.jobs.values() if job.finished_at is not None),
+            key=lambda job: job.finished_at
+        )
+        excess = max(len(finished) - _MAX_FINISHED_JOBS, 0)
+        for index, job in enumerate(finished):
+            if index < excess or job.finished_at < expiry:
+                del self.jobs[job.id]
+
+    def get_job(self, job_id: str) -> Optional[dict[str, Any]]:
+        """A snapshot of a job, None when it is unknown or was evicted"""
+        with self._jobs_lock:
+            self._evict_finished_jobs()
+            job = self.jobs.get(job_id)
+            return job.model_dump() if job else None
+
+    def submit(self, kind: JobKind, body: dict[str, Any]) -> Job:
+        if kind == "ingest":
+            request = IngestRequest(**body)
+            work = lambda: self._run_ingest(request)
+        else:
+            request = AnswerRequest(**body)
+            work = lambda: self._run_answer(request)
+
+        job = Job(kind=kind, params=request.model_dump())
+        with self._jobs_lock:
+            self._evict_finished_jobs()
+            self.jobs[job.id] = job
+        task = asyncio.get_running_loop().create_task(self._execute(job, work))
+        # Keep a reference so the task is not garbage collected mid-run
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    def route(self, method: str, path: str, body: dict[str, Any]) -> tuple[HTTPStatus, Any]:
+        """Dispatch a request to its handler"""
+        if method == "GET" and path == "/health/live":
+            return HTTPStatus.OK, {"status": "alive"}
+        if method == "GET" and path == "/health/ready":
+            if self.ready:
+                return HTTPStatus.OK, {"status": "ready"}
+            return HTTPStatus.SERVICE_UNAVAILABLE, {"status": "loading", "error": self.startup_error}
+
+        if method == "GET" and path == "/models":
+            return HTTPStatus.OK, [stats.model_dump() for stats in self.models.stats()]
+
+        if method == "GET" and path.startswith("/jobs/"):
+            job = self.get_job(path.removeprefix("/jobs/"))
+            if job is None:
+                return HTTPStatus.NOT_FOUND, {"error": "Job not found"}
+            return HTTPStatus.OK, job
+
+        if method == "POST" and path in ("/ingest", "/answer"):
+            if not self.ready:
+                return HTTPStatus.SERVICE_UNAVAILABLE, {"error": "Service is still loading"}
+            job = self.submit(path.removeprefix("/"), body)
+            return HTTPStatus.ACCEPTED, {"job_id": job.id, "status": job.status}
+
+        return HTTPStatus.NOT_FOUND, {"error": f"No route for {method} {path}"}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Handle a single HTTP/1.1 request"""
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            if len(request_line) != 3:
+                return
+            method, path, _ = request_line
+
+            headers = {}
+            while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            length = headers.get("content-length", "0")
+            if not (length.isascii() and length.isdigit()):
+                status, payload = HTTPStatus.BAD_REQUEST, {"error": f"Invalid Content-Length: {length!r}"}
+            elif int(length) > _MAX_BODY_BYTES:
+                status, payload = HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "Body too large"}
+            else:
+                raw = await reader.readexactly(int(length)) if int(length) else b""
+                try:
+                    body = json.loads(raw) if raw else {}
+                    status, payload = self.route(method, path.split("?")[0], body)
+                except (json.JSONDecodeError, ValidationError, TypeError) as e:
+                    status, payload = HTTPStatus.BAD_REQUEST, {"error": str(e)}
+                except Exception:
+                    logger.exception(f"Failed to handle {method} {path}")
+                    status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Internal server error"}
+
+            data = json.dumps(payload, default=str).encode()
+            writer.write(
+                f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(data)}\r\n"
+                f"Connection: close\r\n\r\n".encode() + data
+            )
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def _serve(config: AppConfig, host: str, port: int):
+    service = GrantService(config)
+    server = await asyncio.start_server(service.handle, host, port)
+    logger.info(f"Listening on {host}:{port}, loading models")
+    try:
+        async with server:
+            await asyncio.gather(server.serve_forever(), service.start())
+    finally:
+        service.close()
+
+
+def serve(config: AppConfig, host: str = "127.0.0.1", port: int = 8080):
+    """Run the service until interrupted
+
+    The server accepts connections right away; /health/ready reports 200 only once
+    every model is loaded, and job submissions are rejected with 503 until then.
+    """
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_serve(config, host, port))
@@ -0,0 +1,345 @@
+import os
+import re
+import sqlite3
+import time
+import uuid
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import ContextManager, Iterator, Mapping, Optional, Protocol, runtime_checkable
+
+from pydantic import BaseModel
+
+from src.utils.configs import QueueConfig
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - optional dependency
+    redis = None
+
+
+def redis_client(config: QueueConfig) -> "redis.Redis":
+    """Create a Redis client for the queue configuration"""
+    if redis is None:
+        raise ImportError("The redis backend requires the redis package")
+    if not config.redis_url:
+        raise ValueError("The redis backend requires queue.redis_url")
+    return redis.Redis.from_url(config.redis_url, decode_responses=True)
+
+
+class ConcurrencyLimiter(Protocol):
+    """Caps the number of concurrent holders of a shared resource"""
+
+    def slot(self) -> ContextManager[None]:
+        """Context manager holding one slot, waiting until one is free"""
+        ...
+
+
+class SQLiteConcurrencyLimiter:
+    """Slot counter shared by every process on a node through a SQLite file
+
+    Slots older than the ttl are reclaimed, so a process killed mid-call does not
+    leak its slot.
+    """
+
+    def __init__(self, path: Path, limit: int, ttl_seconds: float, poll_interval_seconds: float = 0.1):
+        self.path = path
+        self.limit = limit
+        self.ttl_seconds = ttl_seconds
+        self.poll_interval_seconds = poll_interval_seconds
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as db:
+            db.execute("CREATE TABLE IF NOT EXISTS llm_slots (holder TEXT PRIMARY KEY, expires_at REAL NOT NULL)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def _try_acquire(self, db: sqlite3.Connection, holder: str) -> bool:
+        now = time.time()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.execute("DELETE FROM llm_slots WHERE expires_at < ?", (now,))
+            (held,) = db.execute("SELECT COUNT(*) FROM llm_slots").fetchone()
+            if held < self.limit:
+                db.execute("INSERT INTO llm_slots VALUES (?, ?)", (holder, now + self.ttl_seconds))
+            db.execute("COMMIT")
+            return held < self.limit
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        holder = f"{os.getpid()}:{uuid.uuid4().hex}"
+        with closing(self._connect()) as db:
+            while not self._try_acquire(db, holder):
+                time.sleep(self.poll_interval_seconds)
+            try:
+                yield
+            finally:
+                db.execute("DELETE FROM llm_slots WHERE holder = ?", (holder,))
+
+
+class RedisConcurrencyLimiter:
+    """Slot counter shared by every node through a Redis sorted set
+
+    Holders are scored by their expiry time on the Redis clock, so slots of dead
+    holders are reclaimed without relying on the clocks of the nodes.
+    """
+
+    _ACQUIRE = """
+        local t = redis.call('TIME')
+        local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+        redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+        if redis.call('ZCARD', KEYS[1]) < tonumber(ARGV[2]) then
+            redis.call('ZADD', KEYS[1], now + tonumber(ARGV[3]), ARGV[1])
+            return 1
+        end
+        return 0
+    """
+
+    def __init__(
+        self,
+        client: "redis.Redis",
+        key: str,
+        limit: int,
+        ttl_seconds: float,
+        poll_interval_seconds: float = 0.1
+    ):
+        self.client = client
+        self.key = key
+        self.limit = limit
+        self.ttl_seconds = ttl_seconds
+        self.poll_interval_seconds = poll_interval_seconds
+        self._acquire = client.register_script(self._ACQUIRE)
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        holder = uuid.uuid4().hex
+        while not self._acquire(keys=[self.key], args=[holder, self.limit, self.ttl_seconds]):
+            time.sleep(self.poll_interval_seconds)
+        try:
+            yield
+        finally:
+            self.client.zrem(self.key, holder)
+
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Seconds of a rate limit reset duration such as "1s", "6m0s" or "20ms" """
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts) if parts else None
+
+
+def _header_int(headers: Mapping[str, str], name: str) -> Optional[int]:
+    try:
+        return int(headers[name])
+    except (KeyError, ValueError):
+        return None
+
+
+class RateLimitHeaders(BaseModel):
+    """Remaining budgets and reset delays reported by the provider with each response"""
+    remaining_requests: Optional[int] = None
+    remaining_tokens: Optional[int] = None
+    reset_requests_seconds: Optional[float] = None
+    reset_tokens_seconds: Optional[float] = None
+    retry_after_seconds: Optional[float] = None
+
+    @classmethod
+    def from_headers(cls, headers: Mapping[str, str]) -> "RateLimitHeaders":
+        return cls(
+            remaining_requests=_header_int(headers, "x-ratelimit-remaining-requests"),
+            remaining_tokens=_header_int(headers, "x-ratelimit-remaining-tokens"),
+            reset_requests_seconds=parse_duration(headers.get("x-ratelimit-reset-requests")),
+            reset_tokens_seconds=parse_duration(headers.get("x-ratelimit-reset-tokens")),
+            retry_after_seconds=parse_duration(headers.get("retry-after"))
+        )
+
+
+@runtime_checkable
+class AdaptiveLimiter(Protocol):
+    """Limiter sizing its concurrency from the responses of the provider"""
+
+    def slot(self, model: str, tokens: int = 0) -> ContextManager[None]:
+        """Context manager holding one slot of a model and reserving the estimated tokens of a call"""
+        ...
+
+    def record_response(self, model: str, headers: Mapping[str, str]) -> None:
+        """Update the budgets of a model from a successful response and allow it more concurrency"""
+        ...
+
+    def record_rate_limited(self, model: str, headers: Mapping[str, str]) -> None:
+        """Halve the concurrency of a model and pause its calls until the limit resets"""
+        ...
+
+
+class SQLiteAdaptiveRateLimiter:
+    """AIMD concurrency limits and provider budgets shared by every process on a node
+
+    The provider limits each model separately, so the state is kept per model.
+    The concurrency window of a model grows by one call per window of successful
+    calls and is halved on a rate limit error, which also pauses the model's new
+    calls until the provider's retry delay has passed. Calls are also held back
+    while the remaining requests or tokens reported by the last response of their
+    model, minus those reserved by its calls in flight, would not cover them.
+    The calls in flight across models never exceed max_concurrency.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_concurrency: int,
+        ttl_seconds: float,
+        min_concurrency: int = 1,
+        poll_interval_seconds: float = 0.1
+    ):
+        self.path = path
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.ttl_seconds = ttl_seconds
+        self.poll_interval_seconds = poll_interval_seconds
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as db:
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS llm_model_slots (
+                    holder TEXT PRIMARY KEY, model TEXT NOT NULL, tokens INTEGER NOT NULL, expires_at REAL NOT NULL
+                )
+            """)
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS llm_model_state (
+                    model TEXT PRIMARY KEY,
+                    window REAL NOT NULL,
+                    paused_until REAL NOT NULL DEFAULT 0,
+                    remaining_requests INTEGER,
+                    requests_reset_at REAL,
+                    remaining_tokens INTEGER,
+                    tokens_reset_at REAL
+                )
+            """)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with closing(self._connect()) as db:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+
+    def _try_acquire(self, holder: str, model: str, tokens: int) -> Optional[float]:
+        """Take a slot of a model, or return how long to wait before trying again"""
+        now = time.time()
+        with self._transaction() as db:
+            db.execute("DELETE FROM llm_model_slots WHERE expires_at < ?", (now,))
+            # Start from the floor and grow, the budgets are unknown until the first response
+            db.execute("INSERT OR IGNORE INTO llm_model_state (model, window) VALUES (?, ?)", (model, self.min_concurrency))
+            window, paused_until, requests, requests_reset_at, remaining_tokens, tokens_reset_at = db.execute(
+                "SELECT window, paused_until, remaining_requests, requests_reset_at, remaining_tokens, tokens_reset_at "
+                "FROM llm_model_state WHERE model = ?",
+                (model,)
+            ).fetchone()
+            if paused_until > now:
+                return paused_until - now
+            (total_in_flight,) = db.execute("SELECT COUNT(*) FROM llm_model_slots").fetchone()
+            in_flight, reserved = db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(tokens), 0) FROM llm_model_slots WHERE model = ?",
+                (model,)
+            ).fetchone()
+            if in_flight >= max(int(window), self.min_concurrency) or total_in_flight >= self.max_concurrency:
+                return self.poll_interval_seconds
+            # A budget is replenished once its reset time has passed
+            if requests is not None and (requests_reset_at or 0) > now and requests - in_flight <= 0:
+                return min(requests_reset_at - now, self.poll_interval_seconds * 10)
+            if remaining_tokens is not None and (tokens_reset_at or 0) > now and remaining_tokens - reserved < tokens:
+                return min(tokens_reset_at - now, self.poll_interval_seconds * 10)
+            db.execute(
+                "INSERT INTO llm_model_slots VALUES (?, ?, ?, ?)",
+                (holder, model, tokens, now + self.ttl_seconds)
+            )
+            return None
+
+    @contextmanager
+    def slot(self, model: str, tokens: int = 0) -> Iterator[None]:
+        holder = f"{os.getpid()}:{uuid.uuid4().hex}"
+        while (delay := self._try_acquire(holder, model, tokens)) is not None:
+            time.sleep(max(delay, self.poll_interval_seconds))
+        try:
+            yield
+        finally:
+            with closing(self._connect()) as db:
+                db.execute("DELETE FROM llm_model_slots WHERE holder = ?", (holder,))
+
+    def record_response(self, model: str, headers: Mapping[str, str]) -> None:
+        limits = RateLimitHeaders.from_headers(headers)
+        now = time.time()
+        with self._transaction() as db:
+            db.execute(
+                """
+                UPDATE llm_model_state SET
+                    window = MIN(?, window + 1.0 / window),
+                    remaining_requests = COALESCE(?, remaining_requests),
+                    requests_reset_at = COALESCE(?, requests_reset_at),
+                    remaining_tokens = COALESCE(?, remaining_tokens),
+                    tokens_reset_at = COALESCE(?, tokens_reset_at)
+                WHERE model = ?
+                """,
+                (
+                    self.max_concurrency,
+                    limits.remaining_requests,
+                    now + limits.reset_requests_seconds if limits.reset_requests_seconds is not None else None,
+                    limits.remaining_tokens,
+                    now + limits.reset_tokens_seconds if limits.reset_tokens_seconds is not None else None,
+                    model
+                )
+            )
+
+    def record_rate_limited(self, model: str, headers: Mapping[str, str]) -> None:
+        limits = RateLimitHeaders.from_headers(headers)
+        delay = limits.retry_after_seconds or max(
+            limits.reset_requests_seconds or 0, limits.reset_tokens_seconds or 0, 1.0
+        )
+        with self._transaction() as db:
+            db.execute(
+                "UPDATE llm_model_state SET window = MAX(?, window / 2), paused_until = MAX(paused_until, ?) "
+                "WHERE model = ?",
+                (self.min_concurrency, time.time() + delay, model)
+            )
+
+
+def create_concurrency_limiter(config: QueueConfig) -> Optional[ConcurrencyLimiter]:
+    """Create the LLM call limiter for the queue backend, None when calls are not capped"""
+    if config.adaptive_llm_rate_limit:
+        # Node-local state, nodes sharing a Redis queue coordinate through the provider's budgets
+        return SQLiteAdaptiveRateLimiter(
+            config.path,
+            max_concurrency=config.max_concurrent_llm_calls or config.adaptive_max_concurrency,
+            ttl_seconds=config.llm_slot_ttl_seconds
+        )
+    if config.max_concurrent_llm_calls is None:
+        return None
+    if config.backend == "redis":
+        return RedisConcurrencyLimiter(
+            redis_client(config),
+            key=f"{config.redis_prefix}:llm_slots",
+            limit=config.max_concurrent_llm_calls,
+            ttl_seconds=config.llm_slot_ttl_seconds
+        )
+    return SQLiteConcurrencyLimiter(
+        config.path,
+        limit=config.max_concurrent_llm_calls,
+        ttl_seconds=config.llm_slot_ttl_seconds
+    )
@@ -1,7 +1,8 @@
+import zlib
 from functools import cached_property
-from typing import Optional
+from typing import Literal, Optional
 from pathlib import Path
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from qdrant_client.http import models as qdrant_models
 
 from src.utils.models import Grant
@@ -12,6 +13,31 @@ class QdrantCollectionConfig(BaseModel):
     name: str = "catalyzator"
     recreate_collection: bool = False
     on_disk_payload: bool = True
+    on_disk_vectors: bool = Field(default=False, description="Keep original vectors on disk (memmap) instead of RAM")
+    quantization: Optional[Literal["scalar", "binary"]] = Field(default=None, description="Vector quantization kept in RAM for search")
+    quantization_always_ram: bool = Field(default=True, description="Keep quantized vectors in RAM even when originals are on disk")
+    quantization_rescore: bool = Field(default=True, description="Rescore quantized candidates with the original vectors")
+    quantization_oversampling: float = Field(default=2.0, description="Candidates fetched per requested result before rescoring")
+    hnsw_m: Optional[int] = Field(default=None, description="HNSW edges per node, server default when unset")
+    hnsw_ef_construct: Optional[int] = Field(default=None, description="HNSW build-time neighbours, server default when unset")
+    search_hnsw_ef: Optional[int] = Field(default=None, description="HNSW search-time beam size, server default when unset")
+    hybrid_prefetch_limit: int = Field(default=20, description="Candidates fetched by each of the dense and sparse searches before fusion")
+    tenancy: Literal["payload", "tenant_index", "shard_key"] = Field(
+        default="payload",
+        description="Entity partitioning: plain payload index, tenant index with per-entity graphs, or custom shard keys"
+    )
+    shard_key_buckets: Optional[int] = Field(
+        default=None,
+        description="With shard_key tenancy, hash entities into this many shard keys instead of one key per entity"
+    )
+
+    def shard_key(self, entity_id: str) -> Optional[str]:
+        """Shard key holding the entity, None unless the shard_key tenancy is used"""
+        if self.tenancy != "shard_key":
+            return None
+        if not self.shard_key_buckets:
+            return entity_id
+        return f"bucket-{zlib.crc32(entity_id.encode()) % self.shard_key_buckets}"
 
 
 class QdrantConfig(BaseModel):
@@ -19,8 +45,35 @@ class QdrantConfig(BaseModel):
     url: str = "http://localhost:6333"
     api_key: Optional[str] = None
     timeout: float = 10.0
-    prefer_grpc: bool = False
+    prefer_grpc: bool = Field(default=True, description="Use gRPC instead of REST for every request")
+    grpc_port: int = 6334
+    grpc_keepalive_seconds: float = Field(default=30.0, description="Interval of gRPC keep-alive pings, keeping idle channels open through proxies")
+    grpc_max_message_mb: int = Field(default=64, description="Largest gRPC message sent or received, scrolls with vectors exceed the 4 MB default")
     collection: QdrantCollectionConfig = QdrantCollectionConfig()
+    backend: Literal["qdrant", "local"] = Field(default="qdrant", description="Qdrant server or the embedded local vector store")
+    local_path: Path = Field(default=Path(".vectors"), description="Directory of the embedded local vector store")
+    upload_batch_size: int = Field(default=256, description="Sections embedded and uploaded per request by bulk population")
+    upload_parallel: int = Field(default=1, description="Concurrent upload processes of bulk population")
+
+    @staticmethod
+    def connection_fields() -> set[str]:
+        """Fields identifying a client connection, shared by every collection of the server"""
+        return {'url', 'api_key', 'timeout', 'prefer_grpc', 'grpc_port', 'grpc_keepalive_seconds', 'grpc_max_message_mb'}
+
+    def client_options(self) -> dict:
+        """Keyword arguments for constructing a QdrantClient"""
+        options = self.model_dump(include={'url', 'api_key', 'timeout', 'prefer_grpc', 'grpc_port'})
+        if self.prefer_grpc:
+            max_message_bytes = self.grpc_max_message_mb * 1024 * 1024
+            options["grpc_options"] = {
+                "grpc.keepalive_time_ms": int(self.grpc_keepalive_seconds * 1000),
+                "grpc.keepalive_timeout_ms": int(self.timeout * 1000),
+                "grpc.keepalive_permit_without_calls": 1,
+                "grpc.http2.max_pings_without_data": 0,
+                "grpc.max_send_message_length": max_message_bytes,
+                "grpc.max_receive_message_length": max_message_bytes,
+            }
+        return options
 
 
 class FirebaseConfig(BaseModel):
@@ -36,24 +89,233 @@ class SearchConfig(BaseModel):
     min_relevance_score: float = Field(default=0.6, description="Minimum relevance score for sections")
     max_sections: int = Field(default=3, description="Maximum number of sections to return")
     include_taxonomy_terms: bool = Field(default=True, description="Whether to include taxonomy terms in search")
+    section_routing: Literal["lexical", "llm"] = Field(
+        default="lexical",
+        description="Select sections with the BM25 taxonomy router, falling back to the LLM, or always with the LLM"
+    )
+    routing_min_score: float = Field(default=4.0, description="Best BM25 section score below which the LLM selects the sections")
+    routing_relative_cutoff: float = Field(default=0.5, description="Routed sections scoring below this fraction of the best one are dropped")
+    max_context_tokens: Optional[int] = Field(default=4000, description="Token budget for the innovator profile context in answer prompts")
+    structured_answers: bool = Field(default=True, description="Answer number, date, boolean and table questions from form fields when a matching value exists")
+    structured_min_overlap: float = Field(default=0.5, description="Fraction of a form field's key words that must appear in the question to answer from it, the key must also hold every word of the question title")
 
 class EmbeddingConfig(BaseModel):
     """Configuration for embedding settings"""
     model_name: str = 'sentence-transformers/all-MiniLM-L6-v2'
     vector_size: int = 384
     distance_metric: qdrant_models.Distance = qdrant_models.Distance.COSINE
+    output_dimensions: Optional[int] = Field(
+        default=None,
+        description="Keep only the first N embedding dimensions (renormalized), meant for Matryoshka-trained models"
+    )
+    sparse_model_name: Optional[str] = Field(
+        default="Qdrant/bm25",
+        description="FastEmbed sparse model (BM25, BM42, SPLADE) written next to the dense vector for hybrid search, None for dense only. "
+                    "Queries use the one of the ingestion embedding config"
+    )
+
+    @property
+    def sparse_uses_idf(self) -> bool:
+        """BM25 style sparse models leave the IDF term to the server"""
+        return bool(self.sparse_model_name) and self.sparse_model_name.lower().startswith("qdrant/bm")
+
+    @property
+    def stored_vector_size(self) -> int:
+        """Size of the vectors written to the collection"""
+        return self.output_dimensions or self.vector_size
+
+class ModelPrice(BaseModel):
+    """Price of a model in USD per million tokens"""
+    input: float
+    cached_input: Optional[float] = Field(default=None, description="Price of cached prompt tokens, the input price when unset")
+    output: float
+
+
+def _default_model_prices() -> dict[str, ModelPrice]:
+    return {
+        "gpt-4": ModelPrice(input=30.0, output=60.0),
+        "gpt-4o": ModelPrice(input=2.5, cached_input=1.25, output=10.0),
+        "gpt-4o-mini": ModelPrice(input=0.15, cached_input=0.075, output=0.6),
+    }
+
 
 class LLMConfig(BaseModel):
     """Configuration for LLM client settings"""
     api_key: str
-    model: str = "gpt-4"
+    model: str = Field(default="gpt-4", description="Model of the call sites without a route, and of escalations")
     temperature: float = 0.7
     max_tokens: Optional[int] = None
+    routes: dict[str, str] = Field(
+        default_factory=lambda: {"relevance": "gpt-4o-mini", "section_selection": "gpt-4o-mini"},
+        description="Model of each call site (relevance, section_selection, answer, enhancement)"
+    )
+    escalation_model: Optional[str] = Field(
+        default=None,
+        description="Model retried when the output of a routed model cannot be parsed, the default model when unset"
+    )
+    prices: dict[str, ModelPrice] = Field(default_factory=_default_model_prices, description="Prices used to report the cost of each model")
+    rate_limit_retries: int = Field(default=5, description="Retries of a rate limited call when queue.adaptive_llm_rate_limit is enabled")
+    deadline_seconds: Optional[float] = Field(default=180, description="Time allowed for an LLM call before it is abandoned, None for no deadline")
+    deadlines: dict[str, Optional[float]] = Field(
+        # Enhancing a full profile can legitimately take longer than any fixed deadline
+        default_factory=lambda: {"relevance": 60, "section_selection": 60, "enhancement": None},
+        description="Deadline of each call site, None for no deadline, deadline_seconds when absent"
+    )
+    hedging: bool = Field(default=False, description="Send a duplicate request when a call is slower than the hedge_quantile latency of its model")
+    hedge_quantile: float = Field(default=0.95, description="Latency quantile of a model after which its calls are hedged")
+    hedge_min_samples: int = Field(default=20, description="Calls to a model before its latency quantile is used")
+    hedge_max_ratio: float = Field(default=0.1, description="Maximum share of calls that may be hedged")
 
 
 class GrantConfig(BaseModel):
     grant_path: Path
 
+
+class JournalConfig(BaseModel):
+    """Configuration for the grant answering run journal"""
+    directory: Path = Path(".journal")
+
+
+class FileCacheConfig(BaseModel):
+    """Configuration for the per-entity manifest of downloaded files and their extracted text"""
+    enabled: bool = Field(default=True, description="Skip downloading and extracting files unchanged since the last ingest")
+    directory: Path = Path(".files")
+
+
+class SectionTextConfig(BaseModel):
+    """Configuration for keeping section text outside of Qdrant"""
+    enabled: bool = Field(
+        default=False,
+        description="Keep only ids, title, entity and content hash in Qdrant payloads and the section text in a local store; ingestion and answering must share its path"
+    )
+    path: Path = Path(".sections/sections.db")
+    compression: Literal["zstd", "zlib"] = Field(default="zstd", description="Text compression, zlib when zstandard is not installed")
+    compression_level: int = Field(default=9, description="Compression level of the codec")
+
+class QueueConfig(BaseModel):
+    """Configuration for the job queue, its workers and the shared LLM concurrency cap"""
+    backend: Literal["sqlite", "redis"] = Field(
+        default="sqlite",
+        description="sqlite for a single node, redis to share jobs and LLM slots across nodes"
+    )
+    path: Path = Path(".queue/jobs.sqlite")
+    redis_url: Optional[str] = Field(default=None, description="Redis URL, required by the redis backend")
+    redis_prefix: str = Field(default="tnufa", description="Prefix of every Redis key")
+    lease_seconds: float = Field(default=300, description="Lease duration, renewed by worker heartbeats")
+    heartbeat_seconds: float = Field(default=60, description="Interval between lease renewals")
+    max_attempts: int = Field(default=3, description="Attempts before a job is marked failed")
+    backoff_base_seconds: float = Field(default=30, description="Retry delay after the first failure, doubled on each retry")
+    backoff_max_seconds: float = Field(default=1800, description="Upper bound for the retry delay")
+    poll_interval_seconds: float = Field(default=2, description="Idle worker polling interval")
+    max_concurrent_llm_calls: Optional[int] = Field(
+        default=None,
+        description="Cap on in-flight LLM calls across all workers sharing the backend, None for no cap"
+    )
+    llm_slot_ttl_seconds: float = Field(
+        default=600,
+        description="A slot held longer than this is reclaimed, covering workers that died mid-call"
+    )
+    adaptive_llm_rate_limit: bool = Field(
+        default=False,
+        description="Size LLM concurrency from the provider's rate limit headers (AIMD), shared by the processes of a node"
+    )
+    adaptive_max_concurrency: int = Field(
+        default=16,
+        description="Ceiling of the adaptive concurrency when max_concurrent_llm_calls is unset"
+    )
+
+
+class AudioConfig(BaseModel):
+    """Configuration for audio transcription"""
+    vad: Literal["auto", "silero", "energy", "none"] = Field(
+        default="auto",
+        description="Voice activity detector cutting audio to speech, auto prefers silero when installed"
+    )
+    vad_min_silence_seconds: float = Field(default=0.5, description="Shorter pauses do not split speech segments")
+    vad_min_speech_seconds: float = Field(default=0.25, description="Shorter speech segments are dropped")
+    vad_padding_seconds: float = Field(default=0.2, description="Audio kept around each speech segment")
+    vad_energy_margin_db: float = Field(default=15, description="Energy above the noise floor counted as speech")
+    vad_min_energy_db: float = Field(default=-50, description="Energy below this is never counted as speech")
+    max_span_seconds: float = Field(
+        default=30,
+        description="Speech is grouped into chunks of at most this length, one Whisper call each"
+    )
+    chunk_overlap_seconds: float = Field(default=2, description="Overlap between the chunks of a long segment")
+    cut_search_seconds: float = Field(default=2, description="Window before a chunk boundary searched for a quiet cut point")
+    transcription_mode: Literal["sequential", "batched", "process_pool"] = Field(
+        default="sequential",
+        description="sequential, batched within one model, or a pool of forked processes sharing the model; "
+                    "process_pool falls back to batched on CUDA hosts and outside the main thread"
+    )
+    batch_size: int = Field(default=4, description="Chunks per Whisper batch in batched mode")
+    transcription_workers: Optional[int] = Field(
+        default=None,
+        description="Processes of the process_pool mode, a quarter of the cores by default"
+    )
+
+    @model_validator(mode="after")
+    def _check_chunking(self) -> "AudioConfig":
+        # Each piece of a long segment must end past the overlap of the next one, or splitting never advances
+        if self.chunk_overlap_seconds + self.cut_search_seconds >= self.max_span_seconds:
+            raise ValueError("chunk_overlap_seconds + cut_search_seconds must be less than max_span_seconds")
+        return self
+
+
+class ExtractionLimits(BaseModel):
+    """Resource budget of a single file extraction, None disables a limit"""
+    timeout_seconds: Optional[float] = Field(default=None, description="Wall time before the extraction is killed")
+    max_memory_mb: Optional[int] = Field(default=None, description="Address space the extraction may add to the worker")
+    max_pages: Optional[int] = Field(default=None, description="Only the first pages of longer documents are extracted")
+    max_audio_seconds: Optional[float] = Field(default=None, description="Only the beginning of longer recordings is transcribed")
+
+
+class ExtractionConfig(BaseModel):
+    """Configuration for file extraction limits"""
+    isolate: bool = Field(
+        default=True,
+        description="Run each extraction in a subprocess killed when it exceeds its wall time or memory limit, "
+                    "in-process on CUDA hosts where a forked child cannot use the GPU"
+    )
+    limits: dict[str, ExtractionLimits] = Field(
+        default_factory=lambda: {
+            "audio": ExtractionLimits(timeout_seconds=1800, max_memory_mb=8192, max_audio_seconds=3600),
+            "document": ExtractionLimits(timeout_seconds=900, max_memory_mb=6144, max_pages=100),
+        },
+        description="Limits per registered extractor name"
+    )
+
+
+class ModelConfig(BaseModel):
+    """Configuration for loading and unloading local models (Whisper, Docling, embedders)"""
+    idle_unload_seconds: Optional[float] = Field(
+        default=None,
+        description="Unload a model unused for this long, None to keep models loaded"
+    )
+    max_rss_mb: Optional[int] = Field(
+        default=None,
+        description="Unload least recently used models while the process RSS exceeds this"
+    )
+    min_available_mb: Optional[int] = Field(
+        default=None,
+        description="Unload least recently used models while system available memory is below this"
+    )
+    check_interval_seconds: float = Field(default=30, description="Interval of the idle and memory pressure checks")
+    preload_before_fork: bool = Field(
+        default=True,
+        description="Load models in the parent of worker processes so forked workers share their weights"
+    )
+    cache_dir: Optional[Path] = Field(
+        default=None,
+        description="Directory holding every model, filled by the warmup command. None uses the library defaults"
+    )
+    offline: bool = Field(default=False, description="Never download models at runtime, only load them from cache_dir")
+
+    @property
+    def docling_artifacts_path(self) -> Optional[Path]:
+        """Directory of the Docling layout, TableFormer and OCR weights"""
+        return self.cache_dir / "docling" if self.cache_dir else None
+
+
 class AppConfig(BaseModel):
     """Root configuration containing all sub-configurations"""
     firebase: FirebaseConfig
@@ -62,11 +324,19 @@ class AppConfig(BaseModel):
     embedding: EmbeddingConfig
     search: SearchConfig
     grant: Optional[GrantConfig] = None
+    journal: JournalConfig = JournalConfig()
+    file_cache: FileCacheConfig = FileCacheConfig()
+    section_text: SectionTextConfig = SectionTextConfig()
+    queue: QueueConfig = QueueConfig()
+    models: ModelConfig = ModelConfig()
+    audio: AudioConfig = AudioConfig()
+    extraction: ExtractionConfig = ExtractionConfig()
 
     @classmethod
     def from_env(cls) -> 'AppConfig':
         """Create configuration from environment variables"""
         from dotenv import load_dotenv
+        import json
         import os
         
         load_dotenv()
@@ -79,13 +349,18 @@ class AppConfig(BaseModel):
             qdrant=QdrantConfig(
                 url=os.getenv('QDRANT_URL', 'http://localhost:6333'),
                 api_key=os.getenv('QDRANT_API_KEY'),
+                prefer_grpc=os.getenv('QDRANT_PREFER_GRPC', 'true').lower() in ('1', 'true', 'yes'),
+                grpc_port=int(os.getenv('QDRANT_GRPC_PORT', '6334')),
+                backend=os.getenv('QDRANT_BACKEND', 'qdrant'),
+                local_path=Path(os.getenv('QDRANT_LOCAL_PATH', '.vectors')),
                 collection=QdrantCollectionConfig(
                     name=os.getenv('QDRANT_COLLECTION', 'catalyzator')
                 )
             ),
             llm=LLMConfig(
                 api_key=os.getenv('OPENAI_API_KEY', ''),
-                model=os.getenv('OPENAI_MODEL', 'gpt-4')
+                model=os.getenv('OPENAI_MODEL', 'gpt-4'),
+                **({'routes': json.loads(os.environ['OPENAI_MODEL_ROUTES'])} if os.getenv('OPENAI_MODEL_ROUTES') else {})
             ),
             embedding=EmbeddingConfig(
                 model_name=os.getenv('EMBEDDING_MODEL', 'sentence-transformers/all-MiniLM-L6-v2')
@@ -93,6 +368,34 @@ class AppConfig(BaseModel):
             search=SearchConfig(),
             grant=GrantConfig(
                 grant_path=Path(os.getenv('GRANT_PATH', '')) if os.getenv('GRANT_PATH') else None
+            ),
+            models=ModelConfig(
+                idle_unload_seconds=(
+                    float(os.getenv('MODEL_IDLE_UNLOAD_SECONDS'))
+                    if os.getenv('MODEL_IDLE_UNLOAD_SECONDS') else None
+                ),
+                max_rss_mb=int(os.getenv('MODEL_MAX_RSS_MB')) if os.getenv('MODEL_MAX_RSS_MB') else None,
+                cache_dir=Path(os.getenv('MODEL_CACHE_DIR')) if os.getenv('MODEL_CACHE_DIR') else None,
+                offline=os.getenv('MODEL_OFFLINE', '').lower() in ('1', 'true', 'yes')
+            ),
+            journal=JournalConfig(
+                directory=Path(os.getenv('JOURNAL_DIR', '.journal'))
+            ),
+            file_cache=FileCacheConfig(
+                directory=Path(os.getenv('FILE_CACHE_DIR', '.files'))
+            ),
+            section_text=SectionTextConfig(
+                enabled=os.getenv('SECTION_TEXT_STORE', '').lower() in ('1', 'true', 'yes'),
+                path=Path(os.getenv('SECTION_TEXT_PATH', '.sections/sections.db'))
+            ),
+            queue=QueueConfig(
+                backend=os.getenv('QUEUE_BACKEND', 'sqlite'),
+                path=Path(os.getenv('QUEUE_PATH', '.queue/jobs.sqlite')),
+                redis_url=os.getenv('REDIS_URL'),
+                max_concurrent_llm_calls=(
+                    int(os.getenv('MAX_CONCURRENT_LLM_CALLS'))
+                    if os.getenv('MAX_CONCURRENT_LLM_CALLS') else None
+                )
             )
         )
 
@@ -109,5 +412,5 @@ class AppConfig(BaseModel):
     def grant_value(self) -> Grant:
         """Load grant from JSON file"""
         from src.utils.models import Grant
-        with open(self.grant_path) as f:
+        with open(self.grant.grant_path) as f:
             return Grant.model_validate_json(f.read())
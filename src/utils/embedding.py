@@ -0,0 +1,59 @@
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+from fastembed import SparseTextEmbedding, TextEmbedding
+from qdrant_client.http import models as qdrant_models
+
+from src.utils.configs import EmbeddingConfig
+from src.utils.model_registry import ModelRegistry
+
+
+def reduce_dimensions(embedding: np.ndarray, dimensions: int) -> np.ndarray:
+    """Keep the first dimensions of an embedding and renormalize it"""
+    reduced = embedding[:dimensions]
+    norm = np.linalg.norm(reduced)
+    return reduced / norm if norm else reduced
+
+
+class Embedder:
+    """Text embedder applying the configured dimensionality reduction"""
+
+    def __init__(self, config: EmbeddingConfig, model_registry: Optional[ModelRegistry] = None):
+        self.config = config
+        self.models = model_registry or ModelRegistry()
+        # Embedders of the same model share one instance through the registry
+        self.model_name = f"embedding:{config.model_name}"
+        self.models.register(self.model_name, lambda: TextEmbedding(config.model_name))
+
+    def embed(self, texts: Iterable[str], **kwargs) -> Iterator[np.ndarray]:
+        """Embed texts, yielding one vector of stored_vector_size per text"""
+        with self.models.use(self.model_name) as model:
+            for embedding in model.embed(list(texts), **kwargs):
+                if self.config.output_dimensions:
+                    embedding = reduce_dimensions(embedding, self.config.output_dimensions)
+                yield embedding
+
+
+def _sparse_vector(embedding) -> qdrant_models.SparseVector:
+    return qdrant_models.SparseVector(indices=embedding.indices.tolist(), values=embedding.values.tolist())
+
+
+class SparseEmbedder:
+    """Sparse text embedder producing Qdrant sparse vectors"""
+
+    def __init__(self, model_name: str, model_registry: Optional[ModelRegistry] = None):
+        self.models = model_registry or ModelRegistry()
+        self.model_name = f"sparse:{model_name}"
+        self.models.register(self.model_name, lambda: SparseTextEmbedding(model_name))
+
+    def embed(self, texts: Iterable[str]) -> Iterator[qdrant_models.SparseVector]:
+        """Embed documents, yielding one sparse vector per text"""
+        with self.models.use(self.model_name) as model:
+            for embedding in model.embed(list(texts)):
+                yield _sparse_vector(embedding)
+
+    def query_embed(self, text: str) -> qdrant_models.SparseVector:
+        """Embed a query, BM25 models weigh query terms differently from documents"""
+        with self.models.use(self.model_name) as model:
+            embedding = next(iter(model.query_embed(text)))
+            return _sparse_vector(embedding)
@@ -1,7 +1,30 @@
 from typing import Protocol, Any, Optional
 
+from pydantic import BaseModel
+
 from src.utils.configs import FirebaseConfig
 
+
+class FileVersion(BaseModel):
+    """Storage metadata identifying one version of a file"""
+    generation: Optional[str] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    size: Optional[int] = None
+
+    def matches(self, other: Optional['FileVersion']) -> bool:
+        """Whether both describe the same version, compared by generation, then ETag"""
+        if other is None:
+            return False
+        if self.size is not None and other.size is not None and self.size != other.size:
+            return False
+        if self.generation and other.generation:
+            return self.generation == other.generation
+        if self.etag and other.etag:
+            return self.etag == other.etag
+        return False
+
+
 class FormStorageProvider(Protocol):
     """Protocol for accessing form storage (e.g. Firebase Storage)"""
     def download_file(self, path: str) -> bytes:
@@ -12,6 +35,22 @@ class FormStorageProvider(Protocol):
         """Download file contents from URL"""
         ...
 
+    def get_file_version(self, path: str) -> Optional[FileVersion]:
+        """Get the current version of a stored file without downloading it, None if unknown"""
+        ...
+
+    def get_file_from_url_if_changed(
+        self,
+        url: str,
+        version: Optional[FileVersion] = None
+    ) -> tuple[Optional[bytes], Optional[FileVersion]]:
+        """Download file contents from URL unless it still matches version
+
+        Returns:
+            The contents, None when unchanged, and the version served
+        """
+        ...
+
 class FormDatabaseProvider(Protocol):
     """Protocol for accessing form database (e.g. Firestore)"""
     def get_entity(self, entity_id: str) -> dict[str, Any]:
@@ -49,6 +88,38 @@ class FirebaseFormProvider:
         response = self.requests.get(url)
         response.raise_for_status()
         return response.content
+
+    def get_file_version(self, path: str) -> Optional[FileVersion]:
+        blob = self.bucket.get_blob(path)
+        if blob is None:
+            return None
+        return FileVersion(
+            generation=str(blob.generation) if blob.generation else None,
+            etag=blob.etag,
+            last_modified=blob.updated.isoformat() if blob.updated else None,
+            size=blob.size
+        )
+
+    def get_file_from_url_if_changed(
+        self,
+        url: str,
+        version: Optional[FileVersion] = None
+    ) -> tuple[Optional[bytes], Optional[FileVersion]]:
+        headers = {}
+        if version and version.etag:
+            headers['If-None-Match'] = version.etag
+        elif version and version.last_modified:
+            headers['If-Modified-Since'] = version.last_modified
+        response = self.requests.get(url, headers=headers)
+        if response.status_code == 304:
+            return None, version
+        response.raise_for_status()
+        return response.content, FileVersion(
+            generation=response.headers.get('x-goog-generation'),
+            etag=response.headers.get('ETag'),
+            last_modified=response.headers.get('Last-Modified'),
+            size=len(response.content)
+        )
     
     def get_entity(self, entity_id: str) -> dict[str, Any]:
         entity_doc = self.db.collection('entities').document(entity_id).get()
@@ -1,46 +1,383 @@
-from typing import Optional
-from openai import OpenAI, OpenAIError
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from typing import Callable, Optional, TypeVar, Union
+from openai import APIConnectionError, InternalServerError, OpenAI, OpenAIError, RateLimitError
 from pydantic import BaseModel, Field
 
+from src.utils import configs
+from src.utils.concurrency import AdaptiveLimiter, ConcurrencyLimiter
+from src.utils.tokens import count_tokens
+
 class LLMConfig(BaseModel):
     """Configuration for LLM client"""
     model: str = Field(default="gpt-4o", description="Model to use for completion")
     temperature: float = Field(default=0.7, description="Temperature for response generation")
     max_tokens: int = Field(default=4000, description="Maximum tokens in response")
     top_p: float = Field(default=0.9, description="Top p for response generation")
+    routes: dict[str, str] = Field(default_factory=dict, description="Model of each call site, the default model when absent")
+    escalation_model: Optional[str] = Field(default=None, description="Model retried when parsing a routed model's output fails")
+    prices: dict[str, configs.ModelPrice] = Field(default_factory=dict, description="Prices of the models, in USD per million tokens")
+    rate_limit_retries: int = Field(default=5, description="Retries of a rate limited call with an adaptive limiter")
+    deadline_seconds: Optional[float] = Field(default=None, description="Time allowed for a call, None for no deadline")
+    deadlines: dict[str, Optional[float]] = Field(default_factory=dict, description="Deadline of each call site, None for no deadline, deadline_seconds when absent")
+    hedging: bool = Field(default=False, description="Send a duplicate of calls slower than the latency quantile")
+    hedge_quantile: float = Field(default=0.95, description="Latency quantile of the model after which a call is hedged")
+    hedge_min_samples: int = Field(default=20, description="Calls to a model before its latency quantile is trusted")
+    hedge_max_ratio: float = Field(default=0.1, description="Maximum share of calls that may be hedged")
+
+# Recent latencies kept per model to compute the hedging delay
+_LATENCY_WINDOW = 200
+
+# Connection errors, timeouts and server errors are retried as often as the SDK would
+_TRANSIENT_ERRORS = (APIConnectionError, InternalServerError)
+_TRANSIENT_RETRIES = 2
+
+T = TypeVar("T")
+
+class Prompt(BaseModel):
+    """A prompt split into a stable prefix and a variable suffix
+
+    The prefix is sent as the system message and must be identical across calls
+    so that provider-side prompt caching can reuse it.
+    """
+    prefix: str = Field(..., description="Shared part of the prompt, identical across calls")
+    suffix: str = Field(..., description="Call specific part of the prompt")
+
+class ModelUsage(BaseModel):
+    """Accumulated token usage, latency and cost of calls to one model"""
+    calls: int = 0
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    completion_tokens: int = 0
+    seconds: float = 0.0
+    cost: Optional[float] = Field(default=0.0, description="Cost in USD, None when the model has no price")
+
+    @property
+    def cached_ratio(self) -> float:
+        return self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+    def to_string(self) -> str:
+        latency = self.seconds / self.calls if self.calls else 0.0
+        cost = f"${self.cost:.4f}" if self.cost is not None else "unknown cost"
+        return (
+            f"{self.calls} calls, {self.prompt_tokens} prompt tokens "
+            f"({self.cached_tokens} cached, {self.cached_ratio:.1%}), "
+            f"{self.completion_tokens} completion tokens, {latency:.2f}s per call, {cost}"
+        )
+
+class LLMUsage(ModelUsage):
+    """Accumulated usage of an LLM client, in total and per model"""
+    escalations: int = Field(default=0, description="Calls retried with the escalation model after an unparsable output")
+    hedges: int = Field(default=0, description="Duplicate requests sent for slow calls")
+    hedge_wins: int = Field(default=0, description="Hedged calls answered by the duplicate first")
+    deadlines_exceeded: int = Field(default=0, description="Calls abandoned at their deadline")
+    models: dict[str, ModelUsage] = Field(default_factory=dict)
+
+    def add(self, model: str, usage: ModelUsage) -> None:
+        """Add the usage of one call to the total and to its model"""
+        per_model = self.models.setdefault(model, ModelUsage())
+        for total in (self, per_model):
+            total.calls += usage.calls
+            total.prompt_tokens += usage.prompt_tokens
+            total.cached_tokens += usage.cached_tokens
+            total.completion_tokens += usage.completion_tokens
+            total.seconds += usage.seconds
+            total.cost = None if total.cost is None or usage.cost is None else total.cost + usage.cost
+
+    def to_string(self) -> str:
+        lines = [
+            f"{super().to_string()}, {self.escalations} escalations, "
+            f"{self.hedges} hedges ({self.hedge_wins} won), {self.deadlines_exceeded} deadlines exceeded"
+        ]
+        lines.extend(f"  {model}: {usage.to_string()}" for model, usage in self.models.items())
+        return "\n".join(lines)
 
 class LLMClient:
     """Client for interacting with OpenAI's LLM API"""
-    
-    def __init__(self, api_key: str, config: Optional[LLMConfig] = None):
-        """Initialize LLM client with API key and optional configuration"""
+
+    def __init__(
+        self,
+        api_key: str,
+        config: Optional[LLMConfig] = None,
+        limiter: Optional[ConcurrencyLimiter] = None
+    ):
+        """Initialize LLM client with API key, optional configuration and an optional
+        limiter capping concurrent calls across workers"""
+        self._adaptive = isinstance(limiter, AdaptiveLimiter)
         self._client = OpenAI(api_key=api_key)
+        # Used when _create retries itself: an adaptive limiter retries rate limited calls after
+        # pausing the model's callers, and calls with a deadline bound every attempt by it
+        self._single_attempt_client = self._client.with_options(max_retries=0)
         self._config = config or LLMConfig()
-    
-    def complete(self, prompt: str) -> str:
+        self._limiter = limiter
+        self.usage = LLMUsage()
+        self._usage_lock = threading.Lock()
+        self._latencies: dict[str, deque] = defaultdict(lambda: deque(maxlen=_LATENCY_WINDOW))
+        self._requests = 0
+        # Threads are started on the first call with a deadline or hedging
+        self._executor = ThreadPoolExecutor(thread_name_prefix="llm")
+
+    @classmethod
+    def from_config(
+        cls,
+        config: configs.LLMConfig,
+        limiter: Optional[ConcurrencyLimiter] = None
+    ) -> 'LLMClient':
+        """Create a client from the application LLM configuration"""
+        return cls(
+            api_key=config.api_key,
+            config=LLMConfig(**config.model_dump(exclude={'api_key'}, exclude_none=True)),
+            limiter=limiter
+        )
+
+    def reset_usage(self) -> LLMUsage:
+        """Reset the accumulated usage and return the previous value"""
+        with self._usage_lock:
+            usage, self.usage = self.usage, LLMUsage()
+            self._requests = 0
+        return usage
+
+    def _build_messages(self, prompt: Union[str, Prompt]) -> list[dict[str, str]]:
+        if isinstance(prompt, Prompt):
+            return [
+                {"role": "system", "content": prompt.prefix},
+                {"role": "user", "content": prompt.suffix}
+            ]
+        return [{"role": "system", "content": prompt}]
+
+    def _cost(self, model: str, usage: ModelUsage) -> Optional[float]:
+        price = self._config.prices.get(model)
+        if price is None:
+            return None
+        cached_price = price.input if price.cached_input is None else price.cached_input
+        return (
+            (usage.prompt_tokens - usage.cached_tokens) * price.input
+            + usage.cached_tokens * cached_price
+            + usage.completion_tokens * price.output
+        ) / 1_000_000
+
+    def _record_usage(self, model: str, response, seconds: float) -> None:
+        usage = getattr(response, "usage", None)
+        details = getattr(usage, "prompt_tokens_details", None) if usage else None
+        call = ModelUsage(
+            calls=1,
+            prompt_tokens=(usage.prompt_tokens or 0) if usage else 0,
+            cached_tokens=(getattr(details, "cached_tokens", 0) or 0) if details else 0,
+            completion_tokens=(usage.completion_tokens or 0) if usage else 0,
+            seconds=seconds
+        )
+        call.cost = self._cost(model, call)
+        with self._usage_lock:
+            self.usage.add(model, call)
+            self._latencies[model].append(seconds)
+
+    def _estimate_tokens(self, messages: list[dict[str, str]], model: str) -> int:
+        """Tokens counted against the rate limit, the prompt plus the completion allowance"""
+        prompt_tokens = sum(count_tokens(message["content"], model) for message in messages)
+        return prompt_tokens + (self._config.max_tokens or 0)
+
+    def _slot(self, model: str, tokens: int):
+        if self._adaptive:
+            return self._limiter.slot(model, tokens)
+        return self._limiter.slot() if self._limiter else nullcontext()
+
+    def _create(self, model: str, messages: list[dict[str, str]], expires_at: Optional[float] = None):
+        """Send a completion request through the limiter, returning the response and its latency
+
+        Without an adaptive limiter or a deadline the SDK retries failed requests.
+        Otherwise the retries are made here: rate limits through the adaptive
+        limiter, and connection, server and (without an adaptive limiter) rate
+        limit errors after a short backoff. Each attempt is then bounded by the
+        time left before expires_at, so a call abandoned at its deadline does not
+        keep running or holding its slot.
+        """
+        request = dict(
+            model=model,
+            messages=messages,
+            temperature=self._config.temperature,
+            max_tokens=self._config.max_tokens,
+            top_p=self._config.top_p
+        )
+        if not self._adaptive and expires_at is None:
+            with self._slot(model, 0):
+                started = time.monotonic()
+                response = self._client.chat.completions.create(**request)
+                return response, time.monotonic() - started
+
+        tokens = self._estimate_tokens(messages, model) if self._adaptive else 0
+        rate_limited = failures = 0
+        while True:
+            try:
+                with self._slot(model, tokens):
+                    if expires_at is not None:
+                        request["timeout"] = expires_at - time.monotonic()
+                        if request["timeout"] <= 0:
+                            raise TimeoutError(f"{model} call reached its deadline before it was sent")
+                    started = time.monotonic()
+                    raw = self._single_attempt_client.chat.completions.with_raw_response.create(**request)
+                    seconds = time.monotonic() - started
+                if self._adaptive:
+                    self._limiter.record_response(model, raw.headers)
+                return raw.parse(), seconds
+            except RateLimitError as e:
+                if not self._adaptive:
+                    error = e
+                else:
+                    self._limiter.record_rate_limited(model, e.response.headers)
+                    if rate_limited == self._config.rate_limit_retries:
+                        raise
+                    rate_limited += 1
+                    print(f"Rate limited by the provider, retrying ({rate_limited}/{self._config.rate_limit_retries})")
+                    continue
+            except _TRANSIENT_ERRORS as e:
+                error = e
+            if expires_at is not None and time.monotonic() >= expires_at:
+                raise TimeoutError(f"{model} call reached its deadline") from error
+            delay = min(0.5 * 2 ** failures, 8)
+            if failures == _TRANSIENT_RETRIES or (expires_at is not None and time.monotonic() + delay >= expires_at):
+                raise error
+            failures += 1
+            print(f"LLM request failed ({error}), retrying ({failures}/{_TRANSIENT_RETRIES})")
+            time.sleep(delay)
+
+    def _call(self, model: str, messages: list[dict[str, str]], expires_at: Optional[float] = None):
+        response, seconds = self._create(model, messages, expires_at)
+        self._record_usage(model, response, seconds)
+        return response
+
+    def _hedge_delay(self, model: str) -> Optional[float]:
+        """Latency quantile of the model, None while hedging is off or the history is too short"""
+        if not self._config.hedging:
+            return None
+        with self._usage_lock:
+            latencies = sorted(self._latencies[model])
+        if len(latencies) < self._config.hedge_min_samples:
+            return None
+        return latencies[int(self._config.hedge_quantile * (len(latencies) - 1))]
+
+    def _call_with_deadline(self, model: str, messages: list[dict[str, str]], deadline: Optional[float]):
+        """Send a request, hedged with a duplicate when it is slower than usual
+
+        The first successful response wins; the other request is left to finish
+        in the background and its usage is still recorded. A call still running
+        at its deadline is abandoned with a TimeoutError, its requests time out
+        at the same deadline.
+        """
+        with self._usage_lock:
+            self._requests += 1
+        hedge_delay = self._hedge_delay(model)
+        if deadline is None and hedge_delay is None:
+            return self._call(model, messages)
+
+        started = time.monotonic()
+        expires_at = started + deadline if deadline is not None else None
+        primary = self._executor.submit(self._call, model, messages, expires_at)
+        pending: set[Future] = {primary}
+        errors = []
+        while pending:
+            elapsed = time.monotonic() - started
+            waits = [deadline - elapsed] if deadline is not None else []
+            if hedge_delay is not None:
+                waits.append(hedge_delay - elapsed)
+            done, pending = wait(pending, timeout=max(min(waits), 0) if waits else None, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is not primary:
+                        with self._usage_lock:
+                            self.usage.hedge_wins += 1
+                    return future.result()
+                errors.append(future.exception())
+            if not pending:
+                break
+            elapsed = time.monotonic() - started
+            if deadline is not None and elapsed >= deadline:
+                with self._usage_lock:
+                    self.usage.deadlines_exceeded += 1
+                raise TimeoutError(f"{model} call exceeded its {deadline:g}s deadline")
+            if hedge_delay is not None and elapsed >= hedge_delay:
+                # Hedge at most once per call and within the share of traffic allowed
+                with self._usage_lock:
+                    hedge = self.usage.hedges + 1 <= self._config.hedge_max_ratio * self._requests
+                    if hedge:
+                        self.usage.hedges += 1
+                if hedge:
+                    pending.add(self._executor.submit(self._call, model, messages, expires_at))
+                hedge_delay = None
+        if isinstance(errors[0], TimeoutError):
+            with self._usage_lock:
+                self.usage.deadlines_exceeded += 1
+        raise errors[0]
+
+    def deadline_for(self, call_site: Optional[str]) -> Optional[float]:
+        """Deadline of a call site, the default deadline for unknown ones"""
+        return self._config.deadlines.get(call_site, self._config.deadline_seconds) if call_site else self._config.deadline_seconds
+
+    def model_for(self, call_site: Optional[str]) -> str:
+        """Model routed to a call site, the default model for unknown ones"""
+        return self._config.routes.get(call_site, self._config.model) if call_site else self._config.model
+
+    def complete(
+        self,
+        prompt: Union[str, Prompt],
+        call_site: Optional[str] = None,
+        model: Optional[str] = None
+    ) -> str:
         """
         Get completion from LLM
-        
+
         Args:
-            prompt: The prompt to send to the LLM
-            
+            prompt: The prompt to send to the LLM, either a single string or a
+                prefix/suffix Prompt sent as system and user messages
+            call_site: Name of the calling step, selecting its model from the routes
+            model: Model to use instead of the routed one
+
         Returns:
             The LLM's response as a string
-            
+
         Raises:
             OpenAIError: If there's an error communicating with the API
         """
+        model = model or self.model_for(call_site)
         try:
-            response = self._client.chat.completions.create(
-                model=self._config.model,
-                messages=[
-                    {"role": "system", "content": prompt}
-                ],
-                temperature=self._config.temperature,
-                max_tokens=self._config.max_tokens,
-                top_p=self._config.top_p
-            )
+            response = self._call_with_deadline(model, self._build_messages(prompt), self.deadline_for(call_site))
             return response.choices[0].message.content
         except OpenAIError as e:
             print(f"Error getting completion: {e}")
-            raise
\ No newline at end of file
+            raise
+
+    def complete_parsed(
+        self,
+        prompt: Union[str, Prompt],
+        parse: Callable[[str], T],
+        call_site: Optional[str] = None
+    ) -> T:
+        """
+        Get a completion from the model routed to a call site and parse it,
+        escalating to the larger model when the output cannot be parsed
+
+        Args:
+            prompt: The prompt to send to the LLM
+            parse: Parses the response, raising ValueError, KeyError or IndexError on malformed output
+            call_site: Name of the calling step, selecting its model from the routes
+
+        Returns:
+            The parsed response
+
+        Raises:
+            ValueError, KeyError, IndexError: If the output of the escalation model cannot be parsed either
+            OpenAIError: If there's an error communicating with the API
+        """
+        model = self.model_for(call_site)
+        escalation_model = self._config.escalation_model or self._config.model
+        try:
+            return parse(self.complete(prompt, call_site, model=model))
+        except (ValueError, KeyError, IndexError) as e:
+            if model == escalation_model:
+                raise
+            print(f"Unparsable {call_site} output from {model} ({e}), retrying with {escalation_model}")
+            with self._usage_lock:
+                self.usage.escalations += 1
+        return parse(self.complete(prompt, call_site, model=escalation_model))
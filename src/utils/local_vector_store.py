@@ -0,0 +1,251 @@
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+from qdrant_client.http import models as qdrant_models
+
+from src.utils.models import QdrantPoint
+from src.utils.qdrant_access import QdrantAccess, QdrantFilter
+
+_INITIAL_CAPACITY = 1024
+
+
+class _VectorFile:
+    """Growable memory-mapped float32 matrix of unit-normalized vectors"""
+
+    def __init__(self, path: Path, dim: int):
+        self.path = path
+        self.dim = dim
+        self.capacity = 0
+        self.vectors: Optional[np.memmap] = None
+        if path.exists():
+            self._map(path.stat().st_size // (4 * dim))
+
+    def _map(self, capacity: int):
+        self.vectors = None
+        with open(self.path, "ab") as f:
+            f.truncate(capacity * self.dim * 4)
+        self.capacity = capacity
+        self.vectors = np.memmap(self.path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+
+    def ensure(self, rows: int):
+        """Make sure the file can hold at least the given number of rows"""
+        if rows <= self.capacity:
+            return
+        # Another process may have grown the file already
+        on_disk = self.path.stat().st_size // (4 * self.dim) if self.path.exists() else 0
+        if rows <= on_disk:
+            self._map(on_disk)
+            return
+        capacity = max(self.capacity, _INITIAL_CAPACITY)
+        while capacity < rows:
+            capacity *= 2
+        self._map(capacity)
+
+    def write(self, row: int, vector: list[float]):
+        self.ensure(row + 1)
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        self.vectors[row] = array / norm if norm else array
+
+    def flush(self):
+        if self.vectors is not None:
+            self.vectors.flush()
+
+
+class LocalVectorStore(QdrantAccess):
+    """In-process implementation of QdrantAccess
+
+    Vectors are kept unit-normalized in a memory-mapped NumPy file per collection and
+    payloads in SQLite, so search is an exact cosine similarity (a dot product) over
+    the rows matching the filter. Filters built by DefaultQdrantFilter (`must` field
+    conditions with MatchValue / MatchAny) are translated to SQL on the JSON payload.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(self.path / "payloads.sqlite", check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS collections (
+                name TEXT PRIMARY KEY,
+                vector_size INTEGER NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS points (
+                collection TEXT NOT NULL,
+                id TEXT NOT NULL,
+                row INTEGER NOT NULL,
+                entity_id TEXT,
+                payload TEXT NOT NULL,
+                PRIMARY KEY (collection, id)
+            );
+            CREATE INDEX IF NOT EXISTS points_entity ON points (collection, entity_id);
+        """)
+        self._files: dict[str, _VectorFile] = {}
+
+    def _vector_file(self, collection: str) -> _VectorFile:
+        if collection not in self._files:
+            row = self._db.execute(
+                "SELECT vector_size FROM collections WHERE name = ?", (collection,)
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"Collection {collection} not found")
+            self._files[collection] = _VectorFile(self.path / f"{collection}.f32", row[0])
+        return self._files[collection]
+
+    def collection_exists(self, collection: str) -> bool:
+        with self._lock:
+            return self._db.execute(
+                "SELECT 1 FROM collections WHERE name = ?", (collection,)
+            ).fetchone() is not None
+
+    def create_collection(self, collection: str, vector_size: int, recreate: bool = False):
+        """Create a collection, optionally dropping an existing one"""
+        with self._lock, self._db:
+            if recreate:
+                self._db.execute("DELETE FROM points WHERE collection = ?", (collection,))
+                self._db.execute("DELETE FROM collections WHERE name = ?", (collection,))
+                self._files.pop(collection, None)
+                (self.path / f"{collection}.f32").unlink(missing_ok=True)
+            self._db.execute(
+                "INSERT OR IGNORE INTO collections (name, vector_size) VALUES (?, ?)",
+                (collection, vector_size)
+            )
+
+    def upsert(self, collection: str, points: list[qdrant_models.PointStruct]):
+        """Insert or replace points by id"""
+        with self._lock, self._db:
+            vector_file = self._vector_file(collection)
+            count = self._db.execute(
+                "SELECT count FROM collections WHERE name = ?", (collection,)
+            ).fetchone()[0]
+            for point in points:
+                point_id = str(point.id)
+                existing = self._db.execute(
+                    "SELECT row FROM points WHERE collection = ? AND id = ?", (collection, point_id)
+                ).fetchone()
+                if existing:
+                    row = existing[0]
+                else:
+                    row, count = count, count + 1
+                vector_file.write(row, point.vector)
+                payload = point.payload or {}
+                self._db.execute(
+                    "INSERT OR REPLACE INTO points (collection, id, row, entity_id, payload) VALUES (?, ?, ?, ?, ?)",
+                    (collection, point_id, row, payload.get("entity_id"), json.dumps(payload))
+                )
+            vector_file.flush()
+            self._db.execute("UPDATE collections SET count = ? WHERE name = ?", (count, collection))
+
+    def delete_entity_points(self, collection: str, entity_id: str, keep_ids: list[str] = ()):
+        """Delete the points of an entity, except the given ids
+
+        Rows of deleted points stay allocated in the vector file.
+        """
+        keep_ids = [str(point_id) for point_id in keep_ids]
+        with self._lock, self._db:
+            self._db.execute(
+                f"DELETE FROM points WHERE collection = ? AND entity_id = ? "
+                f"AND id NOT IN ({', '.join('?' * len(keep_ids))})",
+                (collection, entity_id, *keep_ids)
+            )
+
+    @staticmethod
+    def _condition_to_sql(condition: Any) -> tuple[str, list[Any]]:
+        if not isinstance(condition, qdrant_models.FieldCondition):
+            raise ValueError(f"Unsupported filter condition: {condition}")
+        column = "entity_id" if condition.key == "entity_id" else f"json_extract(payload, '$.\"{condition.key}\"')"
+        match = condition.match
+        if isinstance(match, qdrant_models.MatchValue):
+            return f"{column} = ?", [match.value]
+        if isinstance(match, qdrant_models.MatchAny):
+            if not match.any:
+                return "0", []
+            return f"{column} IN ({', '.join('?' * len(match.any))})", list(match.any)
+        raise ValueError(f"Unsupported match type: {match}")
+
+    def _where(self, collection: str, filters: Optional[QdrantFilter]) -> tuple[str, list[Any]]:
+        clauses, params = ["collection = ?"], [collection]
+        built = filters.build() if filters else None
+        if built is not None:
+            if built.should or built.must_not:
+                raise ValueError("Only `must` filter conditions are supported")
+            for condition in built.must or []:
+                clause, values = self._condition_to_sql(condition)
+                clauses.append(clause)
+                params.extend(values)
+        return " AND ".join(clauses), params
+
+    def has_sparse_vectors(self, collection: str) -> bool:
+        return False
+
+    def search(
+        self,
+        collection: str,
+        query_vector: list[float],
+        filters: Optional[QdrantFilter] = None,
+        limit: Optional[int] = None,
+        score_threshold: Optional[float] = None,
+        tenant_id: Optional[str] = None,
+        sparse_vector: Optional[qdrant_models.SparseVector] = None
+    ) -> list[QdrantPoint]:
+        # Sparse vectors are not stored, the search is dense only
+        with self._lock:
+            where, params = self._where(collection, filters)
+            rows = self._db.execute(f"SELECT row, payload FROM points WHERE {where}", params).fetchall()
+            if not rows:
+                return []
+
+            vector_file = self._vector_file(collection)
+            vector_file.ensure(max(row for row, _ in rows) + 1)
+            indices = np.fromiter((row for row, _ in rows), dtype=np.int64, count=len(rows))
+            vectors = vector_file.vectors[indices]
+
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        scores = vectors @ (query / norm if norm else query)
+
+        order = np.argsort(-scores, kind="stable")
+        if score_threshold is not None:
+            order = order[scores[order] >= score_threshold]
+        if limit is not None:
+            order = order[:limit]
+
+        return [
+            QdrantPoint(
+                payload=json.loads(rows[i][1]),
+                vector=vectors[i].tolist(),
+                score=float(scores[i])
+            ) for i in order
+        ]
+
+    def filter(
+        self,
+        collection: str,
+        filters: QdrantFilter,
+        limit: Optional[int] = None,
+        tenant_id: Optional[str] = None
+    ) -> list[QdrantPoint]:
+        with self._lock:
+            where, params = self._where(collection, filters)
+            query = f"SELECT row, payload FROM points WHERE {where} ORDER BY row"
+            if limit is not None:
+                query += f" LIMIT {int(limit)}"
+            rows = self._db.execute(query, params).fetchall()
+            if not rows:
+                return []
+
+            vector_file = self._vector_file(collection)
+            vector_file.ensure(max(row for row, _ in rows) + 1)
+            return [
+                QdrantPoint(
+                    payload=json.loads(payload),
+                    vector=vector_file.vectors[row].tolist()
+                ) for row, payload in rows
+            ]
@@ -0,0 +1,138 @@
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+
+# Libraries reading these variables at import time
+_EARLY_IMPORTS = ("huggingface_hub", "transformers", "fastembed", "docling")
+
+
+class CachedFile(BaseModel):
+    size: int
+    sha256: str
+
+
+class CacheManifest(BaseModel):
+    """Checksums of every file in the model cache, written by the warmup command"""
+    models: list[str] = Field(default_factory=list)
+    files: dict[str, CachedFile] = Field(default_factory=dict)
+    created_at: float = Field(default_factory=time.time)
+
+
+def read_model_cache_settings(config_path: Optional[Path] = None) -> tuple[Optional[Path], bool]:
+    """Read the cache directory and offline mode without loading the configuration
+
+    Loading AppConfig imports qdrant_client, which imports fastembed and
+    huggingface_hub, so the cache has to be configured from the raw settings.
+
+    Args:
+        config_path: JSON config file, None reads the environment like AppConfig.from_env
+
+    Returns:
+        Cache directory and whether downloads are disabled
+    """
+    if config_path is not None:
+        with open(config_path) as f:
+            models = json.load(f).get("models") or {}
+        cache_dir = models.get("cache_dir")
+        return (Path(cache_dir) if cache_dir else None), bool(models.get("offline", False))
+
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    cache_dir = os.getenv('MODEL_CACHE_DIR')
+    return (Path(cache_dir) if cache_dir else None), os.getenv('MODEL_OFFLINE', '').lower() in ('1', 'true', 'yes')
+
+
+def configure_model_cache(cache_dir: Optional[Path], offline: bool = False):
+    """Point Hugging Face, FastEmbed and transformers at the model cache
+
+    Must run before those libraries are imported, as some of them read the
+    environment once on import.
+    """
+    environment = {}
+    if cache_dir is not None:
+        cache_dir = cache_dir.resolve()
+        environment["HF_HOME"] = str(cache_dir / "huggingface")
+        environment["HF_HUB_CACHE"] = str(cache_dir / "huggingface" / "hub")
+        environment["FASTEMBED_CACHE_PATH"] = str(cache_dir / "fastembed")
+    if offline:
+        environment["HF_HUB_OFFLINE"] = "1"
+        environment["TRANSFORMERS_OFFLINE"] = "1"
+        environment["HF_DATASETS_OFFLINE"] = "1"
+
+    changed = {name: value for name, value in environment.items() if os.environ.get(name) != value}
+    if not changed:
+        return
+    imported = [name for name in _EARLY_IMPORTS if name in sys.modules]
+    if imported:
+        logger.warning(f"Model cache configured after importing {', '.join(imported)}, it may be ignored")
+    os.environ.update(changed)
+
+
+def file_sha256(path: Path, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _cached_files(cache_dir: Path) -> list[Path]:
+    """Files of the cache, Hugging Face blobs are reached through their snapshot links"""
+    return sorted(
+        path for path in cache_dir.rglob("*")
+        if path.is_file() and path.name != MANIFEST_NAME
+        and "blobs" not in path.relative_to(cache_dir).parts
+        and not any(part.startswith(".") for part in path.relative_to(cache_dir).parts)
+    )
+
+
+def build_manifest(cache_dir: Path, models: list[str]) -> CacheManifest:
+    """Checksum every file of the cache and write the manifest next to them"""
+    manifest = CacheManifest(models=models)
+    for path in _cached_files(cache_dir):
+        manifest.files[str(path.relative_to(cache_dir))] = CachedFile(
+            size=path.stat().st_size,
+            sha256=file_sha256(path)
+        )
+    (cache_dir / MANIFEST_NAME).write_text(manifest.model_dump_json(indent=2))
+    return manifest
+
+
+def load_manifest(cache_dir: Path) -> Optional[CacheManifest]:
+    path = cache_dir / MANIFEST_NAME
+    if not path.exists():
+        return None
+    return CacheManifest(**json.loads(path.read_text()))
+
+
+def verify_manifest(cache_dir: Path) -> list[str]:
+    """Compare the cache with its manifest
+
+    Returns:
+        Description of every missing, truncated or corrupted file, empty when the cache is intact
+    """
+    manifest = load_manifest(cache_dir)
+    if manifest is None:
+        return [f"No manifest in {cache_dir}, run the warmup command"]
+    problems = []
+    for name, expected in manifest.files.items():
+        path = cache_dir / name
+        if not path.exists():
+            problems.append(f"Missing {name}")
+        elif path.stat().st_size != expected.size:
+            problems.append(f"Size mismatch for {name}")
+        elif file_sha256(path) != expected.sha256:
+            problems.append(f"Checksum mismatch for {name}")
+    return problems
@@ -0,0 +1,260 @@
+import ctypes
+import gc
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator, Optional
+
+from pydantic import BaseModel
+
+from src.utils.configs import ModelConfig
+
+try:
+    import psutil
+except ImportError:  # pragma: no cover - optional dependency
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+_MB = 1024 * 1024
+
+
+def process_rss_bytes() -> Optional[int]:
+    """Resident set size of the current process, None when it cannot be measured"""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def available_memory_bytes() -> Optional[int]:
+    """Memory available to new allocations on the system, None when it cannot be measured"""
+    if psutil is not None:
+        return psutil.virtual_memory().available
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _release_memory():
+    """Return freed memory to the system after unloading a model"""
+    gc.collect()
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_available():
+        torch.cuda.empty_cache()
+    try:
+        # glibc keeps freed arenas mapped unless asked to trim them
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+class ModelStats(BaseModel):
+    """Memory and usage statistics of a registered model"""
+    name: str
+    loaded: bool
+    in_use: int
+    loads: int
+    rss_mb: Optional[float] = None
+    idle_seconds: Optional[float] = None
+
+
+@dataclass
+class _Entry:
+    loader: Callable[[], Any]
+    model: Any = None
+    loaded: bool = False
+    in_use: int = 0
+    loads: int = 0
+    last_used: float = 0.0
+    rss_bytes: Optional[int] = None
+    load_lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class ModelRegistry:
+    """Loads models on demand and unloads them when idle or under memory pressure
+
+    Models are registered with a loader and loaded on first use. A background
+    thread unloads models unused for idle_unload_seconds, and least recently used
+    models are unloaded while the process exceeds max_rss_mb or the system falls
+    below min_available_mb. A model is never unloaded while it is in use.
+
+    The RSS of a model is measured as the growth of the process RSS while loading
+    it, so it is an estimate when several models load concurrently.
+    """
+
+    def __init__(self, config: Optional[ModelConfig] = None):
+        self.config = config or ModelConfig()
+        self._entries: dict[str, _Entry] = {}
+        self._lock = threading.RLock()
+        self._monitor: Optional[threading.Thread] = None
+        self._monitor_pid: Optional[int] = None
+
+    def register(self, name: str, loader: Callable[[], Any]):
+        """Register a model loader, keeping an existing registration of the same name"""
+        with self._lock:
+            self._entries.setdefault(name, _Entry(loader=loader))
+
+    def _load(self, name: str, entry: _Entry) -> Any:
+        self._relieve_pressure(exclude=name)
+        before = process_rss_bytes()
+        started = time.monotonic()
+        model = entry.loader()
+        after = process_rss_bytes()
+        entry.loads += 1
+        entry.rss_bytes = after - before if before is not None and after is not None else None
+        rss = f", {entry.rss_bytes / _MB:.0f} MB" if entry.rss_bytes is not None else ""
+        logger.info(f"Loaded model {name} in {time.monotonic() - started:.1f}s{rss}")
+        return model
+
+    def get(self, name: str) -> Any:
+        """Return a model, loading it if needed
+
+        Prefer use() while running inference so the model cannot be unloaded meanwhile.
+        """
+        with self.use(name) as model:
+            return model
+
+    @contextmanager
+    def use(self, name: str) -> Iterator[Any]:
+        """Hold a model for the duration of the block, loading it if needed"""
+        self._ensure_monitor()
+        with self._lock:
+            entry = self._entries[name]
+        # Loading only blocks users of the same model
+        with entry.load_lock:
+            loading = not entry.loaded
+            model = self._load(name, entry) if loading else None
+            with self._lock:
+                if loading:
+                    entry.model, entry.loaded = model, True
+                entry.in_use += 1
+                entry.last_used = time.monotonic()
+                model = entry.model
+        try:
+            yield model
+        finally:
+            with self._lock:
+                entry.in_use -= 1
+                entry.last_used = time.monotonic()
+
+    def unload(self, name: str) -> bool:
+        """Unload a model unless it is in use or being acquired, returning whether it was unloaded"""
+        with self._lock:
+            entry = self._entries[name]
+        # use() checks and claims a loaded model under load_lock, so it cannot get one unloaded meanwhile
+        if not entry.load_lock.acquire(blocking=False):
+            return False
+        try:
+            with self._lock:
+                if not entry.loaded or entry.in_use:
+                    return False
+                entry.model = None
+                entry.loaded = False
+        finally:
+            entry.load_lock.release()
+        _release_memory()
+        logger.info(f"Unloaded model {name}")
+        return True
+
+    def preload(self, names: Optional[list[str]] = None):
+        """Load models ahead of use, all registered models by default"""
+        for name in names or list(self._entries):
+            self.get(name)
+
+    def prepare_fork(self, names: Optional[list[str]] = None):
+        """Load models and freeze the heap before forking worker processes
+
+        Forked workers share the loaded weights copy-on-write. gc.freeze moves every
+        object to a permanent generation, so the collector of the children does not
+        write to (and thereby copy) the pages holding them.
+        """
+        self.preload(names)
+        gc.collect()
+        gc.freeze()
+
+    def unload_idle(self) -> list[str]:
+        """Unload models idle for longer than idle_unload_seconds"""
+        if self.config.idle_unload_seconds is None:
+            return []
+        now = time.monotonic()
+        with self._lock:
+            idle = [
+                name for name, entry in self._entries.items()
+                if entry.loaded and not entry.in_use
+                and now - entry.last_used > self.config.idle_unload_seconds
+            ]
+        return [name for name in idle if self.unload(name)]
+
+    def _under_pressure(self) -> bool:
+        if self.config.max_rss_mb is not None:
+            rss = process_rss_bytes()
+            if rss is not None and rss > self.config.max_rss_mb * _MB:
+                return True
+        if self.config.min_available_mb is not None:
+            available = available_memory_bytes()
+            if available is not None and available < self.config.min_available_mb * _MB:
+                return True
+        return False
+
+    def _relieve_pressure(self, exclude: Optional[str] = None) -> list[str]:
+        """Unload least recently used models while memory is under pressure"""
+        unloaded = []
+        while self._under_pressure():
+            with self._lock:
+                candidates = sorted(
+                    (entry.last_used, name) for name, entry in self._entries.items()
+                    if entry.loaded and not entry.in_use and name != exclude
+                )
+            if not candidates or not self.unload(candidates[0][1]):
+                break
+            unloaded.append(candidates[0][1])
+        return unloaded
+
+    def _ensure_monitor(self):
+        if self.config.idle_unload_seconds is None and self.config.max_rss_mb is None \
+                and self.config.min_available_mb is None:
+            return
+        # Threads do not survive fork, restart the monitor in forked workers
+        if self._monitor is not None and self._monitor_pid == os.getpid():
+            return
+        self._monitor_pid = os.getpid()
+        self._monitor = threading.Thread(target=self._watch, name="model-registry", daemon=True)
+        self._monitor.start()
+
+    def _watch(self):
+        while True:
+            time.sleep(self.config.check_interval_seconds)
+            try:
+                self.unload_idle()
+                self._relieve_pressure()
+            except Exception:
+                logger.exception("Model registry check failed")
+
+    def stats(self) -> list[ModelStats]:
+        """Statistics of every registered model"""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                ModelStats(
+                    name=name,
+                    loaded=entry.loaded,
+                    in_use=entry.in_use,
+                    loads=entry.loads,
+                    rss_mb=entry.rss_bytes / _MB if entry.loaded and entry.rss_bytes is not None else None,
+                    idle_seconds=now - entry.last_used if entry.loaded and not entry.in_use else None
+                )
+                for name, entry in self._entries.items()
+            ]
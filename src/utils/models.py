@@ -1,6 +1,9 @@
+import hashlib
 from typing import Any, Literal, Optional
 from pydantic import BaseModel, Field
 
+from src.utils.tokens import count_tokens, truncate_to_tokens
+
 
 QuestionType = Literal["text", "table", "document", "number", "date", "boolean"]
 
@@ -100,6 +103,11 @@ class EnhancedContentSection(BaseModel):
     analysis: str
     actionable_gap_analysis: str
     
+    def content_hash(self) -> str:
+        """Hash of the section content, used to detect profile changes"""
+        content = "\x1f".join([self.title, self.summary, self.notes, self.analysis, self.actionable_gap_analysis])
+        return hashlib.sha256(content.encode()).hexdigest()[:16]
+    
     def to_string(self) -> str:
         return f"### {self.title}\n**Summary:**\n{self.summary}\n**Notes:**\n{self.notes}\n**Analysis:**\n{self.analysis}\n"
 
@@ -123,5 +131,24 @@ class SearchResult(BaseModel):
     """Represents search results for profile sections"""
     sections: list[ProfileSection]
     
-    def to_string(self) -> str:
-        return "\n".join([section.to_string() for section in self.sections])
+    def to_string(self, max_tokens: Optional[int] = None) -> str:
+        """Render the sections, keeping at most max_tokens tokens
+        
+        Sections are kept in ranking order; the first section that does not fit
+        is truncated and the rest are dropped.
+        """
+        if max_tokens is None:
+            return "\n".join([section.to_string() for section in self.sections])
+        
+        parts = []
+        remaining = max_tokens
+        for section in self.sections:
+            text = section.to_string()
+            tokens = count_tokens(text)
+            if tokens > remaining:
+                if remaining > 0:
+                    parts.append(truncate_to_tokens(text, remaining))
+                break
+            parts.append(text)
+            remaining -= tokens
+        return "\n".join(parts)
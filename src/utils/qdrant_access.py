@@ -1,8 +1,10 @@
 from typing import Protocol, Any, Optional, Sequence
 from qdrant_client import QdrantClient
 from qdrant_client.http import models as qdrant_models
-from src.utils.configs import QdrantConfig
+from src.utils.configs import QdrantConfig, QdrantCollectionConfig
 from src.utils.models import QdrantPoint
+from src.utils.qdrant_clients import qdrant_client
+from src.utils.qdrant_schema import SPARSE_VECTOR_NAME, has_sparse_vectors
 
 class QdrantFilter(Protocol):
     """Protocol for Qdrant filters"""
@@ -30,16 +32,29 @@ class QdrantAccess(Protocol):
         query_vector: list[float],
         filters: Optional[QdrantFilter] = None,
         limit: Optional[int] = None,
-        score_threshold: Optional[float] = None
+        score_threshold: Optional[float] = None,
+        tenant_id: Optional[str] = None,
+        sparse_vector: Optional[qdrant_models.SparseVector] = None
     ) -> list[QdrantPoint]:
-        """Search points by vector similarity"""
+        """Search points by vector similarity
+        
+        tenant_id is the entity the search is scoped to, used to route the
+        request to its shard when the collection is partitioned by entity.
+        With a sparse_vector, the dense and sparse rankings are fused; backends
+        without sparse vectors ignore it.
+        """
+        ...
+    
+    def has_sparse_vectors(self, collection: str) -> bool:
+        """Whether searches of the collection can use a sparse_vector"""
         ...
     
     def filter(
         self,
         collection: str,
         filters: QdrantFilter,
-        limit: Optional[int] = None
+        limit: Optional[int] = None,
+        tenant_id: Optional[str] = None
     ) -> list[QdrantPoint]:
         """Get points matching filter criteria"""
         ...
@@ -74,10 +89,40 @@ class DefaultQdrantFilter:
     def build(self) -> qdrant_models.Filter:
         return qdrant_models.Filter(must=self.conditions) if self.conditions else None
 
+def _dense_vector(vector: Any) -> list[float]:
+    """The unnamed dense vector of a point, returned in a dict next to named vectors"""
+    return vector.get("", []) if isinstance(vector, dict) else vector
+
 class QdrantProvider:
     """Default implementation of Qdrant access"""
-    def __init__(self, config: Optional[QdrantConfig] = None):
-        self.client = QdrantClient(**config.model_dump(exclude={'collection'}))
+    def __init__(self, config: Optional[QdrantConfig] = None, client: Optional[QdrantClient] = None):
+        self.client = client or qdrant_client(config)
+        self.search_params = self._search_params(config.collection) if config else None
+        self.collection_config = config.collection if config else None
+        self._sparse_collections: dict[str, bool] = {}
+    
+    @staticmethod
+    def _search_params(collection: QdrantCollectionConfig) -> Optional[qdrant_models.SearchParams]:
+        """Search-time HNSW and quantization parameters from the collection config"""
+        quantization = None
+        if collection.quantization:
+            quantization = qdrant_models.QuantizationSearchParams(
+                rescore=collection.quantization_rescore,
+                oversampling=collection.quantization_oversampling
+            )
+        if collection.search_hnsw_ef is None and quantization is None:
+            return None
+        return qdrant_models.SearchParams(hnsw_ef=collection.search_hnsw_ef, quantization=quantization)
+    
+    def has_sparse_vectors(self, collection: str) -> bool:
+        if collection not in self._sparse_collections:
+            self._sparse_collections[collection] = has_sparse_vectors(self.client, collection)
+        return self._sparse_collections[collection]
+    
+    def _shard_key(self, tenant_id: Optional[str]) -> Optional[str]:
+        if tenant_id is None or self.collection_config is None:
+            return None
+        return self.collection_config.shard_key(tenant_id)
     
     def search(
         self,
@@ -85,23 +130,54 @@ class QdrantProvider:
         query_vector: list[float],
         filters: Optional[QdrantFilter] = None,
         limit: Optional[int] = None,
-        score_threshold: Optional[float] = None
+        score_threshold: Optional[float] = None,
+        tenant_id: Optional[str] = None,
+        sparse_vector: Optional[qdrant_models.SparseVector] = None
     ) -> list[QdrantPoint]:
-        search_result = self.client.query_points(
-            collection_name=collection,
-            query=qdrant_models.QueryRequest(
-                vector=query_vector,
-                filter=filters.build() if filters else None,
-                limit=limit,
+        query_filter = filters.build() if filters else None
+        if sparse_vector is not None and not self.has_sparse_vectors(collection):
+            sparse_vector = None
+        if sparse_vector is None:
+            query = dict(
+                query=query_vector,
+                query_filter=query_filter,
                 score_threshold=score_threshold,
-                with_payload=True,
-                with_vectors=True
+                search_params=self.search_params
             )
-        )
+        else:
+            # Both rankings in one request, fused by reciprocal rank on the server.
+            # Fused scores are rank based, the threshold applies to the dense similarity.
+            prefetch_limit = max(limit or 10, self.collection_config.hybrid_prefetch_limit if self.collection_config else 20)
+            query = dict(
+                prefetch=[
+                    qdrant_models.Prefetch(
+                        query=query_vector,
+                        filter=query_filter,
+                        limit=prefetch_limit,
+                        score_threshold=score_threshold,
+                        params=self.search_params
+                    ),
+                    qdrant_models.Prefetch(
+                        query=sparse_vector,
+                        using=SPARSE_VECTOR_NAME,
+                        filter=query_filter,
+                        limit=prefetch_limit
+                    ),
+                ],
+                query=qdrant_models.FusionQuery(fusion=qdrant_models.Fusion.RRF)
+            )
+        search_result = self.client.query_points(
+            collection_name=collection,
+            shard_key_selector=self._shard_key(tenant_id),
+            limit=limit or 10,
+            with_payload=True,
+            with_vectors=True,
+            **query
+        ).points
         return [
             QdrantPoint(
                 payload=point.payload,
-                vector=point.vector,
+                vector=_dense_vector(point.vector),
                 score=point.score
             ) for point in search_result
         ]
@@ -110,10 +186,12 @@ class QdrantProvider:
         self,
         collection: str,
         filters: QdrantFilter,
-        limit: Optional[int] = None
+        limit: Optional[int] = None,
+        tenant_id: Optional[str] = None
     ) -> list[QdrantPoint]:
         scroll_result = self.client.scroll(
             collection_name=collection,
+            shard_key_selector=self._shard_key(tenant_id),
             scroll_filter=filters.build(),
             limit=limit,
             with_payload=True,
@@ -122,6 +200,14 @@ class QdrantProvider:
         return [
             QdrantPoint(
                 payload=point.payload,
-                vector=point.vector
+                vector=_dense_vector(point.vector)
             ) for point in scroll_result
-        ]
\ No newline at end of file
+        ]
+
+
+def create_qdrant_access(config: QdrantConfig) -> QdrantAccess:
+    """Create the Qdrant access implementation selected by the configured backend"""
+    if config.backend == "local":
+        from src.utils.local_vector_store import LocalVectorStore
+        return LocalVectorStore(config.local_path)
+    return QdrantProvider(config)
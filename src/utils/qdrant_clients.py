@@ -0,0 +1,46 @@
+import os
+import threading
+
+from qdrant_client import QdrantClient
+
+from src.utils.configs import QdrantConfig
+
+_lock = threading.Lock()
+_clients: dict[str, QdrantClient] = {}
+
+
+def _key(config: QdrantConfig) -> str:
+    """Connection settings of a config, collections and upload settings do not need their own client"""
+    return config.model_dump_json(include=config.connection_fields())
+
+
+def qdrant_client(config: QdrantConfig) -> QdrantClient:
+    """Process-wide client for the Qdrant server of a config
+
+    Every component connecting with the same settings shares one client, so
+    its gRPC channel (or REST connection pool) is opened once per process.
+    """
+    key = _key(config)
+    with _lock:
+        if key not in _clients:
+            _clients[key] = QdrantClient(**config.client_options())
+        return _clients[key]
+
+
+def close_qdrant_clients():
+    """Close every client of the process, the next call to qdrant_client opens a new one"""
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
+
+
+def _forget_clients():
+    # Channels inherited from the parent are not usable after a fork, the child opens its own
+    global _lock
+    _lock = threading.Lock()
+    _clients.clear()
+
+
+os.register_at_fork(after_in_child=_forget_clients)
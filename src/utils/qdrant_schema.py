@@ -0,0 +1,153 @@
+from typing import Optional
+
+import grpc
+from qdrant_client import QdrantClient
+from qdrant_client.http import models as qdrant_models
+from qdrant_client.http.exceptions import UnexpectedResponse
+
+from src.utils.configs import QdrantCollectionConfig, EmbeddingConfig
+
+# Name of the sparse vector, the dense vector is the unnamed default one
+SPARSE_VECTOR_NAME = "sparse"
+
+
+def has_sparse_vectors(client: QdrantClient, collection_name: str) -> bool:
+    """Whether a collection has the sparse vector, collections created before hybrid search do not"""
+    sparse_vectors = client.get_collection(collection_name).config.params.sparse_vectors or {}
+    return SPARSE_VECTOR_NAME in sparse_vectors
+
+
+def resolve_alias(client: QdrantClient, name: str) -> Optional[str]:
+    """Collection an alias points to, None when the name is not an alias"""
+    for alias in client.get_aliases().aliases:
+        if alias.alias_name == name:
+            return alias.collection_name
+    return None
+
+
+class CollectionSchema:
+    """Creates profile collections and resolves their tenant layout
+
+    Tenancy layouts:
+    - payload: a plain keyword index on entity_id, one global HNSW graph
+    - tenant_index: entity_id is indexed as a tenant and HNSW graphs are built per
+      entity (payload_m) instead of globally (m=0)
+    - shard_key: custom sharding, each entity (or hash bucket of entities) gets its
+      own shard key so a search only touches that shard
+    """
+
+    def __init__(self, collection_config: QdrantCollectionConfig, embedding_config: EmbeddingConfig):
+        self.collection_config = collection_config
+        self.embedding_config = embedding_config
+        self._created_shard_keys: set[str] = set()
+
+    def vectors_config(self) -> qdrant_models.VectorParams:
+        """Vector parameters from the embedding and collection configs"""
+        return qdrant_models.VectorParams(
+            size=self.embedding_config.stored_vector_size,
+            distance=self.embedding_config.distance_metric,
+            on_disk=self.collection_config.on_disk_vectors
+        )
+
+    def sparse_vectors_config(self) -> Optional[dict[str, qdrant_models.SparseVectorParams]]:
+        """Sparse vector parameters, None when hybrid search is disabled"""
+        if not self.embedding_config.sparse_model_name:
+            return None
+        return {
+            SPARSE_VECTOR_NAME: qdrant_models.SparseVectorParams(
+                index=qdrant_models.SparseIndexParams(on_disk=self.collection_config.on_disk_vectors),
+                modifier=qdrant_models.Modifier.IDF if self.embedding_config.sparse_uses_idf else None
+            )
+        }
+
+    def hnsw_config(self) -> Optional[qdrant_models.HnswConfigDiff]:
+        """HNSW parameters, None to keep the server defaults"""
+        if self.collection_config.tenancy == "tenant_index":
+            # Skip the global graph, build one graph per entity_id value
+            return qdrant_models.HnswConfigDiff(
+                m=0,
+                payload_m=self.collection_config.hnsw_m or 16,
+                ef_construct=self.collection_config.hnsw_ef_construct
+            )
+        if self.collection_config.hnsw_m is None and self.collection_config.hnsw_ef_construct is None:
+            return None
+        return qdrant_models.HnswConfigDiff(
+            m=self.collection_config.hnsw_m,
+            ef_construct=self.collection_config.hnsw_ef_construct
+        )
+
+    def quantization_config(self) -> Optional[qdrant_models.QuantizationConfig]:
+        """Quantization parameters, None when quantization is disabled"""
+        if self.collection_config.quantization == "scalar":
+            return qdrant_models.ScalarQuantization(
+                scalar=qdrant_models.ScalarQuantizationConfig(
+                    type=qdrant_models.ScalarType.INT8,
+                    always_ram=self.collection_config.quantization_always_ram
+                )
+            )
+        if self.collection_config.quantization == "binary":
+            return qdrant_models.BinaryQuantization(
+                binary=qdrant_models.BinaryQuantizationConfig(
+                    always_ram=self.collection_config.quantization_always_ram
+                )
+            )
+        return None
+
+    def entity_index_schema(self) -> qdrant_models.PayloadSchemaType | qdrant_models.KeywordIndexParams:
+        """Index schema of the entity_id payload field"""
+        if self.collection_config.tenancy == "tenant_index":
+            return qdrant_models.KeywordIndexParams(
+                type=qdrant_models.KeywordIndexType.KEYWORD,
+                is_tenant=True
+            )
+        return qdrant_models.PayloadSchemaType.KEYWORD
+
+    def shard_key(self, entity_id: str) -> Optional[str]:
+        """Shard key holding the entity, None unless the shard_key layout is used"""
+        return self.collection_config.shard_key(entity_id)
+
+    def create(self, client: QdrantClient, collection_name: str):
+        """Create a collection and its payload indexes"""
+        client.create_collection(
+            collection_name=collection_name,
+            vectors_config=self.vectors_config(),
+            sparse_vectors_config=self.sparse_vectors_config(),
+            hnsw_config=self.hnsw_config(),
+            quantization_config=self.quantization_config(),
+            on_disk_payload=self.collection_config.on_disk_payload,
+            sharding_method=(
+                qdrant_models.ShardingMethod.CUSTOM
+                if self.collection_config.tenancy == "shard_key" else None
+            )
+        )
+
+        # Create payload index for title field
+        client.create_payload_index(
+            collection_name=collection_name,
+            field_name="title",
+            field_schema=qdrant_models.PayloadSchemaType.KEYWORD
+        )
+        # Create payload index for entity_id field to allow filtering by entity_id
+        client.create_payload_index(
+            collection_name=collection_name,
+            field_name="entity_id",
+            field_schema=self.entity_index_schema()
+        )
+        # Create payload index for the write time, used by reindexing to catch up with live writes
+        client.create_payload_index(
+            collection_name=collection_name,
+            field_name="indexed_at",
+            field_schema=qdrant_models.PayloadSchemaType.FLOAT
+        )
+
+    def prepare_entity(self, client: QdrantClient, collection_name: str, entity_id: str):
+        """Make sure the shard holding the entity exists before writing to it"""
+        shard_key = self.shard_key(entity_id)
+        if shard_key is None or shard_key in self._created_shard_keys:
+            return
+        try:
+            client.create_shard_key(collection_name, shard_key=shard_key)
+        except (UnexpectedResponse, grpc.RpcError) as e:
+            if "already exists" not in str(e):
+                raise
+        self._created_shard_keys.add(shard_key)
@@ -0,0 +1,134 @@
+import json
+import sqlite3
+import zlib
+from contextlib import closing
+from pathlib import Path
+from typing import Optional, Protocol
+
+from src.utils.configs import SectionTextConfig
+from src.utils.models import EnhancedContentSection
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+# Section fields kept in the text store instead of the Qdrant payload
+TEXT_FIELDS = ("summary", "notes", "analysis", "actionable_gap_analysis")
+
+# A section is identified by its entity and title, as its Qdrant point id is
+SectionKey = tuple[str, str]
+
+
+def _compress(data: bytes, codec: str, level: int) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    return zlib.compress(data, level)
+
+
+def _decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise ImportError("Reading zstd compressed section text requires the zstandard package")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+class SectionTextStoreProtocol(Protocol):
+    """Protocol for storing the long text of profile sections outside of Qdrant"""
+    def put(self, sections: list[tuple[str, EnhancedContentSection]]) -> None:
+        """Store the text of sections, given with their entity, replacing previous versions"""
+        ...
+
+    def get(self, keys: list[SectionKey]) -> dict[SectionKey, dict[str, str]]:
+        """Text fields of the requested (entity, title) sections, missing ones are left out"""
+        ...
+
+    def remove_stale(self, entity_id: str, keep_titles: list[str]) -> None:
+        """Remove sections of the entity that are not in keep_titles"""
+        ...
+
+
+class SQLiteSectionTextStore(SectionTextStoreProtocol):
+    """Compressed section text in a SQLite file, one row per section
+
+    The text fields of a section are compressed together, each row records its
+    codec so that changing the compression does not require a rewrite.
+    """
+
+    def __init__(self, path: Path, compression: str = "zstd", compression_level: int = 9):
+        self.path = Path(path)
+        self.codec = compression if compression == "zlib" or zstandard is not None else "zlib"
+        # zlib levels stop at 9
+        self.level = compression_level if self.codec == "zstd" else min(compression_level, 9)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS section_text (
+                    entity_id TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    codec TEXT NOT NULL,
+                    text BLOB NOT NULL,
+                    PRIMARY KEY (entity_id, title)
+                )
+            """)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def put(self, sections: list[tuple[str, EnhancedContentSection]]) -> None:
+        rows = [
+            (
+                entity_id,
+                section.title,
+                self.codec,
+                _compress(json.dumps(section.model_dump(include=set(TEXT_FIELDS))).encode(), self.codec, self.level)
+            )
+            for entity_id, section in sections
+        ]
+        with closing(self._connect()) as db, db:
+            db.executemany("INSERT OR REPLACE INTO section_text VALUES (?, ?, ?, ?)", rows)
+
+    def get(self, keys: list[SectionKey]) -> dict[SectionKey, dict[str, str]]:
+        texts = {}
+        with closing(self._connect()) as db:
+            for entity_id, title in set(keys):
+                row = db.execute(
+                    "SELECT codec, text FROM section_text WHERE entity_id = ? AND title = ?",
+                    (entity_id, title)
+                ).fetchone()
+                if row:
+                    texts[(entity_id, title)] = json.loads(_decompress(row[1], row[0]))
+        return texts
+
+    def remove_stale(self, entity_id: str, keep_titles: list[str]) -> None:
+        placeholders = ", ".join("?" * len(keep_titles))
+        with closing(self._connect()) as db, db:
+            db.execute(
+                f"DELETE FROM section_text WHERE entity_id = ? AND title NOT IN ({placeholders})",
+                (entity_id, *keep_titles)
+            )
+
+
+def create_section_text_store(config: SectionTextConfig) -> Optional[SectionTextStoreProtocol]:
+    """Create the section text store, None when the text is kept in Qdrant payloads"""
+    if not config.enabled:
+        return None
+    return SQLiteSectionTextStore(config.path, config.compression, config.compression_level)
+
+
+def hydrate(store: Optional[SectionTextStoreProtocol], payloads: list[dict]) -> list[dict]:
+    """Payloads with their section text, read from the store for slim payloads
+
+    Payloads already carrying the text, written before the store was enabled,
+    are returned as they are, and so are those whose text is not in the store.
+    """
+    slim = [(payload["entity_id"], payload["title"]) for payload in payloads if "summary" not in payload]
+    if not slim or store is None:
+        return payloads
+    texts = store.get(slim)
+    return [
+        payload | texts.get((payload["entity_id"], payload["title"]), {}) if "summary" not in payload else payload
+        for payload in payloads
+    ]
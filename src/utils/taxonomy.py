@@ -1,4 +1,4 @@
-from src.utils.models import SectionInfo, Taxonomy
+from src.utils.models import SectionInfo, SectionTitle, Taxonomy, TaxonomyCategory
 
 taxonomy: Taxonomy = {
   "TEAM_LEADERSHIP": [
@@ -93,4 +93,18 @@ section_info: SectionInfo = {
   "Legal and Compliance": "Note IP rights, regulatory requirements, certifications, and any legal aspects.",
   "Impact and Innovation": "Discuss social, environmental, or economic impacts, sustainability, and contributions to innovation.",
   "Additional Supporting Information": "Include insights from supplementary materials like pitch decks, business plans, technical documents, or financial models.",
-}
\ No newline at end of file
+}
+
+# Profile sections covering each taxonomy category
+category_sections: dict[TaxonomyCategory, list[SectionTitle]] = {
+  "TEAM_LEADERSHIP": ["Team and Leadership"],
+  "COMPANY_FUNDAMENTALS": ["Introduction"],
+  "PRODUCT_TECHNOLOGY": ["Technology/Innovation", "The Solution"],
+  "MARKET_ANALYSIS": ["Market Opportunity", "Competitive Analysis"],
+  "BUSINESS_MODEL": ["The Business Model", "Go-to-Market Strategy"],
+  "TRACTION_VALIDATION": ["Traction and Validation"],
+  "FINANCIAL_INFORMATION": ["Financial Information"],
+  "DEVELOPMENT_EXECUTION": ["Development and Execution"],
+  "LEGAL_COMPLIANCE": ["Legal and Compliance"],
+  "IMPACT_INNOVATION": ["Impact and Innovation"],
+}
@@ -0,0 +1,3 @@
+from src.warmup.assets import warmup
+
+__all__ = ["warmup"]
@@ -0,0 +1,189 @@
+import io
+import logging
+import time
+import wave
+from pathlib import Path
+
+from src.utils.configs import AppConfig
+from src.utils.model_cache import build_manifest, configure_model_cache, file_sha256, verify_manifest
+
+logger = logging.getLogger(__name__)
+
+# Files needed by from_pretrained with use_safetensors, skipping the PyTorch and Flax weights
+_WHISPER_FILES = ["*.json", "*.txt", "model.safetensors"]
+
+
+def download_whisper() -> list[str]:
+    """Download the Whisper model into the Hugging Face cache
+
+    Returns:
+        Problems found verifying the LFS checksums published by the hub
+    """
+    from huggingface_hub import HfApi, snapshot_download
+    from src.ingestion.extract.audio import WHISPER_MODEL
+
+    # Pin the revision so the checksums match the downloaded files
+    info = HfApi().model_info(WHISPER_MODEL, files_metadata=True)
+    snapshot = Path(snapshot_download(WHISPER_MODEL, revision=info.sha, allow_patterns=_WHISPER_FILES))
+    # Downloading by commit does not record it as main, which offline from_pretrained resolves
+    refs = snapshot.parent.parent / "refs"
+    refs.mkdir(exist_ok=True)
+    (refs / "main").write_text(info.sha)
+
+    problems = []
+    for sibling in info.siblings:
+        path = snapshot / sibling.rfilename
+        if sibling.lfs is not None and path.exists() and file_sha256(path) != sibling.lfs.sha256:
+            problems.append(f"Checksum mismatch for {WHISPER_MODEL}/{sibling.rfilename}")
+    return problems
+
+
+def download_docling(artifacts_path: Path):
+    """Download the Docling layout, TableFormer and OCR models"""
+    artifacts_path.mkdir(parents=True, exist_ok=True)
+    try:
+        from docling.utils.model_downloader import download_models
+    except ImportError:
+        # Older Docling releases only ship the layout and TableFormer downloader
+        from docling.pipeline.standard_pdf_pipeline import StandardPdfPipeline
+        StandardPdfPipeline.download_models_hf(local_dir=artifacts_path)
+        return
+    download_models(
+        output_dir=artifacts_path,
+        with_layout=True,
+        with_tableformer=True,
+        with_easyocr=True,
+        with_code_formula=False,
+        with_picture_classifier=False
+    )
+
+
+def download_embedding(model_name: str, cache_dir: Path):
+    """Download a FastEmbed model"""
+    from fastembed import TextEmbedding
+    TextEmbedding(model_name, cache_dir=str(cache_dir))
+
+
+def download_sparse_embedding(model_name: str, cache_dir: Path):
+    """Download a FastEmbed sparse model"""
+    from fastembed import SparseTextEmbedding
+    SparseTextEmbedding(model_name, cache_dir=str(cache_dir))
+
+
+def _silent_wav(seconds: float = 1.0, sample_rate: int = 16000) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(b"\0\0" * int(seconds * sample_rate))
+    return buffer.getvalue()
+
+
+def _tiny_pdf(text: str = "Warmup") -> bytes:
+    """A single page PDF with one line of text"""
+    stream = f"BT /F1 24 Tf 72 720 Td ({text}) Tj ET".encode()
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+        b"/Resources << /Font << /F1 5 0 R >> >> /Contents 4 0 R >>",
+        b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    pdf = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return pdf
+
+
+def _sparse_models(config: AppConfig) -> list[str]:
+    # Queries use the sparse model of the ingestion embedding config
+    return [config.embedding.sparse_model_name] if config.embedding.sparse_model_name else []
+
+
+def run_inference(config: AppConfig):
+    """Run one tiny inference per model to initialize kernels and lazy state"""
+    from src.utils.embedding import Embedder, SparseEmbedder
+    from src.utils.model_registry import ModelRegistry
+    from src.ingestion.extract import AudioExtractor, DocumentExtractor
+
+    registry = ModelRegistry(config.models)
+    steps = [
+        # Without VAD the silence still goes through Whisper
+        ("whisper", lambda: AudioExtractor(
+            registry,
+            config=config.audio.model_copy(update={"vad": "none"})
+        ).extract_text(_silent_wav(), "warmup.wav")),
+        ("docling", lambda: DocumentExtractor(
+            registry,
+            artifacts_path=config.models.docling_artifacts_path
+        ).extract_text(_tiny_pdf(), "warmup.pdf")),
+    ]
+    for embedding_config in {config.embedding.model_name: config.embedding,
+                             config.search.embedding_config.model_name: config.search.embedding_config}.values():
+        embedder = Embedder(embedding_config, registry)
+        steps.append((embedding_config.model_name, lambda embedder=embedder: list(embedder.embed(["warmup"]))))
+    for sparse_model_name in _sparse_models(config):
+        embedder = SparseEmbedder(sparse_model_name, registry)
+        steps.append((sparse_model_name, lambda embedder=embedder: embedder.query_embed("warmup")))
+
+    for name, step in steps:
+        started = time.monotonic()
+        step()
+        logger.info(f"Warmed up {name} in {time.monotonic() - started:.1f}s")
+
+
+def warmup(config: AppConfig, verify_only: bool = False, inference: bool = True) -> bool:
+    """Prefetch every model into models.cache_dir and verify it
+
+    Downloads Whisper, the Docling models and the FastEmbed models, records their
+    checksums in a manifest and runs a tiny inference with each. Later runs with
+    models.offline load them from the cache without network access.
+
+    Args:
+        config: Application configuration, models.cache_dir must be set
+        verify_only: Only check the cache against its manifest, without downloading
+        inference: Run one tiny inference per model after downloading
+
+    Returns:
+        Whether the cache is complete and intact
+    """
+    logging.basicConfig(level=logging.INFO)
+    cache_dir = config.models.cache_dir
+    if cache_dir is None:
+        raise ValueError("models.cache_dir must be set to warm up the model cache")
+
+    if verify_only:
+        problems = verify_manifest(cache_dir)
+    else:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        configure_model_cache(cache_dir, offline=False)
+
+        embedding_models = sorted({config.embedding.model_name, config.search.embedding_config.model_name})
+        logger.info("Downloading Whisper")
+        problems = download_whisper()
+        logger.info("Downloading Docling models")
+        download_docling(config.models.docling_artifacts_path)
+        for model_name in embedding_models:
+            logger.info(f"Downloading {model_name}")
+            download_embedding(model_name, cache_dir / "fastembed")
+        for model_name in _sparse_models(config):
+            logger.info(f"Downloading {model_name}")
+            download_sparse_embedding(model_name, cache_dir / "fastembed")
+
+        if not problems:
+            manifest = build_manifest(cache_dir, models=["whisper", "docling", *embedding_models, *_sparse_models(config)])
+            logger.info(f"Recorded {len(manifest.files)} files in the cache manifest")
+        if inference and not problems:
+            run_inference(config)
+
+    for problem in problems:
+        logger.error(problem)
+    return not problems
@@ -0,0 +1,79 @@
+import pytest
+
+from src.grant_answering.structured_answers import StructuredAnswerer, parse_date, parse_number
+from src.utils.models import GrantQuestion
+
+
+def question(type: str, title: str, text: str) -> GrantQuestion:
+    return GrantQuestion(
+        identifier="1.1",
+        type=type,
+        category="1. General",
+        title=title,
+        question=text,
+        answer_structure_instructions="",
+        answer_content_instructions=""
+    )
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("12", 12.0),
+    ("1,200 employees", 1200.0),
+    ("$2.5m", 2_500_000.0),
+    ("₪ 300 thousand", 300_000.0),
+    ("15%", 15.0),
+    (7, 7.0),
+])
+def test_parse_number_accepts_whole_numbers_with_units(value, expected):
+    assert parse_number(value) == expected
+
+
+@pytest.mark.parametrize("value", ["Web3 Labs", "Founded in 2019 by two engineers", "v2 beta", True])
+def test_parse_number_rejects_text_containing_a_number(value):
+    assert parse_number(value) is None
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("2019", "2019"),
+    ("03/2019", "2019-03"),
+    ("March 2019", "2019-03"),
+    ("15/03/2019", "2019-03-15"),
+    ("2019-03-15", "2019-03-15"),
+])
+def test_parse_date_keeps_precision(value, expected):
+    assert parse_date(value) == expected
+
+
+def test_generic_word_does_not_match_unrelated_field():
+    answerer = StructuredAnswerer()
+    asked = question("number", "Patents", "How many patents does the company hold?")
+    assert answerer.answer(asked, {"companyId": "514123456"}) is None
+    assert answerer.stats.fallbacks == 1
+
+
+def test_text_field_is_not_a_number():
+    asked = question("number", "Company registration number", "What is the company registration number?")
+    assert StructuredAnswerer().answer(asked, {"companyName": "Web3 Labs"}) is None
+
+
+def test_matching_field_answers():
+    answerer = StructuredAnswerer()
+    asked = question("number", "Number of employees", "How many employees does the company have?")
+    fields = {"companyName": "Web3 Labs", "numberOfEmployees": "12", "founded": "2019"}
+    assert answerer.answer(asked, fields) == "12"
+    assert answerer.stats.answered == 1
+
+
+def test_year_date_is_not_expanded():
+    asked = question("date", "Founding year", "When was the company founded?")
+    assert StructuredAnswerer().answer(asked, {"foundingYear": "2019"}) == "2019"
+
+
+@pytest.mark.parametrize("title, text", [
+    ("Number of employees planned", "How many employees do you plan to hire over the project?"),
+    ("Employees in research", "How many of the employees work in research and development?"),
+])
+def test_key_covering_part_of_the_title_does_not_answer(title, text):
+    answerer = StructuredAnswerer()
+    assert answerer.answer(question("number", title, text), {"employees": "12"}) is None
+    assert answerer.stats.fallbacks == 1